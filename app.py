@@ -1,21 +1,320 @@
-from flask import Flask, render_template, request, redirect, url_for
-import pymysql
+import json
+import os
+import time
+from functools import partial
+
+from markupsafe import Markup
+from flask import (Flask, render_template, request, redirect, url_for, g, jsonify, abort,
+                   flash, get_flashed_messages, make_response, Response, has_app_context, has_request_context,
+                   before_render_template, template_rendered)
+
+from db_pool import PoolTimeout
+from storage import create_backend
+from currency_cache import CurrencyRateCache
+from metrics import MetricsRegistry, RequestStats
+from slow_queries import SlowQueryLog
+from jobs import JobRunner
+import ledger
+import queries
+from expense_shares import split_even, insert_shares, sync_shares
+from money import Money
+from expense_import import import_expenses, open_upload
+from expense_resplit import (resplit_trip, count_trip_expenses, resplit_job,
+                             merge_resplit_payload)
+from settlement import compute_transfers, summarize_balances
+from trip_snapshot import load_trip_snapshot
+from trip_analytics import load_trip_analytics
+from trip_rollups import (compact_job, load_month_rollups, load_trip_rollups,
+                          summarize_months)
+from trip_export import stream_export
+from trip_purge import mark_deleted, purge_status, purge_job
+from currency_reconvert import merge_reconvert_payload, reconvert_job
+from trip_pages import fetch_trip_page, parse_date
+from trip_cache import (RenderCache, bump_trip_version, get_trip_version,
+                        trip_etag, fragment_key)
 
 app = Flask(__name__)
 
+# --------------------------
+# DB 설정
+# --------------------------
+app.config.update(
+    # flash 메시지(세션 쿠키) 서명용, 운영에서는 TRAVELMATE_SECRET_KEY 로 지정
+    SECRET_KEY=os.environ.get('TRAVELMATE_SECRET_KEY', 'travelmate-dev'),
+    # mysql(기본) 또는 sqlite (MySQL 없이 테스트 / 벤치마크, storage.py)
+    DB_BACKEND=os.environ.get('TRAVELMATE_DB_BACKEND', 'mysql'),
+    SQLITE_PATH=os.environ.get('TRAVELMATE_SQLITE_PATH', ':memory:'),
+    SQLITE_SAMPLE_DATA=True,   # 새 SQLite DB 에 insert_sample_data.sql 넣기
+    DB_HOST='localhost',
+    DB_USER='root',
+    DB_PASSWORD='password',
+    DB_NAME='travelmate',
+    DB_POOL_SIZE=10,          # 동시에 열어 둘 최대 커넥션 수
+    DB_POOL_TIMEOUT=5.0,      # 풀이 꽉 찼을 때 기다리는 최대 시간(초)
+    DB_POOL_PING_INTERVAL=30.0,
+    CURRENCY_CACHE_TTL=300.0,  # 환율 캐시를 다시 확인하는 주기(초)
+    TRIP_LIST_PAGE_SIZE=20,    # 여행 목록 한 페이지 기본 개수 (?size= 로 변경)
+    TRIP_LIST_MAX_PAGE_SIZE=100,
+    TRIP_HTML_CACHE_BYTES=16 * 1024 * 1024,  # 여행 상세 HTML 캐시 상한 (0이면 사용 안 함)
+    TRIP_FRAGMENT_CACHE_BYTES=16 * 1024 * 1024,  # 상세 페이지 부분(타임라인/지출/정산) 캐시 상한
+    TRIP_ANALYTICS_CACHE_BYTES=8 * 1024 * 1024,  # 지출 분석 결과(JSON) 캐시 상한
+    IMPORT_CHUNK_SIZE=1000,    # CSV 가져오기: 몇 줄마다 커밋할지
+    RESPLIT_INLINE_MAX_EXPENSES=500,  # 참가자 변경 시 지출이 이보다 많으면 N빵 재계산은 백그라운드로
+    TRIP_PURGE_BATCH=500,      # 삭제된 여행 정리: 한 트랜잭션에서 지우는 행 수 상한
+    TRIP_PURGE_PAUSE=0.05,     # 정리 batch 사이에 쉬는 시간(초)
+    RECONVERT_CHUNK=1000,      # 환율 수정 후 원화 금액 재계산: 한 트랜잭션에서 훑을 PK 구간 크기
+    RECONVERT_PAUSE=0.05,      # 재계산 구간 사이에 쉬는 시간(초)
+    ROLLUP_COMPACT_INTERVAL=3600,  # 대시보드 월 요약 다시 계산 + 0 인 요약 행 정리 주기(초)
+    ROLLUP_COMPACT_BATCH=1000,     # 정리할 때 한 트랜잭션에서 훑을 trip_id 구간 크기
+    ROLLUP_COMPACT_PAUSE=0.05,     # 정리 구간 사이에 쉬는 시간(초)
+    JOB_WORKERS=2,             # 백그라운드 작업을 동시에 실행할 스레드 수 (jobs.py)
+    JOB_POLL_INTERVAL=5.0,     # 새 작업 / 다시 시도할 작업을 확인하는 주기(초)
+    JOB_MAX_ATTEMPTS=3,        # 실패한 작업을 몇 번까지 시도할지
+    JOB_LEASE=120,             # 실행 중인 작업이 이 시간(초) 동안 heartbeat 가 없으면 다른 프로세스가 다시 실행
+    SERVER_TIMING=True,        # 응답에 Server-Timing 헤더(DB/렌더링 시간) 붙이기
+    SLOW_QUERY_MS=100,         # 이 시간 이상 걸린 쿼리는 /debug/slow-queries 에 기록
+    SLOW_QUERY_BUFFER=200,     # 최근 느린 쿼리를 몇 개까지 메모리에 둘지
+    SLOW_QUERY_LOG=None,       # 파일 경로를 주면 회전 로그(JSON 한 줄씩)에도 기록
+)
+
+# 저장소(MySQL / SQLite) 선택 → 커넥션 풀
+backend = create_backend(app.config)
+pool = backend.create_pool()
+
+# 환율은 거의 안 바뀌므로 메모리에 들고 있다가 꺼내 쓴다
+rate_cache = CurrencyRateCache(ttl=app.config['CURRENCY_CACHE_TTL'])
+
+# 여행 상세 페이지 렌더링 결과 캐시 ((trip_id, version) → HTML)
+html_cache = RenderCache(max_bytes=app.config['TRIP_HTML_CACHE_BYTES'])
+
+# 상세 페이지의 부분별 HTML 캐시 ((trip_id, 부분), 데이터 해시) → HTML
+fragment_cache = RenderCache(max_bytes=app.config['TRIP_FRAGMENT_CACHE_BYTES'])
+TRIP_FRAGMENTS = ('itinerary', 'expenses', 'settlement')
+
+# 지출 분석 결과 캐시 ((trip_id, version) → JSON)
+analytics_cache = RenderCache(max_bytes=app.config['TRIP_ANALYTICS_CACHE_BYTES'])
+
+# 백그라운드 작업 (jobs 테이블, 첫 요청 때 스레드 시작 + 끝나지 않은 작업 이어서)
+job_runner = JobRunner(
+    acquire=pool.acquire,
+    workers=app.config['JOB_WORKERS'],
+    poll_interval=app.config['JOB_POLL_INTERVAL'],
+    max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+    lease=app.config['JOB_LEASE'],
+)
+# 참가자 변경 후 N빵 재계산 (지출이 많은 여행)
+job_runner.register('resplit', resplit_job, merge=merge_resplit_payload)
+# 삭제된 여행의 딸린 행 정리
+job_runner.register('trip_purge', partial(
+    purge_job,
+    batch=app.config['TRIP_PURGE_BATCH'],
+    pause=app.config['TRIP_PURGE_PAUSE'],
+))
+# 환율 수정 후 원화 금액 / N빵 다시 계산
+job_runner.register('reconvert', partial(
+    reconvert_job,
+    chunk=app.config['RECONVERT_CHUNK'],
+    pause=app.config['RECONVERT_PAUSE'],
+), merge=merge_reconvert_payload)
+# 대시보드 요약 정리 (주기 작업)
+job_runner.register('rollup_compact', partial(
+    compact_job,
+    batch=app.config['ROLLUP_COMPACT_BATCH'],
+    pause=app.config['ROLLUP_COMPACT_PAUSE'],
+), every=app.config['ROLLUP_COMPACT_INTERVAL'])
+
 # --------------------------
 # DB 연결 함수
 # --------------------------
 def get_connection():
-    return pymysql.connect(
-        host='localhost',
-        user='root',
-        password='password', 
-        db='travelmate',
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
+    # 요청당 커넥션 1개만 풀에서 빌려 쓴다.
+    # 라우트에서 conn.close() 하면 풀로 반납되고,
+    # 예외 등으로 반납을 못 했으면 teardown 에서 대신 반납한다.
+    conn = g.get('db_conn')
+    if conn is None or conn.closed:
+        conn = pool.acquire()
+        g.db_conn = conn
+    return conn
+
+
+def _trip_not_found():
+    # 없는 / 삭제된 여행: 폼(GET)은 목록으로, 쓰기(POST)는 404
+    if request.method == 'POST':
+        abort(404)
+    return redirect(url_for('trip_list'))
+
+
+@app.teardown_appcontext
+def release_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn.close()
+
+
+# --------------------------
+# 요청별 측정 (쿼리 수 / DB 시간 / 렌더링 시간 / 느린 쿼리)
+# --------------------------
+metrics = MetricsRegistry()
+
+
+# 느린 쿼리 (EXPLAIN 은 별도 커넥션으로 백그라운드에서)
+# 풀 크기가 1 이면(SQLite :memory:) 요청이 커넥션을 쥐고 있어 빌릴 수 없으므로 EXPLAIN 은 건너뛴다
+slow_log = SlowQueryLog(
+    threshold=app.config['SLOW_QUERY_MS'] / 1000.0,
+    capacity=app.config['SLOW_QUERY_BUFFER'],
+    log_path=app.config['SLOW_QUERY_LOG'],
+    acquire=pool.acquire if backend.pool_size > 1 else None,
+    explain=backend.explain,
+)
+
+
+def _trace_query(kind, sql, params, seconds):
+    # 요청 밖(CLI, 스트리밍 내보내기, EXPLAIN 스레드 등)에서 쓰는 커서는 무시
+    if not has_app_context():
+        return
+    stats = g.get('db_stats')
+    if stats is not None:
+        stats.add(kind, sql, seconds)
+    if kind != 'fetch':
+        slow_log.record(kind, sql, params, seconds, route=request.endpoint if has_request_context() else None)
+
+
+pool.tracers.append(_trace_query)
+
+
+@app.before_request
+def start_request_timer():
+    g.db_stats = RequestStats()
+    g.request_started = time.perf_counter()
+
+
+@app.before_request
+def start_background_workers():
+    # import 할 때가 아니라 첫 요청 때 (CLI 스크립트가 app 을 import 해도 스레드가 안 뜨게)
+    job_runner.start()
+
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    stats = g.get('db_stats')
+    if started is not None and stats is not None:
+        stats.render_time += time.perf_counter() - started
+
+
+@app.after_request
+def record_request_metrics(response):
+    stats = g.get('db_stats')
+    started = g.get('request_started')
+    if stats is None or started is None:
+        return response
+
+    total = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    metrics.observe(endpoint, request.method, response.status_code, total, stats)
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = stats.server_timing(total)
+    return response
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    pool_stats = pool.stats()
+    body = metrics.render(gauges={
+        ('travelmate_db_pool_in_use', '사용 중인 DB 커넥션'): pool_stats['in_use'],
+        ('travelmate_db_pool_idle', '쉬고 있는 DB 커넥션'): pool_stats['idle'],
+        ('travelmate_db_pool_waiting', '커넥션을 기다리는 요청'): pool_stats['waiting'],
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    # 커넥션이 모자라면 무작정 기다리게 하지 않고 잠시 후 다시 시도하게 한다
+    return "서버가 바쁩니다. 잠시 후 다시 시도해 주세요.", 503, {'Retry-After': '1'}
+
+
+# 풀 상태 확인용 (in_use / idle / 대기 시간 등)
+@app.route('/debug/pool')
+def pool_stats():
+    return jsonify(pool.stats())
+
+
+# 삭제된 여행 정리 진행 상황
+@app.route('/debug/trip-purges')
+def trip_purges():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            rows = purge_status(cur)
+    finally:
+        conn.close()
+    return jsonify(purges=rows)
+
+
+# 백그라운드 작업 목록 (?status=queued / running / done / failed)
+@app.route('/jobs')
+def job_list():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            rows = job_runner.recent(cur, status=request.args.get('status'))
+    finally:
+        conn.close()
+    return jsonify(jobs=rows)
+
+
+# 작업 하나의 상태 / 진행률
+@app.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            job = job_runner.get(cur, job_id)
+    finally:
+        conn.close()
+    if job is None:
+        return jsonify(error='not found'), 404
+    return jsonify(job)
+
+
+# 환율 캐시 비우기 (DB에서 currency 환율을 직접 고친 뒤 호출)
+@app.route('/debug/currency-cache/invalidate', methods=['POST'])
+def currency_cache_invalidate():
+    rate_cache.invalidate()
+    return jsonify({"invalidated": True})
+
+
+# 여행 상세 HTML 캐시 상태
+@app.route('/debug/html-cache')
+def html_cache_stats():
+    return jsonify(page=html_cache.stats(), fragments=fragment_cache.stats(),
+                   analytics=analytics_cache.stats())
+
+
+# 느린 쿼리 목록 (총 시간이 큰 순서 + 최근 기록)
+@app.route('/debug/slow-queries')
+def slow_queries():
+    if request.args.get('format') == 'json':
+        return jsonify(top=slow_log.top(), recent=slow_log.recent())
+    return render_template(
+        'slow_queries.html',
+        top=slow_log.top(),
+        recent=slow_log.recent(),
+        threshold_ms=app.config['SLOW_QUERY_MS']
     )
 
+
+@app.route('/debug/slow-queries/clear', methods=['POST'])
+def slow_queries_clear():
+    slow_log.clear()
+    return redirect(url_for('slow_queries'))
+
 # --------------------------
 # 라우트
 # --------------------------
@@ -26,22 +325,92 @@ def index():
     return redirect(url_for('trip_list'))
 
 
-# 여행 목록
+# 여행 목록 / 대시보드 공통: 페이지 크기, 출발일/제목 필터,
+# 페이지 이동 링크에 그대로 붙일 검색 조건
+def _trip_list_params():
+    size = request.args.get('size', type=int) or app.config['TRIP_LIST_PAGE_SIZE']
+    size = max(1, min(size, app.config['TRIP_LIST_MAX_PAGE_SIZE']))
+
+    filters = {
+        'date_from': parse_date(request.args.get('from')),
+        'date_to': parse_date(request.args.get('to')),
+        'title_prefix': (request.args.get('q') or '').strip() or None,
+    }
+
+    query_args = {'size': size}
+    if filters['date_from']:
+        query_args['from'] = filters['date_from']
+    if filters['date_to']:
+        query_args['to'] = filters['date_to']
+    if filters['title_prefix']:
+        query_args['q'] = filters['title_prefix']
+
+    return size, filters, query_args
+
+
+# 여행 목록 (keyset 페이지네이션 + 출발일/제목 필터)
 @app.route('/trips')
 def trip_list():
+    size, filters, query_args = _trip_list_params()
+
+    conn = get_connection()
+    try:
+        page = fetch_trip_page(
+            conn, size,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            **filters
+        )
+    finally:
+        conn.close()
+
+    return render_template(
+        'trip_list.html',
+        trips=page['trips'],
+        next_cursor=page['next_cursor'],
+        prev_cursor=page['prev_cursor'],
+        query_args=query_args
+    )
+
+
+# 여러 여행 요약 (요약 테이블만 읽음, 여행 목록과 같은 페이지네이션 / 필터)
+@app.route('/dashboard')
+def dashboard():
+    size, filters, query_args = _trip_list_params()
+
     conn = get_connection()
     try:
+        page = fetch_trip_page(
+            conn, size,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            **filters
+        )
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT trip_id, title, start_date, end_date
-                FROM trips
-                ORDER BY start_date;
-            """)
-            trips = cur.fetchall()
+            # 전체 여행: 월 × 카테고리 요약 (주기 작업이 계산해 둔 값)
+            summary = summarize_months(load_month_rollups(cur))
+            # 이 페이지 여행들: 여행 × 결제일 × 카테고리 / 여행 × 참가자 요약
+            rollups = load_trip_rollups(cur, [t['trip_id'] for t in page['trips']])
     finally:
         conn.close()
 
-    return render_template('trip_list.html', trips=trips)
+    trips = [dict(t, **rollups[t['trip_id']]) for t in page['trips']]
+
+    if request.args.get('format') == 'json':
+        for t in trips:
+            for key in ('start_date', 'end_date'):
+                t[key] = t[key].isoformat() if t[key] else None
+        return jsonify(summary=summary, trips=trips,
+                       next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'])
+
+    return render_template(
+        'dashboard.html',
+        summary=summary,
+        trips=trips,
+        next_cursor=page['next_cursor'],
+        prev_cursor=page['prev_cursor'],
+        query_args=query_args
+    )
 
 
 # 새 여행 생성 (GET: 폼 / POST: 저장)
@@ -55,10 +424,7 @@ def trip_form():
         conn = get_connection()
         try:
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO trips (title, start_date, end_date)
-                    VALUES (%s, %s, %s)
-                """, (title, start_date, end_date))
+                cur.execute(queries.TRIP_INSERT, (title, start_date, end_date))
             conn.commit()
         finally:
             conn.close()
@@ -72,188 +438,111 @@ def trip_form():
 def trip_detail(trip_id):
     conn = get_connection()
     try:
-        with conn.cursor() as cur:
+        # 0) 여행 version 만 먼저 확인 (PK 조회 1번)
+        version = get_trip_version(conn, trip_id)
+        if version is None:
+            return redirect(url_for('trip_list'))
 
-            # 1) 기본 여행 정보
-            cur.execute("""
-                SELECT trip_id, title, start_date, end_date, total_budget_krw
-                FROM trips
-                WHERE trip_id = %s
-            """, (trip_id,))
-            trip = cur.fetchone()
+        etag = trip_etag(trip_id, version)
 
-            # 2) Day / 도시 목록
-            cur.execute("""
-                SELECT destination_id, day_no, country_name, city_name, note
-                FROM destinations
-                WHERE trip_id = %s
-                ORDER BY day_no;
-            """, (trip_id,))
-            destinations = cur.fetchall()
+        # 보여줄 flash 메시지가 있으면 이번 응답만 캐시 / 304 없이 새로 렌더링
+        flashed = bool(get_flashed_messages())
 
-            # 3) 액티비티 목록
-            cur.execute("""
-                SELECT a.activity_id, d.day_no, d.city_name,
-                       a.name, a.category, a.cost_krw, a.memo
-                FROM activities a
-                JOIN destinations d ON a.destination_id = d.destination_id
-                WHERE d.trip_id = %s
-                ORDER BY d.day_no, a.start_time;
-            """, (trip_id,))
-            activities = cur.fetchall()
-
-            # 4) 지출 내역
-            cur.execute("""
-                SELECT e.expense_id,
-                       u.name AS payer_name,
-                       e.category,
-                       e.amount,
-                       e.currency_code,
-                       e.amount_krw,
-                       e.paid_at,
-                       e.memo
-                FROM expenses e
-                JOIN users u ON e.paid_by_user_id = u.user_id
-                WHERE e.trip_id = %s
-                ORDER BY e.paid_at;
-            """, (trip_id,))
-            expenses = cur.fetchall()
-            
-            # 4-1) 여행 참가자 목록
-            cur.execute("""
-                SELECT u.user_id, u.name
-                FROM trip_participants tp
-                JOIN users u ON tp.user_id = u.user_id
-                WHERE tp.trip_id = %s
-                ORDER BY u.user_id;
-            """, (trip_id,))
-            participants = cur.fetchall()
+        # 브라우저가 같은 version 을 갖고 있으면 본문 없이 304
+        if not flashed and request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
 
-            # 5) "원래" 정산 결과 (지출/참가자 기준)
-            cur.execute("""
-                SELECT
-                    u.user_id,
-                    u.name,
-                    IFNULL(paid.total_paid, 0)   AS total_paid,
-                    IFNULL(shared.total_share, 0) AS total_share,
-                    IFNULL(paid.total_paid, 0) - IFNULL(shared.total_share, 0) AS balance
-                FROM trip_participants tp
-                JOIN users u ON tp.user_id = u.user_id
-                LEFT JOIN (
-                    SELECT paid_by_user_id AS user_id,
-                           SUM(amount_krw) AS total_paid
-                    FROM expenses
-                    WHERE trip_id = %s
-                    GROUP BY paid_by_user_id
-                ) paid ON u.user_id = paid.user_id
-                LEFT JOIN (
-                    SELECT ep.user_id,
-                           SUM(ep.share_amount_krw) AS total_share
-                    FROM expense_participants ep
-                    JOIN expenses e ON ep.expense_id = e.expense_id
-                    WHERE e.trip_id = %s
-                    GROUP BY ep.user_id
-                ) shared ON u.user_id = shared.user_id
-                WHERE tp.trip_id = %s
-                ORDER BY u.user_id;
-            """, (trip_id, trip_id, trip_id))
-            settlement_rows = cur.fetchall()
-
-            # 6) 이미 완료된 송금 내역(누가 누구에게 얼마 보냈는지)
-            cur.execute("""
-                SELECT payer_name, receiver_name, amount
-                FROM settlement_transactions
-                WHERE trip_id = %s AND is_done = 1
-            """, (trip_id,))
-            settled_rows = cur.fetchall()
-
-        # --- 여기부터는 파이썬에서 계산 ---
-
-        # 6-1) 사람별 '보낸 금액' / '받은 금액' 합산
-        paid_map = {}      # 이름 -> 보낸 총 금액
-        received_map = {}  # 이름 -> 받은 총 금액
-
-        for r in settled_rows:
-            amt = float(r["amount"])
-            payer = r["payer_name"]
-            receiver = r["receiver_name"]
-
-            paid_map[payer] = paid_map.get(payer, 0) + amt
-            received_map[receiver] = received_map.get(receiver, 0) + amt
-
-        # 6-2) 송금까지 반영한 "현재 balance"와 "현재 총 결제액" 계산
-        #   - original_balance = total_paid - total_share
-        #   - new_balance = original_balance + 보낸금액 - 받은금액
-        #   - final_paid  = total_share + new_balance
-        settlement = []
-        for row in settlement_rows:
-            name = row["name"]
-            original_balance = float(row["balance"])
-            total_share = float(row["total_share"])
-
-            paid_total = paid_map.get(name, 0)
-            received_total = received_map.get(name, 0)
-
-            new_balance = original_balance + paid_total - received_total
-
-            # 화면 보기 좋은 값으로 반올림 (원 단위)
-            new_balance_rounded = round(new_balance)
-            final_paid = round(total_share + new_balance)   # 송금까지 포함해 최종적으로 부담한 금액
-
-            new_row = dict(row)
-            new_row["balance"] = new_balance_rounded
-            new_row["final_paid"] = final_paid
-            settlement.append(new_row)
-
-        # 7) 남은 balance 기준으로 송금 정리(transactions) 계산
-        receivers = []  # 아직 돈을 더 받아야 하는 사람 (balance > 0)
-        payers = []     # 아직 돈을 더 내야 하는 사람 (balance < 0)
-
-        for row in settlement:
-            if row["balance"] > 0:
-                receivers.append({"name": row["name"], "amount": row["balance"]})
-            elif row["balance"] < 0:
-                payers.append({"name": row["name"], "amount": -row["balance"]})
-
-        transactions = []
-        i, j = 0, 0
-
-        while i < len(payers) and j < len(receivers):
-            pay = payers[i]
-            rec = receivers[j]
-
-            send_amount = min(pay["amount"], rec["amount"])
-
-            # 금액도 int 로 깔끔하게
-            send_amount = int(round(send_amount))
-
-            transactions.append({
-                "from": pay["name"],
-                "to": rec["name"],
-                "amount": send_amount
-            })
-
-            pay["amount"] -= send_amount
-            rec["amount"] -= send_amount
-
-            if pay["amount"] <= 0:
-                i += 1
-            if rec["amount"] <= 0:
-                j += 1
+        # 다른 사람이 이미 렌더링해 둔 같은 version 의 HTML
+        html = html_cache.get(trip_id, version) if not flashed else None
+        if html is not None:
+            return _trip_detail_response(html, etag)
 
+        # 여행 / Day / 액티비티 / 지출 / 참가자 / 정산 요약을 DB 왕복 1번에 읽기
+        snap = load_trip_snapshot(conn, trip_id, multi_statements=backend.multi_statements)
     finally:
         conn.close()
 
-    return render_template(
+    if snap.trip is None:
+        return redirect(url_for('trip_list'))
+
+    # --- 여기부터는 파이썬에서 계산 ---
+
+    # 송금까지 반영한 "현재 balance"와 "현재 총 결제액" 계산
+    settlement = summarize_balances(snap.balances)
+
+    # 남은 balance 기준으로 송금 정리(transactions) 계산
+    #    (인원이 적으면 송금 횟수 최소, 많으면 힙 greedy → settlement.py)
+    transactions = compute_transfers(
+        [(row["name"], row["balance"]) for row in settlement]
+    )
+
+    # 부분마다 따로 렌더링 (그 부분의 데이터가 안 바뀌었으면 캐시에서)
+    html = render_template(
         "trip_detail.html",
-        trip=trip,
-        destinations=destinations,
-        activities=activities,
-        expenses=expenses,
-        settlement=settlement,     # 송금까지 반영된 현재 정산 결과
-        transactions=transactions,  # 아직 남은 송금 리스트
-        participants=participants
+        trip=snap.trip,
+        participants=snap.participants,
+        itinerary_html=_render_fragment(
+            trip_id, 'itinerary',
+            trip=snap.trip,
+            itinerary=snap.itinerary(),   # [(Day, 그 Day 의 액티비티), ...]
+        ),
+        expenses_html=_render_fragment(
+            trip_id, 'expenses',
+            trip=snap.trip,
+            expenses=snap.expenses,
+        ),
+        settlement_html=_render_fragment(
+            trip_id, 'settlement',
+            trip=snap.trip,
+            settlement=settlement,      # 송금까지 반영된 현재 정산 결과
+            transactions=transactions,  # 아직 남은 송금 리스트
+        ),
     )
+    if flashed:
+        # 메시지가 들어간 HTML 은 캐시하지 않고, ETag 도 붙이지 않는다
+        response = make_response(html)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    html_cache.put(trip_id, version, html)
+
+    return _trip_detail_response(html, etag)
+
+
+def _render_fragment(trip_id, name, **context):
+    """trip_detail_<name>.html 렌더링 (같은 데이터로 그린 적 있으면 캐시에서)"""
+    # trip.version 은 다른 부분이 바뀌어도 올라가므로 키에서 뺀다
+    context['trip'] = {k: v for k, v in context['trip'].items() if k != 'version'}
+    key = fragment_key(sorted(context.items()))
+    html = fragment_cache.get((trip_id, name), key)
+    if html is None:
+        html = render_template(f"trip_detail_{name}.html", **context)
+        fragment_cache.put((trip_id, name), key, html)
+    return Markup(html)
+
+
+def _trip_detail_response(html, etag):
+    response = make_response(html)
+    response.set_etag(etag)
+    # 캐시는 하되 매번 ETag 로 확인받도록
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _expense_amount(conn, currency_code, at=None):
+    """폼의 금액 → (금액, 원화 금액). 잘못된 금액 / 없는 통화면 flash 하고 None"""
+    try:
+        amount = Money.of(request.form.get('amount'), currency_code)
+        rate = rate_cache.get_rate(conn, currency_code, at)
+    except ValueError:
+        flash('금액 또는 통화가 올바르지 않습니다.')
+        return None
+    if amount.minor <= 0:
+        flash('금액은 0보다 커야 합니다.')
+        return None
+    return amount, amount.convert(rate)
 
 
 # 지출 추가 (새 지출 입력 + 참가자 N빵)
@@ -263,79 +552,56 @@ def expense_form(trip_id):
     try:
         with conn.cursor() as cur:
             # 여행 정보
-            cur.execute("""
-                SELECT trip_id, title, start_date, end_date
-                FROM trips
-                WHERE trip_id = %s
-            """, (trip_id,))
+            cur.execute(queries.TRIP_HEADER, (trip_id,))
             trip = cur.fetchone()
 
+            if not trip:
+                # 없는 (또는 삭제된) 여행이면 목록으로 (저장 요청이면 404)
+                return _trip_not_found()
+
             # 이 여행 참가자 목록
-            cur.execute("""
-                SELECT u.user_id, u.name
-                FROM trip_participants tp
-                JOIN users u ON tp.user_id = u.user_id
-                WHERE tp.trip_id = %s
-                ORDER BY u.user_id;
-            """, (trip_id,))
+            cur.execute(queries.TRIP_PARTICIPANTS, (trip_id,))
             participants = cur.fetchall()
 
         # POST: 저장 처리
         if request.method == 'POST':
             payer_id = int(request.form.get('payer_id'))
-            amount = float(request.form.get('amount'))                  # 사용자가 입력한 금액
             currency_code = request.form.get('currency_code')           # 선택한 통화
             category = request.form.get('category') or None
             payment_method = request.form.get('payment_method') or None
             memo = request.form.get('memo') or None
 
-            # 1) 통화 환율 가져오기 (currency 테이블에서)
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT rate_to_krw
-                    FROM currency
-                    WHERE currency_code = %s
-                """, (currency_code,))
-                row = cur.fetchone()
-
-            if not row:
-                # 해당 통화가 currency 테이블에 없으면 에러
-                raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
-
-            rate = float(row['rate_to_krw'])
-
-            # 2) KRW로 자동 환산
-            amount_krw = amount * rate
+            # 1) 사용자가 입력한 금액 + 통화 환율 (환율 캐시에서)
+            # 2) KRW로 자동 환산 (1전 단위 정수로 계산 → money.py)
+            parsed = _expense_amount(conn, currency_code)
+            if parsed is None:
+                return redirect(url_for('expense_form', trip_id=trip_id))
+            amount, amount_krw = parsed
 
             with conn.cursor() as cur:
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, trip_id):
+                    abort(404)
+
                 # 3) expenses INSERT
-                cur.execute("""
-                    INSERT INTO expenses
-                        (trip_id, paid_by_user_id, amount, currency_code,
-                         amount_krw, category, payment_method, paid_at, memo)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s, %s, NOW(), %s)
-                """, (
+                cur.execute(queries.EXPENSE_INSERT, (
                     trip_id,
                     payer_id,
-                    amount,
+                    amount.to_decimal(),
                     currency_code,
-                    amount_krw,
+                    amount_krw.to_decimal(),
                     category,
                     payment_method,
                     memo
                 ))
                 expense_id = cur.lastrowid
 
-                # 4) N빵 처리 (expense_participants)
-                if participants:
-                    share = round(amount_krw / len(participants), 2)
-                    for p in participants:
-                        cur.execute("""
-                            INSERT INTO expense_participants
-                                (expense_id, user_id, share_amount_krw)
-                            VALUES (%s, %s, %s)
-                        """, (expense_id, p['user_id'], share))
+                # 4) N빵 처리 (expense_participants, 여러 행을 한 번에 INSERT, 합계 = amount_krw)
+                insert_shares(cur, expense_id, split_even(amount_krw, participants, expense_id))
+
+                # 5) 정산 요약(trip_balances)에 반영
+                ledger.apply_expense(cur, expense_id, +1)
 
             conn.commit()
             return redirect(url_for('trip_detail', trip_id=trip_id))
@@ -357,102 +623,59 @@ def expense_edit(expense_id):
     try:
         with conn.cursor() as cur:
             # 수정할 지출 1건
-            cur.execute("""
-                SELECT
-                    e.expense_id,
-                    e.trip_id,
-                    e.paid_by_user_id,
-                    e.amount,
-                    e.currency_code,
-                    e.category,
-                    e.payment_method,
-                    e.memo,
-                    t.title,
-                    t.start_date,
-                    t.end_date
-                FROM expenses e
-                JOIN trips t ON e.trip_id = t.trip_id
-                WHERE e.expense_id = %s
-            """, (expense_id,))
+            cur.execute(queries.EXPENSE_FOR_EDIT, (expense_id,))
             expense = cur.fetchone()
 
             if not expense:
-                # 없는 지출이면 목록으로
-                return redirect(url_for('trip_list'))
+                # 없는 지출 (또는 삭제된 여행)이면 목록으로 (저장 요청이면 404)
+                return _trip_not_found()
 
             trip_id = expense['trip_id']
 
             # 이 여행 참가자 (N빵 기준)
-            cur.execute("""
-                SELECT u.user_id, u.name
-                FROM trip_participants tp
-                JOIN users u ON tp.user_id = u.user_id
-                WHERE tp.trip_id = %s
-                ORDER BY u.user_id;
-            """, (trip_id,))
+            cur.execute(queries.TRIP_PARTICIPANTS, (trip_id,))
             participants = cur.fetchall()
 
         # POST: 수정 저장
         if request.method == 'POST':
             payer_id = int(request.form.get('payer_id'))
-            amount = float(request.form.get('amount'))
             currency_code = request.form.get('currency_code')
             category = request.form.get('category') or None
             payment_method = request.form.get('payment_method') or None
             memo = request.form.get('memo') or None
 
-            with conn.cursor() as cur:
-                # 환율 조회
-                cur.execute("""
-                    SELECT rate_to_krw
-                    FROM currency
-                    WHERE currency_code = %s
-                """, (currency_code,))
-                row = cur.fetchone()
+            # 결제일시 기준 환율 조회 (캐시, 환율 이력)
+            parsed = _expense_amount(conn, currency_code, expense['paid_at'])
+            if parsed is None:
+                return redirect(url_for('expense_edit', expense_id=expense_id))
+            amount, amount_krw = parsed
 
-            if not row:
-                raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
+            with conn.cursor() as cur:
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, trip_id):
+                    abort(404)
 
-            rate = float(row['rate_to_krw'])
-            amount_krw = amount * rate
+                # 정산 요약에서 수정 전 값을 먼저 빼 둔다
+                ledger.apply_expense(cur, expense_id, -1)
 
-            with conn.cursor() as cur:
                 # expenses 수정
-                cur.execute("""
-                    UPDATE expenses
-                    SET paid_by_user_id = %s,
-                        amount = %s,
-                        currency_code = %s,
-                        amount_krw = %s,
-                        category = %s,
-                        payment_method = %s,
-                        memo = %s
-                    WHERE expense_id = %s
-                """, (
+                cur.execute(queries.EXPENSE_UPDATE, (
                     payer_id,
-                    amount,
+                    amount.to_decimal(),
                     currency_code,
-                    amount_krw,
+                    amount_krw.to_decimal(),
                     category,
                     payment_method,
                     memo,
                     expense_id
                 ))
 
-                # 기존 N빵 내역 삭제 후 다시 계산
-                cur.execute("""
-                    DELETE FROM expense_participants
-                    WHERE expense_id = %s
-                """, (expense_id,))
-
-                if participants:
-                    share = round(amount_krw / len(participants), 2)
-                    for p in participants:
-                        cur.execute("""
-                            INSERT INTO expense_participants
-                                (expense_id, user_id, share_amount_krw)
-                            VALUES (%s, %s, %s)
-                        """, (expense_id, p['user_id'], share))
+                # N빵 다시 계산 → 기존 내역과 비교해서 바뀐 행만 UPDATE/DELETE/INSERT
+                sync_shares(cur, expense_id, split_even(amount_krw, participants, expense_id))
+
+                # 수정된 값으로 다시 더하기
+                ledger.apply_expense(cur, expense_id, +1)
 
             conn.commit()
             return redirect(url_for('trip_detail', trip_id=trip_id))
@@ -476,29 +699,27 @@ def expense_delete(expense_id):
     try:
         with conn.cursor() as cur:
             # 먼저 어느 여행에 속한 지출인지 확인
-            cur.execute("""
-                SELECT trip_id
-                FROM expenses
-                WHERE expense_id = %s
-            """, (expense_id,))
+            cur.execute(queries.EXPENSE_TRIP, (expense_id,))
             row = cur.fetchone()
 
             if not row:
-                return redirect(url_for('trip_list'))
+                abort(404)
 
             trip_id = row['trip_id']
 
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
+
+            # 정산 요약에서 이 지출만큼 빼기 (행을 지우기 전에)
+            ledger.apply_expense(cur, expense_id, -1)
+
             # N빵 내역 삭제
-            cur.execute("""
-                DELETE FROM expense_participants
-                WHERE expense_id = %s
-            """, (expense_id,))
+            cur.execute(queries.EXPENSE_SHARES_DELETE, (expense_id,))
 
             # 지출 행 삭제
-            cur.execute("""
-                DELETE FROM expenses
-                WHERE expense_id = %s
-            """, (expense_id,))
+            cur.execute(queries.EXPENSE_DELETE, (expense_id,))
 
         conn.commit()
     finally:
@@ -507,6 +728,118 @@ def expense_delete(expense_id):
     return redirect(url_for('trip_detail', trip_id=trip_id))
 
 
+# 지출 CSV 가져오기 (GET: 업로드 폼 / POST: 가져오기 + 결과)
+@app.route('/trips/<int:trip_id>/expenses/import', methods=['GET', 'POST'])
+def expense_import(trip_id):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(queries.TRIP_HEADER, (trip_id,))
+            trip = cur.fetchone()
+
+        if not trip:
+            return _trip_not_found()
+
+        result = None
+        if request.method == 'POST':
+            upload = request.files.get('file')
+            if upload and upload.filename:
+                chunk_size = request.form.get('chunk_size', type=int) or app.config['IMPORT_CHUNK_SIZE']
+                # 업로드 파일을 줄 단위로 읽으면서 chunk 마다 커밋
+                result = import_expenses(
+                    conn, trip_id, open_upload(upload),
+                    rate_cache.table(conn),    # 줄마다 결제일시 기준 환율 (메모리에서 bisect)
+                    chunk_size=max(1, min(chunk_size, 10000))
+                )
+    finally:
+        conn.close()
+
+    return render_template('expense_import.html', trip=trip, result=result)
+
+
+# 지출 분석 (일자 / 도시 / 분류 / 통화별 합계, 예산 소진, 참가자별 결제액 vs 부담액)
+@app.route('/trips/<int:trip_id>/analytics')
+def trip_analytics(trip_id):
+    return _trip_analytics_response(trip_id, 'html')
+
+
+@app.route('/trips/<int:trip_id>/analytics.json')
+def trip_analytics_json(trip_id):
+    return _trip_analytics_response(trip_id, 'json')
+
+
+def _trip_analytics_response(trip_id, fmt):
+    conn = get_connection()
+    try:
+        version = get_trip_version(conn, trip_id)
+        if version is None:
+            if fmt == 'json':
+                return jsonify(error='not found'), 404
+            return redirect(url_for('trip_list'))
+
+        etag = f"{trip_etag(trip_id, version)}-analytics-{fmt}"
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        # 같은 version 으로 계산해 둔 결과가 없을 때만 DB 에서 묶어 읽고 계산
+        body = analytics_cache.get(trip_id, version)
+        if body is None:
+            data = load_trip_analytics(conn, trip_id, multi_statements=backend.multi_statements)
+            if data is None:
+                return redirect(url_for('trip_list'))
+            body = json.dumps(data, ensure_ascii=False)
+            analytics_cache.put(trip_id, data['version'], body)
+    finally:
+        conn.close()
+
+    if fmt == 'json':
+        response = make_response(body)
+        response.mimetype = 'application/json'
+    else:
+        data = json.loads(body)
+        response = make_response(render_template(
+            'trip_analytics.html',
+            analytics=data,
+            trip={'trip_id': trip_id, 'title': data['title']},
+        ))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# 여행 장부 내보내기 (지출 / N빵 내역 / 액티비티)
+@app.route('/trips/<int:trip_id>/export.csv')
+def trip_export_csv(trip_id):
+    return _trip_export(trip_id, 'csv')
+
+
+@app.route('/trips/<int:trip_id>/export.jsonl')
+def trip_export_jsonl(trip_id):
+    return _trip_export(trip_id, 'jsonl')
+
+
+def _trip_export(trip_id, fmt):
+    conn = get_connection()
+    try:
+        version = get_trip_version(conn, trip_id)
+    finally:
+        conn.close()
+
+    if version is None:
+        return redirect(url_for('trip_list'))
+
+    # 응답을 보내는 동안 계속 읽어야 하므로 요청 커넥션과 별도로 하나 더 빌린다
+    # (본문을 처음 읽을 때 stream_export 안에서 빌리고, 끝나거나 끊기면 거기서 반납
+    #  → HEAD 요청이나 첫 조각 전에 닫힌 응답은 커넥션을 잡지 않는다)
+    body = stream_export(pool.acquire, trip_id, fmt)
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(body, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=trip-{trip_id}.{fmt}',
+    })
+
+
 # Day/도시 추가
 @app.route('/trips/<int:trip_id>/destinations/new', methods=['GET', 'POST'])
 def destination_form(trip_id):
@@ -514,13 +847,13 @@ def destination_form(trip_id):
     try:
         with conn.cursor() as cur:
             # 여행 정보
-            cur.execute("""
-                SELECT trip_id, title, start_date, end_date
-                FROM trips
-                WHERE trip_id = %s
-            """, (trip_id,))
+            cur.execute(queries.TRIP_HEADER, (trip_id,))
             trip = cur.fetchone()
 
+            if not trip:
+                # 없는 (또는 삭제된) 여행이면 목록으로 (저장 요청이면 404)
+                return _trip_not_found()
+
         if request.method == 'POST':
             day_no = int(request.form.get('day_no'))
             country_name = request.form.get('country_name') or None
@@ -528,11 +861,13 @@ def destination_form(trip_id):
             note = request.form.get('note') or None
 
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO destinations
-                    (trip_id, day_no, country_name, city_name, note)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (trip_id, day_no, country_name, city_name, note))
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, trip_id):
+                    abort(404)
+
+                cur.execute(queries.DESTINATION_INSERT,
+                            (trip_id, day_no, country_name, city_name, note))
             conn.commit()
             return redirect(url_for('trip_detail', trip_id=trip_id))
 
@@ -547,16 +882,12 @@ def destination_edit(destination_id):
     try:
         with conn.cursor() as cur:
             # 1) 기존 데이터 불러오기
-            cur.execute("""
-                SELECT destination_id, trip_id, day_no, country_name, city_name, note
-                FROM destinations
-                WHERE destination_id = %s
-            """, (destination_id,))
+            cur.execute(queries.DESTINATION_FOR_EDIT, (destination_id,))
             dest = cur.fetchone()
 
-        # 만약 없는 destination_id라면 그냥 여행 목록으로 보내기 (안전장치)
+        # 만약 없는 destination_id라면 그냥 여행 목록으로 보내기 (안전장치, 저장 요청이면 404)
         if not dest:
-            return redirect(url_for('trip_list'))
+            return _trip_not_found()
 
         # 2) 폼 제출(POST)이면 DB 업데이트
         if request.method == 'POST':
@@ -566,14 +897,13 @@ def destination_edit(destination_id):
             note = request.form.get('note')
 
             with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE destinations
-                    SET day_no = %s,
-                        country_name = %s,
-                        city_name = %s,
-                        note = %s
-                    WHERE destination_id = %s
-                """, (day_no, country_name, city_name, note, destination_id))
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, dest['trip_id']):
+                    abort(404)
+
+                cur.execute(queries.DESTINATION_UPDATE,
+                            (day_no, country_name, city_name, note, destination_id))
             conn.commit()
 
             # 수정한 뒤, 원래 여행 상세 페이지로 돌아가기
@@ -591,33 +921,28 @@ def destination_delete(destination_id):
     try:
         with conn.cursor() as cur:
             # 리다이렉트를 위해 trip_id 먼저 가져오기
-            cur.execute("""
-                SELECT trip_id
-                FROM destinations
-                WHERE destination_id = %s
-            """, (destination_id,))
+            cur.execute(queries.DESTINATION_TRIP, (destination_id,))
             row = cur.fetchone()
-            trip_id = row['trip_id'] if row else None
+            if not row:
+                abort(404)
+            trip_id = row['trip_id']
+
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
 
             # 1) 이 Day에 속한 액티비티 삭제
-            cur.execute("""
-                DELETE FROM activities
-                WHERE destination_id = %s
-            """, (destination_id,))
+            cur.execute(queries.DESTINATION_ACTIVITIES_DELETE, (destination_id,))
 
             # 2) Day(도시) 삭제
-            cur.execute("""
-                DELETE FROM destinations
-                WHERE destination_id = %s
-            """, (destination_id,))
+            cur.execute(queries.DESTINATION_DELETE, (destination_id,))
+
         conn.commit()
     finally:
         conn.close()
 
-    if trip_id:
-        return redirect(url_for('trip_detail', trip_id=trip_id))
-    else:
-        return redirect(url_for('trip_list'))
+    return redirect(url_for('trip_detail', trip_id=trip_id))
 
 # 액티비티 추가 (통화 선택 + KRW 자동 환산 적용)
 @app.route('/trips/<int:trip_id>/activities/new', methods=['GET', 'POST'])
@@ -626,20 +951,15 @@ def activity_form(trip_id):
     try:
         with conn.cursor() as cur:
             # 여행 정보
-            cur.execute("""
-                SELECT trip_id, title, start_date, end_date
-                FROM trips
-                WHERE trip_id = %s
-            """, (trip_id,))
+            cur.execute(queries.TRIP_HEADER, (trip_id,))
             trip = cur.fetchone()
 
+            if not trip:
+                # 없는 (또는 삭제된) 여행이면 목록으로 (저장 요청이면 404)
+                return _trip_not_found()
+
             # Day/도시 목록
-            cur.execute("""
-                SELECT destination_id, day_no, country_name, city_name
-                FROM destinations
-                WHERE trip_id = %s
-                ORDER BY day_no;
-            """, (trip_id,))
+            cur.execute(queries.TRIP_DESTINATIONS, (trip_id,))
             destinations = cur.fetchall()
 
         if request.method == 'POST':
@@ -658,40 +978,25 @@ def activity_form(trip_id):
                 currency_code = None
                 cost_krw = None
             else:
-                amount = float(amount)
-
                 if currency_code:
-                    # 환율 조회
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            SELECT rate_to_krw
-                            FROM currency
-                            WHERE currency_code = %s
-                        """, (currency_code,))
-                        row = cur.fetchone()
-
-                    if not row:
-                        raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
-
-                    rate = float(row['rate_to_krw'])
-                    cost_krw = amount * rate
-                    cost = amount
+                    # 환율 조회 (캐시)
+                    rate = rate_cache.get_rate(conn, currency_code)
+                    money = Money.of(amount, currency_code)
+                    cost = money.to_decimal()
+                    cost_krw = money.convert(rate).to_decimal()
                 else:
                     # 통화 없이 금액만 입력 → 원화로 간주
                     currency_code = 'KRW'
-                    cost = amount
-                    cost_krw = amount
+                    cost = cost_krw = Money.of(amount).to_decimal()
 
             # INSERT
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO activities
-                        (destination_id, name, category, start_time, end_time,
-                         cost, currency_code, cost_krw, memo)
-                    VALUES
-                        (%s, %s, %s, %s, %s,
-                         %s, %s, %s, %s)
-                """, (
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, trip_id):
+                    abort(404)
+
+                cur.execute(queries.ACTIVITY_INSERT, (
                     destination_id, name, category, start_time, end_time,
                     cost, currency_code, cost_krw, memo
                 ))
@@ -714,39 +1019,18 @@ def activity_edit(activity_id):
     try:
         with conn.cursor() as cur:
             # 1) 현재 액티비티 + 해당 여행 정보 조회
-            cur.execute("""
-                SELECT 
-                    a.activity_id,
-                    a.destination_id,
-                    a.name,
-                    a.category,
-                    a.start_time,
-                    a.end_time,
-                    a.cost,
-                    a.currency_code,
-                    a.cost_krw,
-                    a.memo,
-                    d.trip_id
-                FROM activities a
-                JOIN destinations d ON a.destination_id = d.destination_id
-                WHERE a.activity_id = %s
-            """, (activity_id,))
+            cur.execute(queries.ACTIVITY_FOR_EDIT, (activity_id,))
             activity = cur.fetchone()
 
-        # 잘못된 id면 여행 목록으로
+        # 잘못된 id (또는 삭제된 여행)면 여행 목록으로 (저장 요청이면 404)
         if not activity:
-            return redirect(url_for('trip_list'))
+            return _trip_not_found()
 
         trip_id = activity['trip_id']
 
         # 같은 여행에 속한 Day/도시 목록 (드롭다운용)
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT destination_id, day_no, country_name, city_name
-                FROM destinations
-                WHERE trip_id = %s
-                ORDER BY day_no;
-            """, (trip_id,))
+            cur.execute(queries.TRIP_DESTINATIONS, (trip_id,))
             destinations = cur.fetchall()
 
         # ----- POST: 수정 저장 -----
@@ -766,43 +1050,24 @@ def activity_edit(activity_id):
                 currency_code = None
                 cost_krw = None
             else:
-                amount = float(amount)
-
                 if currency_code:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            SELECT rate_to_krw
-                            FROM currency
-                            WHERE currency_code = %s
-                        """, (currency_code,))
-                        row = cur.fetchone()
-
-                    if not row:
-                        raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
-
-                    rate = float(row['rate_to_krw'])
-                    cost = amount
-                    cost_krw = amount * rate
+                    # 환율 조회 (캐시)
+                    rate = rate_cache.get_rate(conn, currency_code)
+                    money = Money.of(amount, currency_code)
+                    cost = money.to_decimal()
+                    cost_krw = money.convert(rate).to_decimal()
                 else:
                     # 통화 선택 안 하면 KRW로 처리
                     currency_code = 'KRW'
-                    cost = amount
-                    cost_krw = amount
+                    cost = cost_krw = Money.of(amount).to_decimal()
 
             with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE activities
-                    SET destination_id = %s,
-                        name = %s,
-                        category = %s,
-                        start_time = %s,
-                        end_time = %s,
-                        cost = %s,
-                        currency_code = %s,
-                        cost_krw = %s,
-                        memo = %s
-                    WHERE activity_id = %s
-                """, (
+                # 상세 페이지 캐시 무효화 (trips.version + 1)
+                # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+                if not bump_trip_version(cur, trip_id):
+                    abort(404)
+
+                cur.execute(queries.ACTIVITY_UPDATE, (
                     destination_id, name, category, start_time, end_time,
                     cost, currency_code, cost_krw, memo, activity_id
                 ))
@@ -828,24 +1093,21 @@ def activity_delete(activity_id):
     try:
         with conn.cursor() as cur:
             # 이 액티비티가 어느 여행(trip)에 속하는지 찾기
-            cur.execute("""
-                SELECT d.trip_id
-                FROM activities a
-                JOIN destinations d ON a.destination_id = d.destination_id
-                WHERE a.activity_id = %s
-            """, (activity_id,))
+            cur.execute(queries.ACTIVITY_TRIP, (activity_id,))
             row = cur.fetchone()
 
             if not row:
-                return redirect(url_for('trip_list'))
+                abort(404)
 
             trip_id = row['trip_id']
 
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
+
             # 액티비티 삭제
-            cur.execute("""
-                DELETE FROM activities
-                WHERE activity_id = %s
-            """, (activity_id,))
+            cur.execute(queries.ACTIVITY_DELETE, (activity_id,))
 
         conn.commit()
     finally:
@@ -867,89 +1129,72 @@ def add_participant(trip_id):
     conn = get_connection()
     try:
         with conn.cursor() as cur:
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
+
             # 1) 같은 이름의 user가 이미 있으면 재사용, 없으면 새로 생성
-            cur.execute("""
-                SELECT user_id
-                FROM users
-                WHERE name = %s
-            """, (name,))
+            cur.execute(queries.USER_BY_NAME, (name,))
             row = cur.fetchone()
 
             if row:
                 user_id = row['user_id']
             else:
-                cur.execute("""
-                    INSERT INTO users (name)
-                    VALUES (%s)
-                """, (name,))
+                cur.execute(queries.USER_INSERT, (name,))
                 user_id = cur.lastrowid
 
             # 2) 이 여행(trip)에 참가자로 등록 (중복 방지용 INSERT IGNORE)
-            cur.execute("""
-                INSERT IGNORE INTO trip_participants (trip_id, user_id)
-                VALUES (%s, %s)
-            """, (trip_id, user_id))
+            cur.execute(queries.PARTICIPANT_INSERT, (trip_id, user_id))
+            added = cur.rowcount == 1
+
+            # 3) 전원 N빵이던 기존 지출에 새 참가자 포함 (지출이 많으면 백그라운드 작업으로)
+            deferred = False
+            if added:
+                if count_trip_expenses(cur, trip_id) <= app.config['RESPLIT_INLINE_MAX_EXPENSES']:
+                    resplit_trip(cur, trip_id, new_user_ids=[user_id])
+                else:
+                    # 같은 트랜잭션에서 등록 → 커밋돼야 실행된다
+                    job_runner.enqueue(cur, 'resplit', f'resplit:{trip_id}',
+                                       {'trip_id': trip_id, 'new_user_ids': [user_id]})
+                    deferred = True
 
         conn.commit()
     finally:
         conn.close()
 
+    if deferred:
+        job_runner.wake()
+
     return redirect(url_for('trip_detail', trip_id=trip_id))
 
 @app.route('/trips/<int:trip_id>/delete', methods=['POST'])
 def trip_delete(trip_id):
-    """여행 1개 전체 삭제 (연관된 데이터까지 정리)"""
+    """여행 삭제: 바로 숨기고, 딸린 데이터는 백그라운드에서 조금씩 정리 (trip_purge.py)"""
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            # 1) 지출 참여자( N빵 내역 ) 삭제
-            cur.execute("""
-                DELETE ep FROM expense_participants ep
-                JOIN expenses e ON ep.expense_id = e.expense_id
-                WHERE e.trip_id = %s
-            """, (trip_id,))
-
-            # 2) 정산 송금 내역 삭제
-            cur.execute("""
-                DELETE FROM settlement_transactions
-                WHERE trip_id = %s
-            """, (trip_id,))
-
-            # 3) 지출 내역 삭제
-            cur.execute("""
-                DELETE FROM expenses
-                WHERE trip_id = %s
-            """, (trip_id,))
-
-            # 4) 액티비티 삭제
-            cur.execute("""
-                DELETE a FROM activities a
-                JOIN destinations d ON a.destination_id = d.destination_id
-                WHERE d.trip_id = %s
-            """, (trip_id,))
-
-            # 5) Day / 도시 삭제
-            cur.execute("""
-                DELETE FROM destinations
-                WHERE trip_id = %s
-            """, (trip_id,))
-
-            # 6) 여행 참가자 정보 삭제
-            cur.execute("""
-                DELETE FROM trip_participants
-                WHERE trip_id = %s
-            """, (trip_id,))
-
-            # 7) 마지막으로 trips 삭제
-            cur.execute("""
-                DELETE FROM trips
-                WHERE trip_id = %s
-            """, (trip_id,))
+            # 1) deleted_at 표시 (목록 / 상세에서 바로 안 보임)
+            marked = mark_deleted(cur, trip_id)
+
+            # 2) 정리 작업 등록 (같은 트랜잭션, 진행 상황: /jobs, /debug/trip-purges)
+            if marked:
+                job_runner.enqueue(cur, 'trip_purge', f'trip_purge:{trip_id}',
+                                   {'trip_id': trip_id})
 
         conn.commit()
     finally:
         conn.close()
 
+    if marked:
+        job_runner.wake()
+
+    # 삭제된 여행의 상세 페이지 캐시도 버리기
+    html_cache.evict_trip(trip_id)
+    for name in TRIP_FRAGMENTS:
+        fragment_cache.evict_trip((trip_id, name))
+    analytics_cache.evict_trip(trip_id)
+
     return redirect(url_for('trip_list'))
 
 @app.route('/trips/<int:trip_id>/participants/<int:user_id>/delete', methods=['POST'])
@@ -957,32 +1202,38 @@ def participant_delete(trip_id, user_id):
     conn = get_connection()
     try:
         with conn.cursor() as cur:
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
+
             # 1) 이 사용자가 N빵에 포함된 기록 삭제
-            cur.execute("""
-                DELETE ep
-                FROM expense_participants ep
-                JOIN expenses e ON ep.expense_id = e.expense_id
-                WHERE e.trip_id = %s
-                  AND ep.user_id = %s
-            """, (trip_id, user_id))
-
-            # 2) 이 사용자가 결제자로 들어간 지출 삭제
-            cur.execute("""
-                DELETE FROM expenses
-                WHERE trip_id = %s
-                  AND paid_by_user_id = %s
-            """, (trip_id, user_id))
+            cur.execute(queries.PARTICIPANT_SHARES_DELETE, (trip_id, user_id))
+
+            # 2) 이 사용자가 결제자로 들어간 지출의 N빵 내역 + 지출 삭제
+            cur.execute(queries.PARTICIPANT_PAID_SHARES_DELETE, (trip_id, user_id))
+
+            cur.execute(queries.PARTICIPANT_EXPENSES_DELETE, (trip_id, user_id))
 
             # 3) 참가자 목록에서 제거
-            cur.execute("""
-                DELETE FROM trip_participants
-                WHERE trip_id = %s
-                  AND user_id = %s
-            """, (trip_id, user_id))
+            cur.execute(queries.PARTICIPANT_DELETE, (trip_id, user_id))
+
+            # 4) 남은 참가자끼리 N빵 다시 나누고 정산 요약 재계산
+            #    (지출이 많으면 정산 요약만 맞춰 두고 N빵은 백그라운드 작업으로)
+            deferred = count_trip_expenses(cur, trip_id) > app.config['RESPLIT_INLINE_MAX_EXPENSES']
+            if deferred:
+                ledger.rebuild_trip(cur, trip_id)
+                job_runner.enqueue(cur, 'resplit', f'resplit:{trip_id}', {'trip_id': trip_id})
+            else:
+                resplit_trip(cur, trip_id)
+
         conn.commit()
     finally:
         conn.close()
 
+    if deferred:
+        job_runner.wake()
+
     # 다시 해당 여행 상세로 돌아가기
     return redirect(url_for('trip_detail', trip_id=trip_id))
 
@@ -990,21 +1241,29 @@ def participant_delete(trip_id, user_id):
 def settlement_done(trip_id):
     payer = request.form.get('payer')
     receiver = request.form.get('receiver')
-    amount = request.form.get('amount')
 
+    # 금액은 float 를 거치지 않고 최소 단위로 (money.py)
     try:
-        amount_value = int(float(amount))
-    except (TypeError, ValueError):
-        amount_value = 0
+        amount = Money.of(request.form.get('amount'))
+    except ValueError:
+        amount = None
+    if amount is None or amount.minor <= 0:
+        flash('송금 금액이 올바르지 않습니다.')
+        return redirect(url_for('trip_detail', trip_id=trip_id))
 
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO settlement_transactions
-                (trip_id, payer_name, receiver_name, amount, is_done, done_at)
-                VALUES (%s, %s, %s, %s, 1, NOW())
-            """, (trip_id, payer, receiver, amount_value))
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # 삭제된 여행이면 404 (trips 행을 먼저 잠금, trip_cache.py 참고)
+            if not bump_trip_version(cur, trip_id):
+                abort(404)
+
+            cur.execute(queries.SETTLEMENT_INSERT, (trip_id, payer, receiver, amount.to_decimal()))
+
+            # 정산 요약에 보낸/받은 금액 반영
+            ledger.apply_settlement(cur, trip_id, payer, receiver, amount.to_decimal())
+
         conn.commit()
     finally:
         conn.close()
@@ -0,0 +1,126 @@
+# --------------------------
+# 금액 계산 벤치마크 (float vs 정수 최소 단위)
+# --------------------------
+# DB 에서 읽은 것과 같은 DECIMAL(.., 2) 값으로
+#  - 환산 : amount * rate (float)          vs  money.convert (정수 곱셈 + 반올림)
+#  - N빵  : round(amount / n, 2) (float)   vs  money.split (합계 보장)
+#  - 정산 : 행마다 float(...) 변환 후 계산  vs  settlement.summarize_balances (열마다 to_minor)
+# 를 같은 데이터로 돌려서 시간과 합계 오차(1전 이상 어긋난 건수)를 비교한다.
+#
+#   python bench_money.py [rows] [seed]
+
+import random
+import sys
+import time
+from decimal import Decimal
+
+from money import convert, from_minor, split, to_minor
+from settlement import summarize_balances
+
+
+def make_data(rows, rng):
+    amounts = [Decimal(rng.randint(100, 5_000_000)).scaleb(-2) for _ in range(rows)]
+    heads = [rng.randint(2, 7) for _ in range(rows)]
+    balances = []
+    for i in range(rows):
+        paid = Decimal(rng.randint(0, 50_000_000)).scaleb(-2)
+        share = Decimal(rng.randint(0, 50_000_000)).scaleb(-2)
+        balances.append({
+            "user_id": i, "name": f"user{i}",
+            "total_paid": paid, "total_share": share, "balance": paid - share,
+            "settled_out": Decimal(rng.randint(0, 1000) * 1000), "settled_in": Decimal(0),
+        })
+    return amounts, heads, balances
+
+
+# --- 예전 방식 (비교용) ---
+
+def float_convert(amounts, rate):
+    return [float(a) * rate for a in amounts]
+
+
+def float_split(amounts, heads):
+    """예전 split_even: 1인분을 반올림해서 인원수만큼"""
+    return [[round(float(a) / n, 2)] * n for a, n in zip(amounts, heads)]
+
+
+def float_summarize(rows):
+    """예전 summarize_balances"""
+    result = []
+    for row in rows:
+        new_balance = float(row["balance"]) + float(row["settled_out"]) - float(row["settled_in"])
+        new_row = dict(row)
+        new_row["balance"] = round(new_balance)
+        new_row["final_paid"] = round(float(row["total_share"]) + new_balance)
+        result.append(new_row)
+    return result
+
+
+# --- 정수 방식 ---
+
+def int_convert(amounts, rate):
+    return convert(to_minor(amounts), rate)
+
+
+def int_split(amounts, heads):
+    return [split(m, n, i) for i, (m, n) in enumerate(zip(to_minor(amounts), heads))]
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(name, elapsed, drift=None):
+    tail = "" if drift is None else f"   합계 오차 {drift:>7,}건"
+    print(f"  {name:<8} {elapsed * 1000:>10.3f} ms{tail}")
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else 100_000
+    seed = int(argv[2]) if len(argv) > 2 else 42
+    rng = random.Random(seed)
+    amounts, heads, balances = make_data(rows, rng)
+    rate = 9.42
+    repeat = 5
+
+    print(f"환산 ({rows:,}건, 환율 {rate})")
+    elapsed, floats = timed(lambda: float_convert(amounts, rate), repeat)
+    report("float", elapsed)
+    elapsed, ints = timed(lambda: int_convert(amounts, rate), repeat)
+    report("int", elapsed)
+    # DB 에 DECIMAL(12,2) 로 저장될 값 기준으로 몇 건이 다른지
+    differ = sum(1 for f, i in zip(floats, ints) if to_minor((f,))[0] != i)
+    print(f"  반올림 결과가 다른 건수 {differ:,}")
+    print()
+
+    print(f"N빵 ({rows:,}건, 2~7명)")
+    elapsed, shares = timed(lambda: float_split(amounts, heads), repeat)
+    totals = to_minor(amounts)
+    drift = sum(1 for t, s in zip(totals, shares) if sum(to_minor(s)) != t)
+    report("float", elapsed, drift)
+    elapsed, shares = timed(lambda: int_split(amounts, heads), repeat)
+    drift = sum(1 for t, s in zip(totals, shares) if sum(s) != t)
+    report("int", elapsed, drift)
+    print()
+
+    print(f"정산 요약 ({rows:,}명)")
+    elapsed, result = timed(lambda: float_summarize(balances), repeat)
+    report("float", elapsed)
+    elapsed, result = timed(lambda: summarize_balances(balances), repeat)
+    report("int", elapsed)
+    print()
+
+    # Decimal 로 다시 바꿔서 DB 에 넣는 비용까지 (expense 저장 경로)
+    print(f"DB 에 넣을 Decimal 로 변환 ({rows:,}건)")
+    elapsed, _ = timed(lambda: [from_minor(i) for i in ints], repeat)
+    report("int", elapsed)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
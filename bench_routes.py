@@ -0,0 +1,490 @@
+# --------------------------
+# 라우트 부하 벤치마크
+# --------------------------
+# 실제 사용과 비슷한 비율로 여행 목록 / 상세 / 지출 추가 / 지출 수정 / 송금 완료 요청을
+# 여러 스레드(동시 사용자)로 보내고, 라우트별 p50 / p95 / p99 지연, 처리량, 쿼리 수를 잰다.
+# 쿼리 수와 DB 시간은 응답의 Server-Timing 헤더(db;dur=..;desc="N queries")에서 읽는다.
+#
+#  - 기본은 Flask test client (같은 프로세스, 기본 저장소는 SQLite 파일 bench.db)
+#  - --url 을 주면 실행 중인 서버로 HTTP 요청 (요청에 쓸 trip / expense id 는
+#    같은 DB 설정으로 app.pool 에서 읽으므로 TRAVELMATE_DB_BACKEND 등을 서버와 맞출 것)
+#  - 결과는 JSON 으로 저장 (--out). 커밋별로 남겨 두고 비교한다.
+#  - --baseline 이전결과.json --threshold 20 : 어떤 라우트든 p95 / 쿼리 수가 20% 넘게
+#    나빠지면 종료 코드 1
+#
+#   python bench_routes.py --generate 300 --concurrency 8 --duration 20 --out before.json
+#   python bench_routes.py --concurrency 8 --duration 20 --out after.json \
+#       --baseline before.json --threshold 20
+
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+# 라우트별 기본 비율 (읽기가 대부분, 쓰기는 가끔)
+DEFAULT_MIX = "trip_list:35,trip_detail:40,expense_form:10,expense_edit:10,settlement_done:5"
+ROUTES = ("trip_list", "trip_detail", "expense_form", "expense_edit", "settlement_done")
+
+# 비교할 때 이 값보다 작은 지연(ms)은 잡음이 커서 바닥값으로 취급
+MIN_COMPARE_MS = 1.0
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def parse_mix(text):
+    """'trip_list:35,trip_detail:40' → {'trip_list': 35.0, 'trip_detail': 40.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split(":")
+        name = name.strip()
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"알 수 없는 라우트: {name}")
+        if float(weight) > 0:
+            mix[name] = float(weight)
+    if not mix:
+        raise argparse.ArgumentTypeError("비율이 0보다 큰 라우트가 하나는 있어야 합니다")
+    return mix
+
+
+def percentile(sorted_values, p):
+    """nearest-rank 백분위수 (sorted_values 는 정렬된 목록)"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))   # ceil
+    return sorted_values[int(rank) - 1]
+
+
+# --------------------------
+# 요청에 쓸 id 모으기
+# --------------------------
+
+def load_fixture(conn, max_trips=500, max_expenses=50):
+    """참가자가 2명 이상인 여행들과 그 참가자 / 지출 id 목록"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT tp.trip_id, u.user_id, u.name
+            FROM trip_participants tp
+            JOIN users u ON tp.user_id = u.user_id
+            WHERE tp.trip_id IN (
+                SELECT trip_id
+                FROM trip_participants
+                GROUP BY trip_id
+                HAVING COUNT(*) >= 2
+            )
+            ORDER BY tp.trip_id, tp.user_id
+        """)
+        trips = {}
+        for row in cur.fetchall():
+            if row["trip_id"] not in trips:
+                if len(trips) >= max_trips:
+                    continue
+                trips[row["trip_id"]] = {"trip_id": row["trip_id"], "members": [], "expenses": []}
+            trips[row["trip_id"]]["members"].append((row["user_id"], row["name"]))
+
+        for trip in trips.values():
+            cur.execute("""
+                SELECT expense_id, currency_code
+                FROM expenses
+                WHERE trip_id = %s
+                ORDER BY expense_id
+                LIMIT %s
+            """, (trip["trip_id"], max_expenses))
+            trip["expenses"] = [(r["expense_id"], r["currency_code"]) for r in cur.fetchall()]
+
+        cur.execute("SELECT currency_code FROM currency ORDER BY currency_code")
+        currencies = [r["currency_code"] for r in cur.fetchall()]
+
+    return list(trips.values()), currencies
+
+
+def ensure_dataset(conn, trips, seed):
+    """여행이 trips 개보다 적으면 generate_data 로 모자란 만큼 채운다"""
+    from generate_data import Spec, Generator, DbSink, db_rates, db_start_ids
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS cnt FROM trips")
+        have = cur.fetchone()["cnt"]
+    missing = trips - have
+    if missing <= 0:
+        return 0
+
+    spec = Spec(users=max(missing * 3, 50), trips=missing, seed=seed)
+    Generator(spec, DbSink(conn), rates=db_rates(conn), start_ids=db_start_ids(conn)).run()
+    return missing
+
+
+# --------------------------
+# 요청 만들기
+# --------------------------
+
+def make_request(route, rng, trips, currencies):
+    """라우트 이름 → (method, path, form)"""
+    trip = rng.choice(trips)
+    trip_id = trip["trip_id"]
+
+    if route == "trip_list":
+        return "GET", "/trips", None
+
+    if route == "trip_detail":
+        return "GET", f"/trips/{trip_id}", None
+
+    if route == "expense_form":
+        payer_id, _ = rng.choice(trip["members"])
+        return "POST", f"/trips/{trip_id}/expenses/new", {
+            "payer_id": payer_id,
+            "amount": rng.randint(5, 500) * 100,
+            "currency_code": "KRW" if "KRW" in currencies else rng.choice(currencies),
+            "category": rng.choice(["food", "cafe", "transport", "shopping"]),
+            "payment_method": "card",
+            "memo": "bench",
+        }
+
+    if route == "expense_edit":
+        if not trip["expenses"]:
+            return "GET", f"/trips/{trip_id}", None
+        expense_id, currency_code = rng.choice(trip["expenses"])
+        payer_id, _ = rng.choice(trip["members"])
+        return "POST", f"/expenses/{expense_id}/edit", {
+            "payer_id": payer_id,
+            "amount": rng.randint(5, 500) * 100,
+            "currency_code": currency_code,
+            "category": rng.choice(["food", "cafe", "transport", "shopping"]),
+            "payment_method": "card",
+            "memo": "bench edit",
+        }
+
+    if route == "settlement_done":
+        (_, payer), (_, receiver) = rng.sample(trip["members"], 2)
+        return "POST", f"/trips/{trip_id}/settlement/done", {
+            "payer": payer,
+            "receiver": receiver,
+            "amount": rng.randint(1, 50) * 1000,
+        }
+
+    raise ValueError(route)
+
+
+class TestClientTarget:
+    """같은 프로세스의 Flask test client (스레드마다 클라이언트 1개)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self):
+        test_client = self.app.test_client()
+
+        def send(method, path, form):
+            response = test_client.open(path, method=method, data=form)
+            response.get_data()
+            result = response.status_code, response.headers.get("Server-Timing")
+            response.close()
+            return result
+
+        return send
+
+
+class HttpTarget:
+    """실행 중인 서버 (스레드마다 keep-alive 연결 1개, 리다이렉트는 따라가지 않음)"""
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.prefix = parsed.path.rstrip("/")
+
+    def client(self):
+        state = {"conn": None}
+
+        def send(method, path, form):
+            if state["conn"] is None:
+                state["conn"] = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            body, headers = None, {}
+            if form is not None:
+                body = urllib.parse.urlencode(form)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            try:
+                state["conn"].request(method, self.prefix + path, body=body, headers=headers)
+                response = state["conn"].getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                state["conn"].close()
+                state["conn"] = None
+                raise
+            return response.status, response.getheader("Server-Timing")
+
+        return send
+
+
+# --------------------------
+# 실행
+# --------------------------
+
+def run_benchmark(target, trips, currencies, mix, concurrency, duration,
+                  max_requests, warmup, seed):
+    """동시 요청을 보내고 라우트별 원시 측정값 목록을 돌려준다"""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = {name: [] for name in names}    # (seconds, ok, queries, db_ms)
+    lock = threading.Lock()
+    counter = itertools.count()
+    warmed_up = threading.Barrier(concurrency + 1)
+    start_event = threading.Event()
+    deadline = {}
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        send = target.client()
+        local = {name: [] for name in names}
+
+        # 워밍업 (캐시 / 커넥션 준비, 기록 안 함)
+        for _ in range(warmup):
+            route = rng.choices(names, weights)[0]
+            try:
+                send(*make_request(route, rng, trips, currencies))
+            except Exception:
+                pass
+
+        warmed_up.wait()
+        start_event.wait()
+        while time.perf_counter() < deadline["at"]:
+            if max_requests and next(counter) >= max_requests:
+                break
+            route = rng.choices(names, weights)[0]
+            method, path, form = make_request(route, rng, trips, currencies)
+            started = time.perf_counter()
+            try:
+                status, server_timing = send(method, path, form)
+            except Exception:
+                status, server_timing = None, None
+            elapsed = time.perf_counter() - started
+
+            # GET 은 200, POST 는 저장 후 302 가 정상
+            ok = status == (302 if method == "POST" else 200)
+            queries = db_ms = None
+            m = _SERVER_TIMING_DB.search(server_timing or "")
+            if m:
+                db_ms, queries = float(m.group(1)), int(m.group(2))
+            local[route].append((elapsed, ok, queries, db_ms))
+
+        with lock:
+            for name in names:
+                samples[name].extend(local[name])
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    # 모든 스레드의 워밍업이 끝난 뒤부터 시간을 잰다
+    warmed_up.wait()
+    deadline["at"] = time.perf_counter() + (duration if duration else 10 ** 9)
+    wall_started = time.perf_counter()
+    start_event.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall_started
+    return samples, wall
+
+
+def summarize(samples, wall):
+    """원시 측정값 → 라우트별 요약"""
+    routes = {}
+    total_requests = total_errors = 0
+    for name, rows in samples.items():
+        latencies = sorted(r[0] * 1000 for r in rows)
+        queries = [r[2] for r in rows if r[2] is not None]
+        db_ms = [r[3] for r in rows if r[3] is not None]
+        errors = sum(1 for r in rows if not r[1])
+        total_requests += len(rows)
+        total_errors += errors
+
+        def ms(value):
+            return round(value, 3) if value is not None else None
+
+        routes[name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "throughput_rps": round(len(rows) / wall, 2) if wall else None,
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "max_ms": ms(latencies[-1]) if latencies else None,
+            "queries_avg": round(sum(queries) / len(queries), 2) if queries else None,
+            "queries_max": max(queries) if queries else None,
+            "db_ms_avg": ms(sum(db_ms) / len(db_ms)) if db_ms else None,
+        }
+    return routes, {
+        "requests": total_requests,
+        "errors": total_errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(total_requests / wall, 2) if wall else None,
+    }
+
+
+def git_revision():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=here,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+# --------------------------
+# 이전 결과와 비교
+# --------------------------
+
+def compare(baseline, current, threshold, metrics):
+    """baseline 보다 threshold% 넘게 나빠진 (route, metric, before, after, change%) 목록"""
+    regressions = []
+    rows = []
+    for route, before in baseline.get("routes", {}).items():
+        after = current["routes"].get(route)
+        if not after:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            if metric.endswith("_ms"):
+                # 아주 짧은 지연은 잡음이 커서 바닥값을 둔다
+                old, new = max(old, MIN_COMPARE_MS), max(new, MIN_COMPARE_MS)
+            change = (new - old) / old * 100 if old else (0.0 if new == old else float("inf"))
+            row = (route, metric, before.get(metric), after.get(metric), change)
+            rows.append(row)
+            if change > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def print_summary(result):
+    print(f"{'route':<16} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'queries':>8} {'db ms':>8}")
+    for name, r in result["routes"].items():
+        def f(value, fmt="{:.1f}"):
+            return fmt.format(value) if value is not None else "-"
+        print(f"{name:<16} {r['requests']:>7} {r['errors']:>5} {f(r['throughput_rps']):>8} "
+              f"{f(r['p50_ms']):>8} {f(r['p95_ms']):>8} {f(r['p99_ms']):>8} "
+              f"{f(r['queries_avg']):>8} {f(r['db_ms_avg']):>8}")
+    t = result["total"]
+    print(f"합계 {t['requests']:,}건 / 오류 {t['errors']:,}건 / {t['wall_s']}초 / {t['throughput_rps']} req/s")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="라우트 부하 벤치마크")
+    parser.add_argument("--url", help="실행 중인 서버 주소 (없으면 Flask test client)")
+    parser.add_argument("--sqlite", default="bench.db",
+                        help="test client 이고 TRAVELMATE_DB_BACKEND 가 없을 때 쓸 SQLite 파일")
+    parser.add_argument("--generate", type=int, default=0,
+                        help="여행이 이 수보다 적으면 generate_data 로 채운다")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="총 요청 수 (0이면 시간으로만)")
+    parser.add_argument("--warmup", type=int, default=10, help="스레드당 워밍업 요청 수")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="라우트별 비율 'trip_list:35,trip_detail:40,...'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=20.0, help="허용 악화 비율(%%)")
+    parser.add_argument("--compare-metrics", default="p95_ms,queries_avg",
+                        help="비교할 값 (쉼표로 구분)")
+    args = parser.parse_args(argv[1:])
+
+    if args.url is None and "TRAVELMATE_DB_BACKEND" not in os.environ:
+        os.environ["TRAVELMATE_DB_BACKEND"] = "sqlite"
+        os.environ["TRAVELMATE_SQLITE_PATH"] = args.sqlite
+
+    from app import app, pool, backend
+
+    conn = pool.acquire()
+    try:
+        if args.generate:
+            added = ensure_dataset(conn, args.generate, args.seed)
+            if added:
+                print(f"generate_data: 여행 {added:,}개 추가")
+        trips, currencies = load_fixture(conn)
+    finally:
+        conn.close()
+
+    if not trips:
+        print("참가자 2명 이상인 여행이 없습니다 (--generate 로 데이터를 만드세요)")
+        return 2
+
+    target = HttpTarget(args.url) if args.url else TestClientTarget(app)
+    samples, wall = run_benchmark(
+        target, trips, currencies, args.mix,
+        concurrency=args.concurrency,
+        duration=args.duration if not args.requests else 0,
+        max_requests=args.requests,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    routes, total = summarize(samples, wall)
+
+    commit, dirty = git_revision()
+    result = {
+        "meta": {
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_commit": commit,
+            "git_dirty": dirty,
+            "target": args.url or "test-client",
+            "backend": backend.name,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration if not args.requests else None,
+            "requests": args.requests or None,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "seed": args.seed,
+            "trips_sampled": len(trips),
+            "python": platform.python_version(),
+        },
+        "total": total,
+        "routes": routes,
+    }
+
+    print_summary(result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.out}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    metrics = [m.strip() for m in args.compare_metrics.split(",") if m.strip()]
+    rows, regressions = compare(baseline, result, args.threshold, metrics)
+
+    print()
+    # 조건이 다르면 숫자를 그대로 비교하기 어렵다
+    for key in ("target", "backend", "concurrency", "mix"):
+        if baseline.get("meta", {}).get(key) != result["meta"][key]:
+            print(f"주의: {key} 가 다릅니다 ({baseline.get('meta', {}).get(key)} → {result['meta'][key]})")
+    print(f"비교: {args.baseline} ({baseline.get('meta', {}).get('git_commit')}) → 현재, 허용 {args.threshold}%")
+    for route, metric, old, new, change in rows:
+        mark = "  ← 악화" if (route, metric, old, new, change) in regressions else ""
+        print(f"  {route:<16} {metric:<12} {old!s:>10} → {new!s:>10} ({change:+.1f}%){mark}")
+    if regressions:
+        print(f"{len(regressions)}개 항목이 {args.threshold}% 넘게 나빠졌습니다")
+        return 1
+    print("악화 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,94 @@
+# --------------------------
+# 송금 정리 벤치마크
+# --------------------------
+# 인원 10 / 1,000 / 100,000 명의 임의 balance(합계 0)로
+# 예전 two-pointer 방식과 settlement.py 의 greedy / exact / auto 를 비교한다.
+#
+#   python bench_settlement.py [seed]
+
+import random
+import sys
+import time
+
+from settlement import compute_transfers, EXACT_CUTOFF
+
+
+def make_balances(n, rng):
+    """합계가 정확히 0인 원 단위 balance 목록"""
+    amounts = [rng.randint(-300000, 300000) for _ in range(n - 1)]
+    amounts.append(-sum(amounts))
+    return [(f"user{i}", amt) for i, amt in enumerate(amounts)]
+
+
+def two_pointer_transfers(balances):
+    """예전 trip_detail 안에 있던 방식 (비교용)"""
+    receivers = [{"name": n, "amount": b} for n, b in balances if b > 0]
+    payers = [{"name": n, "amount": -b} for n, b in balances if b < 0]
+
+    transactions = []
+    i, j = 0, 0
+    while i < len(payers) and j < len(receivers):
+        pay = payers[i]
+        rec = receivers[j]
+        send_amount = min(pay["amount"], rec["amount"])
+        transactions.append({"from": pay["name"], "to": rec["name"], "amount": send_amount})
+        pay["amount"] -= send_amount
+        rec["amount"] -= send_amount
+        if pay["amount"] <= 0:
+            i += 1
+        if rec["amount"] <= 0:
+            j += 1
+    return transactions
+
+
+def check(balances, transactions):
+    """송금 후 모든 사람의 balance 가 0이 되는지 확인"""
+    left = dict(balances)
+    for t in transactions:
+        left[t["from"]] += t["amount"]
+        left[t["to"]] -= t["amount"]
+    return all(v == 0 for v in left.values())
+
+
+def run(name, func, balances, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        transactions = func(balances)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    ok = "ok" if check(balances, transactions) else "FAIL"
+    print(f"  {name:<12} {best * 1000:>10.3f} ms   송금 {len(transactions):>7}건   {ok}")
+
+
+def main(argv):
+    seed = int(argv[1]) if len(argv) > 1 else 42
+    rng = random.Random(seed)
+
+    for n in (10, 1000, 100000):
+        balances = make_balances(n, rng)
+        repeat = 5 if n <= 1000 else 1
+        print(f"인원 {n:,}명")
+
+        run("two-pointer", two_pointer_transfers, balances, repeat)
+        run("greedy", lambda b: compute_transfers(b, mode="greedy"), balances, repeat)
+        if n <= EXACT_CUTOFF:
+            run("exact", lambda b: compute_transfers(b, mode="exact"), balances, repeat)
+        run("auto", compute_transfers, balances, repeat)
+        print()
+
+    # 합이 0인 작은 그룹이 섞여 있을 때 exact 가 송금 횟수를 얼마나 줄이는지
+    print("송금 횟수 비교 (2~3명씩 딱 맞는 그룹 4개, 총 10명)")
+    balances = [("a", 5000), ("b", -5000),
+                ("c", 12000), ("d", -7000), ("e", -5000),
+                ("f", 3000), ("g", -3000),
+                ("h", 8000), ("i", -4000), ("j", -4000)]
+    rng.shuffle(balances)
+    run("two-pointer", two_pointer_transfers, balances, 5)
+    run("greedy", lambda b: compute_transfers(b, mode="greedy"), balances, 5)
+    run("exact", lambda b: compute_transfers(b, mode="exact"), balances, 5)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
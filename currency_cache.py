@@ -0,0 +1,201 @@
+# --------------------------
+# 환율 캐시
+# --------------------------
+# currency 테이블은 10줄 남짓이고 거의 바뀌지 않는데,
+# 지출/액티비티를 저장할 때마다 rate_to_krw 를 SELECT 하고 있었다.
+# 테이블 전체를 한 번 읽어 메모리에 들고 있다가 거기서 바로 꺼내 쓴다.
+#
+#  - TTL 이 지나면 MAX(updated_at) / COUNT(*) 만 확인해서
+#    실제로 바뀌었을 때만 다시 읽는다.
+#  - 환율을 직접 고친 뒤에는 invalidate() 로 바로 버릴 수 있다.
+#
+# 환율 이력(currency_rates)도 같이 읽어서 통화마다 effective_at 오름차순 배열로 들고 있고,
+# (통화, 결제일시) 조회는 bisect 로 찾는다 (RateTable).
+# 이력은 항상 기준 환율(BASELINE_AT) 기록부터 시작한다 (migration 007 / 샘플 데이터 / currency_rates.add_rate).
+# 이력이 없는 통화는 currency.rate_to_krw 하나를 기준 환율로 모든 시각에 쓴다.
+# SQL 로 같은 값을 구해야 하는 곳(currency_reconvert.py)은 rate_sql() 을 쓴다.
+
+import datetime
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+# 기준 환율의 적용 시각 (이력을 쌓기 전의 환율 = 그 이전 모든 날짜의 환율)
+BASELINE_AT = datetime.datetime(1000, 1, 1)
+
+# 캐시에 통째로 올리는 통화 / 환율 이력 (둘 다 작은 테이블이라 전체를 읽는다)
+_CURRENCY_SQL = """
+    SELECT currency_code, rate_to_krw
+    FROM currency
+"""
+
+_HISTORY_SQL = """
+    SELECT currency_code, effective_at, rate
+    FROM currency_rates
+"""
+
+
+def _to_rate(value):
+    """DB 의 환율 → Decimal (MySQL 은 Decimal, SQLite 는 float 로 돌려준다)"""
+    if isinstance(value, Decimal):
+        return value
+    # float 는 이진수 값이 아니라 보이는 그대로 (money._to_decimal 과 같은 규칙)
+    return Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+
+
+class RateTable:
+    """통화별 환율 이력 → (통화, 시각) 의 환율
+
+    DB 를 보지 않는 읽기 전용 스냅샷이라, CSV 가져오기 / 재환산처럼
+    수천 건을 한꺼번에 환산할 때는 rate_cache.table(conn) 으로 받아서 그대로 쓴다.
+    """
+
+    def __init__(self, history=None):
+        # history: {currency_code: [(effective_at, rate), ...]}
+        self._times = {}
+        self._rates = {}
+        for code, points in (history or {}).items():
+            points = sorted(points)
+            self._times[code] = [p[0] for p in points]
+            self._rates[code] = [p[1] for p in points]
+
+    def __contains__(self, currency_code):
+        return currency_code in self._rates
+
+    def __len__(self):
+        return len(self._rates)
+
+    def rate(self, currency_code, at=None):
+        """at 시점에 적용되던 원화 환율 (at 이 None 이면 지금). 없는 통화면 ValueError"""
+        rates = self._rates.get(currency_code)
+        if rates is None:
+            raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
+
+        if at is None:
+            at = datetime.datetime.now()
+        elif not isinstance(at, datetime.datetime):
+            at = datetime.datetime.combine(at, datetime.time())
+
+        i = bisect_right(self._times[currency_code], at)
+        # 첫 기록(기준 환율, BASELINE_AT)보다 이전 시각도 기준 환율로
+        return rates[i - 1] if i else rates[0]
+
+    def current(self):
+        """{통화 코드: 지금 환율}"""
+        now = datetime.datetime.now()
+        return {code: self.rate(code, now) for code in self._rates}
+
+
+def rate_sql(code, at):
+    """RateTable.rate 와 같은 규칙의 SQL 식 (code / at 은 통화 코드 / 시각 SQL 식)
+
+    at 이전의 마지막 기록 → 없으면 첫 기록(기준 환율) → 이력이 없는 통화면 currency.rate_to_krw
+    """
+    return f"""COALESCE(
+        (SELECT r.rate FROM currency_rates r
+         WHERE r.currency_code = {code} AND r.effective_at <= {at}
+         ORDER BY r.effective_at DESC LIMIT 1),
+        (SELECT r.rate FROM currency_rates r
+         WHERE r.currency_code = {code}
+         ORDER BY r.effective_at LIMIT 1),
+        (SELECT c.rate_to_krw FROM currency c
+         WHERE c.currency_code = {code})
+    )"""
+
+
+class CurrencyRateCache:
+
+    def __init__(self, ttl=300.0, miss_reload_interval=5.0):
+        self.ttl = ttl
+        # 모르는 통화 코드가 들어왔을 때 다시 읽는 최소 간격
+        # (잘못된 코드로 계속 요청해도 매번 테이블을 읽지 않도록)
+        self.miss_reload_interval = miss_reload_interval
+
+        self._lock = threading.Lock()
+        self._table = RateTable()  # 통화별 환율 이력
+        self._version = None      # currency / currency_rates 의 (MAX(updated_at), COUNT(*))
+        self._loaded_at = None    # 마지막으로 테이블을 읽은 시각
+        self._checked_at = None   # 마지막으로 버전을 확인한 시각
+
+    def _read_version(self, conn):
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT (SELECT MAX(updated_at) FROM currency)       AS updated_at,
+                       (SELECT COUNT(*) FROM currency)              AS cnt,
+                       (SELECT MAX(updated_at) FROM currency_rates) AS rates_updated_at,
+                       (SELECT COUNT(*) FROM currency_rates)        AS rates_cnt
+            """)
+            row = cur.fetchone()
+        return (row['updated_at'], row['cnt'], row['rates_updated_at'], row['rates_cnt'])
+
+    def _load(self, conn):
+        # 버전을 먼저 읽어야 읽는 사이에 바뀐 것을 다음 확인 때 놓치지 않는다
+        version = self._read_version(conn)
+        with conn.cursor() as cur:
+            cur.execute(_CURRENCY_SQL)
+            rows = cur.fetchall()
+
+            cur.execute(_HISTORY_SQL)
+            history_rows = cur.fetchall()
+
+        history = {}
+        for r in history_rows:
+            history.setdefault(r['currency_code'], []).append((r['effective_at'], _to_rate(r['rate'])))
+        for r in rows:
+            if r['currency_code'] not in history:
+                history[r['currency_code']] = [(BASELINE_AT, _to_rate(r['rate_to_krw']))]
+        table = RateTable(history)
+
+        now = time.monotonic()
+        with self._lock:
+            self._table = table
+            self._version = version
+            self._loaded_at = now
+            self._checked_at = now
+
+    def _refresh_if_needed(self, conn):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is None:
+            self._load(conn)
+            return
+
+        if now - checked_at < self.ttl:
+            return
+
+        # TTL 지남 → 바뀌었는지만 가볍게 확인
+        if self._read_version(conn) != self._version:
+            self._load(conn)
+        else:
+            with self._lock:
+                self._checked_at = now
+
+    def get_rate(self, conn, currency_code, at=None):
+        """at(결제일시) 에 적용되던 currency_code 의 원화 환율 (None 이면 지금). 없는 통화면 ValueError"""
+        self._refresh_if_needed(conn)
+
+        loaded_at = self._loaded_at or 0.0
+        if currency_code not in self._table and \
+                time.monotonic() - loaded_at >= self.miss_reload_interval:
+            # 방금 추가된 통화일 수도 있으니 한 번 더 읽어 본다
+            self._load(conn)
+
+        return self._table.rate(currency_code, at)
+
+    def table(self, conn):
+        """지금 들고 있는 환율 이력 스냅샷 (RateTable, 대량 환산용)"""
+        self._refresh_if_needed(conn)
+        return self._table
+
+    def all_rates(self, conn):
+        """{통화 코드: 지금 환율}"""
+        return self.table(conn).current()
+
+    def invalidate(self):
+        """환율을 수정한 직후 호출 → 다음 조회 때 테이블을 다시 읽는다"""
+        with self._lock:
+            self._table = RateTable()
+            self._version = None
+            self._loaded_at = None
+            self._checked_at = None
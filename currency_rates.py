@@ -0,0 +1,140 @@
+# --------------------------
+# 환율 이력 기록
+# --------------------------
+# currency 테이블에는 통화마다 환율이 하나뿐이라, 환율을 고치면 예전 날짜로 입력하거나
+# CSV 로 가져온 지출도 모두 "지금 환율" 로 환산됐다.
+# 환율을 바꿀 때는 add_rate 로 currency_rates 에 (통화, 적용 시각, 환율) 을 쌓고,
+# 적용 시각이 가장 최근이면 currency.rate_to_krw 도 같이 바꾼다.
+# 이력이 하나도 없는 통화는 먼저 지금의 currency.rate_to_krw 를 기준 환율(BASELINE_AT)로 남긴다.
+# (안 그러면 첫 기록이 그보다 이전의 모든 날짜에도 적용된다)
+# 조회는 currency_cache.py (RateTable, bisect) 가 메모리에서 한다.
+# set 은 이미 저장된 원화 금액을 다시 계산하는 jobs 작업('reconvert', currency_reconvert.py)도 같이 등록한다.
+#
+#   python currency_rates.py list [currency_code]
+#   python currency_rates.py set <currency_code> <rate> [--at "2024-05-01 00:00"]
+
+import datetime
+import sys
+from decimal import Decimal, InvalidOperation
+
+from currency_cache import BASELINE_AT
+
+
+def add_rate(cur, currency_code, rate, effective_at=None):
+    """effective_at 부터 적용되는 환율 기록 (같은 시각이 이미 있으면 덮어씀) → effective_at"""
+    if effective_at is None:
+        effective_at = datetime.datetime.now().replace(microsecond=0)
+
+    # 첫 기록이면 바꾸기 전 환율을 기준 환율로 (effective_at 이전 날짜는 이 값 그대로)
+    cur.execute("""
+        INSERT INTO currency_rates (currency_code, effective_at, rate, updated_at)
+        SELECT c.currency_code, %s, c.rate_to_krw, NOW()
+        FROM currency c
+        WHERE c.currency_code = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM currency_rates
+              WHERE currency_code = %s
+          )
+    """, (BASELINE_AT, currency_code, currency_code))
+
+    cur.execute("""
+        INSERT INTO currency_rates (currency_code, effective_at, rate, updated_at)
+        VALUES (%s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE rate = VALUES(rate), updated_at = NOW()
+    """, (currency_code, effective_at, rate))
+
+    # 가장 최근 기록이면 "지금 환율" 도 바꾼다
+    cur.execute("""
+        UPDATE currency
+        SET rate_to_krw = %s,
+            updated_at = NOW()
+        WHERE currency_code = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM currency_rates
+              WHERE currency_code = %s
+                AND effective_at > %s
+          )
+    """, (rate, currency_code, currency_code, effective_at))
+    return effective_at
+
+
+def rate_history(cur, currency_code=None):
+    if currency_code:
+        cur.execute("""
+            SELECT currency_code, effective_at, rate
+            FROM currency_rates
+            WHERE currency_code = %s
+            ORDER BY effective_at
+        """, (currency_code,))
+    else:
+        cur.execute("""
+            SELECT currency_code, effective_at, rate
+            FROM currency_rates
+            ORDER BY currency_code, effective_at
+        """)
+    return cur.fetchall()
+
+
+def _parse_at(value):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"시각 형식이 잘못되었습니다: {value}")
+
+
+def main(argv):
+    args = list(argv[1:])
+    effective_at = None
+    if "--at" in args:
+        i = args.index("--at")
+        effective_at = _parse_at(args[i + 1])
+        del args[i:i + 2]
+
+    # 환율은 float 를 거치지 않고 입력한 그대로 Decimal 로 (0 이하 / NaN / Infinity 는 사용법 출력)
+    rate = None
+    if args[:1] == ["set"] and len(args) == 3:
+        try:
+            rate = Decimal(args[2])
+        except InvalidOperation:
+            pass
+        if rate is not None and (not rate.is_finite() or rate <= 0):
+            rate = None
+
+    if not args or args[0] not in ("list", "set") or (args[0] == "set" and rate is None):
+        print("사용법: python currency_rates.py list [currency_code] | "
+              "set <currency_code> <rate> [--at \"2024-05-01 00:00\"]")
+        return 2
+
+    from app import pool, job_runner
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            if args[0] == "set":
+                currency_code = args[1].upper()
+                cur.execute("SELECT 1 FROM currency WHERE currency_code = %s", (currency_code,))
+                if cur.fetchone() is None:
+                    print(f"currency 테이블에 없는 통화입니다: {currency_code}")
+                    return 1
+                effective_at = add_rate(cur, currency_code, rate, effective_at)
+                # 같은 트랜잭션에서 재계산 작업 등록 (실행 중인 서버가 가져가서 처리)
+                # → effective_at 부터 이 기록이 적용되는 행만 다시 계산
+                job_id = job_runner.enqueue(cur, 'reconvert', f'reconvert:{currency_code}', {
+                    'currency_code': currency_code,
+                    'since': [effective_at.strftime('%Y-%m-%d %H:%M:%S')],
+                })
+                conn.commit()
+                print(f"{currency_code} {args[2]}원 기록, 원화 금액 재계산 작업 #{job_id} 등록 "
+                      f"(python jobs.py run 으로 바로 실행 가능)")
+                return 0
+
+            for r in rate_history(cur, args[1].upper() if len(args) > 1 else None):
+                print(f"{r['currency_code']}  {r['effective_at']}  {r['rate']}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,202 @@
+# --------------------------
+# 환율 수정 후 원화 금액 다시 계산
+# --------------------------
+# expenses.amount_krw / activities.cost_krw / transports.cost_krw 는 저장할 때의 환율로
+# 고정되어서, 환율을 고치면 expense_edit / activity_edit 으로 한 건씩 다시 저장해야 했다.
+#
+# 여기서는 PK 구간(chunk 개씩)마다 짧은 트랜잭션 하나로
+#  1) 금액이 바뀌는 행이 있는 여행 찾기 (없으면 아무것도 안 쓰고 다음 구간)
+#  2) UPDATE 1번으로 원화 금액 다시 계산 (환율은 currency_rates 에서 결제일시 기준,
+#     currency_cache.rate_sql → RateTable 과 같은 규칙)
+#  3) expenses 면 같은 구간의 N빵 금액도 다시 나누고 (expense_resplit.reshare_range)
+#     trip_balances 는 구간 전체를 빼고 다시 더해서 맞춘다
+#  4) 여행 상세 캐시 무효화 후 커밋, pause 초 쉬기
+#
+# 이미 맞는 행은 건드리지 않으므로 중간에 멈춰도 처음부터 다시 실행하면 된다.
+# 환율을 고칠 때(currency_rates.py set) jobs 작업('reconvert')으로 등록되어 백그라운드에서 돈다.
+# 이때는 새 기록(effective_at)이 실제로 적용되는 행만 고친다:
+#   기준 시각 >= effective_at 이고, 그 사이에 더 늦은 기록이 없는 행
+# (예전 날짜 지출의 원화 금액 / 과거 시각으로 넣은 환율에 대한 액티비티(지금 환율)는 그대로)
+# 인자 없이 CLI 로 돌리면 모든 행을 이력 기준으로 다시 맞춘다.
+#
+#   python currency_reconvert.py [currency_code] [--chunk 1000]
+
+import sys
+import time
+
+import ledger
+from currency_cache import rate_sql
+from expense_resplit import reshare_range
+from trip_cache import bump_trip_version
+
+DEFAULT_CHUNK = 1000
+
+# (테이블, PK, 원래 금액, 원화 금액, 환율 기준 시각, 여행 id 를 고르는 FROM / SELECT)
+_TABLES = [
+    ("expenses", "expense_id", "amount", "amount_krw",
+     "COALESCE(expenses.paid_at, NOW())",
+     "SELECT DISTINCT expenses.trip_id AS trip_id FROM expenses"),
+    ("activities", "activity_id", "cost", "cost_krw",
+     "NOW()",     # 액티비티는 날짜 없이 시각만 있으므로 지금 환율 (activity_form 과 같게)
+     "SELECT DISTINCT d.trip_id AS trip_id FROM activities "
+     "JOIN destinations d ON d.destination_id = activities.destination_id"),
+    ("transports", "transport_id", "cost", "cost_krw",
+     "COALESCE(transports.depart_at, NOW())",
+     "SELECT DISTINCT transports.trip_id AS trip_id FROM transports"),
+]
+
+
+def _window_sql(table, at, since):
+    """since(새 기록 시각들) 중 하나가 at 시점의 환율이 되는 행 (SQL 조건, 인자)"""
+    parts = []
+    params = []
+    for effective_at in since:
+        parts.append(f"""({at} >= %s AND NOT EXISTS (
+            SELECT 1 FROM currency_rates r
+            WHERE r.currency_code = {table}.currency_code
+              AND r.effective_at > %s AND r.effective_at <= {at}))""")
+        params += [effective_at, effective_at]
+    return "(" + " OR ".join(parts) + ")", params
+
+
+def _id_range(acquire, table, pk):
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT MIN({pk}) AS lo, MAX({pk}) AS hi FROM {table}")
+            row = cur.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return row["lo"], row["hi"]
+
+
+def _reconvert_chunk(acquire, spec, first_id, last_id, currency_code=None, since=None):
+    """한 구간을 다시 계산하고 커밋 → 원화 금액이 바뀐 행 수"""
+    table, pk, amount, krw, at, trips_sql = spec
+    new_krw = f"ROUND({table}.{amount} * {rate_sql(f'{table}.currency_code', at)}, 2)"
+    where = (f"{table}.{pk} BETWEEN %s AND %s"
+             f" AND {table}.{amount} IS NOT NULL"
+             f" AND {table}.currency_code IS NOT NULL")
+    params = [first_id, last_id]
+    if currency_code:
+        where += f" AND {table}.currency_code = %s"
+        params.append(currency_code)
+    if since:
+        window, window_params = _window_sql(table, at, since)
+        where += " AND " + window
+        params += window_params
+    changed = f" AND ({table}.{krw} IS NULL OR {table}.{krw} <> {new_krw})"
+
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            # 1) 금액이 바뀌는 행이 있는 여행
+            cur.execute(trips_sql + " WHERE " + where + changed, params)
+            trip_ids = [r["trip_id"] for r in cur.fetchall()]
+            if not trip_ids:
+                conn.commit()
+                return 0
+
+            # 2) 원화 금액 다시 계산 (지출이면 정산 요약에서 이 구간을 먼저 빼 둔다)
+            if table == "expenses":
+                ledger.apply_expense_id_range(cur, first_id, last_id, -1)
+
+            cur.execute(f"UPDATE {table} SET {krw} = {new_krw} WHERE " + where + changed, params)
+            rows = cur.rowcount
+
+            # 3) N빵 금액 + 정산 요약
+            if table == "expenses":
+                reshare_range(cur, first_id, last_id)
+                ledger.apply_expense_id_range(cur, first_id, last_id, +1)
+
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            for trip_id in trip_ids:
+                bump_trip_version(cur, trip_id)
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def reconvert(acquire, currency_code=None, since=None, chunk=DEFAULT_CHUNK, pause=0.0,
+              on_progress=None):
+    """모든(또는 currency_code 의) 원화 금액을 환율 이력 기준으로 다시 계산
+
+    acquire: 커넥션을 빌려오는 함수 (pool.acquire)
+    since: 새로 넣은 환율 기록의 effective_at 목록 → 그 기록이 적용되는 행만 (None 이면 전부)
+    on_progress(table, done, total, rows): 구간마다 호출 (done / total 은 훑은 PK 수)
+    반환값: {테이블: 원화 금액이 바뀐 행 수}
+    """
+    ranges = [(spec, _id_range(acquire, spec[0], spec[1])) for spec in _TABLES]
+    total = sum(hi - lo + 1 for _, (lo, hi) in ranges if lo is not None)
+
+    done = 0
+    result = {}
+    for spec, (lo, hi) in ranges:
+        result[spec[0]] = 0
+        if lo is None:
+            continue
+        for first_id in range(lo, hi + 1, chunk):
+            last_id = min(first_id + chunk - 1, hi)
+            rows = _reconvert_chunk(acquire, spec, first_id, last_id, currency_code, since)
+            result[spec[0]] += rows
+            done += last_id - first_id + 1
+            if on_progress is not None:
+                on_progress(spec[0], done, total, rows)
+            if rows and pause:
+                time.sleep(pause)
+    return result
+
+
+# --------------------------
+# 백그라운드 작업 (jobs.py)
+# --------------------------
+
+def reconvert_job(ctx, payload, chunk=DEFAULT_CHUNK, pause=0.0):
+    """jobs 작업 'reconvert': {'currency_code': 'USD', 'since': ['2024-05-01 00:00:00']}
+
+    currency_code 가 없으면 전체 통화, since 가 없으면 모든 행
+    """
+    def report(table, done, total, rows):
+        ctx.progress(done, total=total, message=table)
+
+    payload = payload or {}
+    reconvert(ctx.acquire, payload.get("currency_code"), payload.get("since"),
+              chunk=chunk, pause=pause, on_progress=report)
+
+
+def merge_reconvert_payload(old, new):
+    """아직 실행 전인 같은 통화 작업에 새 환율 기록 시각을 합친다 (한쪽이라도 전체면 전체)"""
+    if not old or not old.get("since") or not new.get("since"):
+        return {"currency_code": new.get("currency_code")} if old else new
+    return {"currency_code": new.get("currency_code"),
+            "since": sorted(set(old["since"]) | set(new["since"]))}
+
+
+def main(argv):
+    chunk = DEFAULT_CHUNK
+    args = list(argv[1:])
+    if "--chunk" in args:
+        i = args.index("--chunk")
+        chunk = int(args[i + 1])
+        del args[i:i + 2]
+    currency_code = args[0].upper() if args else None
+
+    from app import pool
+
+    def report(table, done, total, rows):
+        if rows:
+            print(f"  {table}: {done:,}/{total:,} ({rows}행 변경)")
+
+    result = reconvert(pool.acquire, currency_code, chunk=chunk, on_progress=report)
+    for table, rows in result.items():
+        print(f"{table}: {rows:,}행 다시 계산")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,287 @@
+# --------------------------
+# DB 커넥션 풀
+# --------------------------
+# 요청마다 pymysql.connect()를 새로 하면 TCP 연결 + 인증 + charset 협상 비용이
+# 매번 들고, 요청이 몰리면 MySQL max_connections 를 넘겨버린다.
+# 그래서 정해진 개수(max_size)만큼만 커넥션을 만들어 두고 돌려 쓴다.
+#
+#  - acquire(): 쉬고 있는 커넥션을 꺼내거나, 여유가 있으면 새로 만든다.
+#               꽉 차 있으면 timeout 초까지 기다리고, 그래도 없으면 PoolTimeout.
+#  - close()  : PooledConnection.close() 는 실제로 끊지 않고 풀에 반납한다.
+#               (app.py 라우트들의 conn.close() 를 그대로 쓸 수 있게)
+#  - 오래 놀던 커넥션은 꺼낼 때 ping 으로 확인하고, 죽어 있으면 다시 연결한다.
+#  - 기본은 pymysql.connect, connect= 로 다른 연결 함수(SQLite 등, storage.py)를 줄 수 있다.
+#  - pool.tracers 에 함수를 넣으면 커서의 execute / fetch 시간이 그 함수로 전달된다.
+#    (요청별 쿼리 수 / DB 시간 측정 → metrics.py)
+
+import threading
+import time
+from collections import deque
+
+import pymysql
+
+
+class PoolTimeout(Exception):
+    """제한 시간 안에 커넥션을 얻지 못했을 때 (back-pressure)"""
+
+
+class TracedCursor:
+    """pymysql 커서를 감싸서 실행 / 결과 읽기 시간을 tracer 들에게 알린다
+
+    tracer(kind, sql, params, seconds)
+      kind: "execute" | "executemany" | "fetch"  (fetch 는 sql 이 None)
+    """
+
+    def __init__(self, cursor, tracers):
+        self._cursor = cursor
+        self._tracers = tracers
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _notify(self, kind, sql, params, seconds):
+        for tracer in self._tracers:
+            try:
+                tracer(kind, sql, params, seconds)
+            except Exception:
+                pass    # 측정 실패로 요청이 깨지면 안 된다
+
+    def _timed(self, kind, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if kind == "fetch":
+                self._notify(kind, None, None, elapsed)
+            else:
+                self._notify(kind, args[0], args[1] if len(args) > 1 else None, elapsed)
+
+    def execute(self, query, args=None):
+        return self._timed("execute", self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed("executemany", self._cursor.executemany, query, args)
+
+    # 버퍼링 커서는 execute 안에서 다 읽지만
+    # unbuffered 커서 / multi-statement 의 다음 결과는 여기서 서버를 기다린다
+    def fetchone(self):
+        return self._timed("fetch", self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed("fetch", self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed("fetch", self._cursor.fetchall)
+
+    def nextset(self):
+        return self._timed("fetch", self._cursor.nextset)
+
+
+class PooledConnection:
+    """풀에서 빌려준 커넥션. close() 하면 풀로 돌아간다."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._returned = False
+
+    def __getattr__(self, name):
+        # commit(), rollback() 등은 원래 커넥션으로 그대로 넘긴다
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cur = self._raw.cursor(*args, **kwargs)
+        if self._pool.tracers:
+            return TracedCursor(cur, self._pool.tracers)
+        return cur
+
+    @property
+    def closed(self):
+        return self._returned
+
+    def close(self):
+        # 두 번 반납되지 않도록 (라우트 finally + teardown 둘 다 불러도 안전)
+        if self._returned:
+            return
+        self._returned = True
+        self._pool._release(self._raw)
+
+    def discard(self):
+        """상태를 믿을 수 없는 커넥션 (읽다 만 unbuffered 결과 등) 은 실제로 끊는다.
+        이후 close() 하면 풀은 자리만 비운다."""
+        try:
+            self._raw.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+
+    def __init__(self, connect_kwargs, max_size=10, timeout=5.0,
+                 ping_interval=30.0, max_lifetime=3600.0, connect=None):
+        self.connect_kwargs = connect_kwargs
+        self.connect = connect or pymysql.connect
+        self.max_size = max_size
+        self.timeout = timeout                # 빈 커넥션을 기다리는 최대 시간(초)
+        self.ping_interval = ping_interval    # 이 시간 이상 놀았으면 꺼낼 때 ping
+        self.max_lifetime = max_lifetime      # 너무 오래된 커넥션은 새로 연결
+
+        self._cond = threading.Condition()    # 기본 RLock: 락을 쥔 채 _discard 를 불러도 된다
+        self._idle = deque()    # (raw, created_at, last_used)
+        self._born = {}         # id(raw) -> created_at (빌려준 커넥션 포함)
+        self._total = 0         # 만들어 둔 커넥션 수 (idle + in_use)
+        self._waiting = 0
+        self.tracers = []       # 쿼리 시간 측정 함수들 (TracedCursor 참고)
+
+        # 통계
+        self._acquired = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---- 내부 ----
+
+    # 연결 / ping 은 락 밖에서 하고, _born / 통계만 락 안에서 고친다
+
+    def _connect(self):
+        raw = self.connect(**self.connect_kwargs)
+        with self._cond:
+            self._born[id(raw)] = time.monotonic()
+        return raw
+
+    def _discard(self, raw):
+        with self._cond:
+            self._born.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _check_health(self, raw, created_at, last_used):
+        """놀고 있던 커넥션이 아직 살아 있는지 확인하고, 죽었으면 새로 연결"""
+        now = time.monotonic()
+
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            self._discard(raw)
+            with self._cond:
+                self._reconnects += 1
+            return self._connect()
+
+        if now - last_used > self.ping_interval:
+            try:
+                raw.ping(reconnect=True)
+            except Exception:
+                self._discard(raw)
+                with self._cond:
+                    self._reconnects += 1
+                return self._connect()
+
+        return raw
+
+    def _release(self, raw):
+        # 커밋하지 않은 작업은 버린다.
+        # (REPEATABLE READ 라서 열린 트랜잭션을 그대로 두면
+        #  다음 요청이 예전 스냅샷을 보게 된다)
+        healthy = raw.open
+        if healthy:
+            try:
+                raw.rollback()
+            except Exception:
+                healthy = False
+
+        with self._cond:
+            if healthy:
+                created_at = self._born.get(id(raw), time.monotonic())
+                self._idle.append((raw, created_at, time.monotonic()))
+            else:
+                self._discard(raw)
+                self._total -= 1
+            self._cond.notify()
+
+    # ---- 공개 API ----
+
+    def acquire(self, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+
+        started = time.monotonic()
+        deadline = started + timeout
+        item = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    # 가장 최근에 쓴 커넥션부터 (LIFO → 오래 논 커넥션은 자연스럽게 정리)
+                    item = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"{timeout}초 안에 DB 커넥션을 얻지 못했습니다 "
+                        f"(max_size={self.max_size})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            waited = time.monotonic() - started
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        # 실제 연결 / ping 은 락 밖에서 (느린 네트워크 작업으로 다른 스레드를 막지 않게)
+        try:
+            if item is None:
+                raw = self._connect()
+            else:
+                raw = self._check_health(*item)
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "max_size": self.max_size,
+                "total": self._total,
+                "in_use": self._total - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "wait_avg_ms": round(self._wait_total / self._acquired * 1000, 3)
+                if self._acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def close_all(self):
+        """쉬고 있는 커넥션을 모두 끊는다 (빌려준 것은 반납될 때 다시 쌓임)"""
+        with self._cond:
+            while self._idle:
+                raw, _, _ = self._idle.pop()
+                self._discard(raw)
+                self._total -= 1
@@ -0,0 +1,302 @@
+# --------------------------
+# 지출 CSV 가져오기
+# --------------------------
+# 카드 명세서 / 스프레드시트처럼 수백~수백만 줄의 지출을 한 번에 넣는다.
+#
+# CSV 형식 (첫 줄은 헤더, 순서는 상관없음)
+#   payer, amount, currency, category, paid_at, memo, split
+#   - payer    : 결제자 이름 (이 여행 참가자여야 함)
+#   - amount   : 금액 (원래 통화 기준)
+#   - currency : 통화 코드, 비우면 KRW
+#   - paid_at  : YYYY-MM-DD 또는 YYYY-MM-DD HH:MM[:SS], 비워도 됨
+#   - split    : N빵할 사람 이름을 ';' 로 구분 (비우면 참가자 전원)
+#
+# 처리 방식
+#   - 파일을 한 줄씩 읽으면서 chunk_size 줄씩 모아서 처리 → 파일이 커도 메모리는 일정
+#   - 참가자 이름 → user_id, 통화 → 환율은 가져오기 시작할 때 한 번만 읽어 둔다
+#     (환율은 paid_at 시점의 것, 메모리의 환율 이력에서 bisect 로 찾으므로 줄마다 DB 조회 없음)
+#   - chunk 마다: expenses 여러 행 INSERT 1번, N빵 INSERT 1번,
+#                 정산 요약(trip_balances) 반영 2번, 그리고 커밋
+#   - 잘못된 줄은 건너뛰고 (줄 번호, 이유) 를 오류 보고서에 남긴다
+#
+#   python expense_import.py <trip_id> <file.csv> [--chunk 1000] [--errors errors.csv]
+
+import csv
+import datetime
+import io
+import sys
+
+import ledger
+from expense_shares import split_even
+from money import Money
+from trip_cache import bump_trip_version
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_TRIP_DELETED = "여행이 삭제되어 가져오기를 멈췄습니다 (이 줄까지의 묶음은 저장 안 됨)."
+
+# 헤더 이름 별칭
+_HEADER_ALIASES = {
+    "payer": "payer", "payer_name": "payer",
+    "amount": "amount",
+    "currency": "currency", "currency_code": "currency",
+    "category": "category",
+    "paid_at": "paid_at",
+    "memo": "memo",
+    "split": "split", "participants": "split",
+}
+
+
+class ImportResult:
+    """가져오기 결과 요약 (오류는 앞쪽 max_errors_kept 개만 메모리에 보관)"""
+
+    def __init__(self, max_errors_kept=100):
+        self.max_errors_kept = max_errors_kept
+        self.rows_read = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []        # [(줄 번호, 이유), ...]
+        self.chunks = 0
+
+    def add_error(self, line_no, message, error_writer=None):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors_kept:
+            self.errors.append((line_no, message))
+        if error_writer is not None:
+            error_writer.writerow([line_no, message])
+
+
+def _parse_paid_at(value):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"결제일시 형식이 잘못되었습니다: {value}")
+
+
+def _parse_row(row, members, rates):
+    """CSV 한 줄 → expenses 에 넣을 값 / 잘못되면 ValueError"""
+    payer = (row.get("payer") or "").strip()
+    if payer not in members:
+        raise ValueError(f"이 여행 참가자가 아닌 결제자: {payer or '(빈 값)'}")
+
+    currency_code = (row.get("currency") or "").strip().upper() or "KRW"
+    try:
+        amount = Money.of(row.get("amount") or "", currency_code)
+    except ValueError:
+        raise ValueError(f"금액이 숫자가 아닙니다: {row.get('amount')}")
+    if amount.minor <= 0:
+        raise ValueError(f"금액은 0보다 커야 합니다: {amount.to_decimal()}")
+
+    if currency_code not in rates:
+        raise ValueError(f"currency 테이블에 {currency_code} 환율이 없습니다.")
+    paid_at = _parse_paid_at((row.get("paid_at") or "").strip())
+
+    split_names = [n.strip() for n in (row.get("split") or "").split(";") if n.strip()]
+    unknown = [n for n in split_names if n not in members]
+    if unknown:
+        raise ValueError(f"N빵 대상 중 참가자가 아닌 사람: {', '.join(unknown)}")
+
+    # 결제일시가 있으면 그때 환율, 없으면 지금 환율
+    amount_krw = amount.convert(rates.rate(currency_code, paid_at))
+    return {
+        "payer_id": members[payer],
+        "amount": amount.to_decimal(),
+        "currency_code": currency_code,
+        "amount_krw": amount_krw,         # Money (N빵은 정수로 나눈다)
+        "category": (row.get("category") or "").strip() or None,
+        "paid_at": paid_at,
+        "memo": (row.get("memo") or "").strip() or None,
+        "split_ids": [members[n] for n in split_names],
+    }
+
+
+def _load_members(cur, trip_id):
+    """이 여행 참가자 이름 → user_id"""
+    cur.execute("""
+        SELECT u.user_id, u.name
+        FROM trip_participants tp
+        JOIN users u ON tp.user_id = u.user_id
+        WHERE tp.trip_id = %s
+        ORDER BY tp.user_id
+    """, (trip_id,))
+    rows = cur.fetchall()
+    return {r["name"]: r["user_id"] for r in rows}, list(rows)
+
+
+# 방금 한 문장으로 넣은 지출들의 id (INSERT 한 순서 = id 오름차순)
+_NEW_IDS_SQL = """
+    SELECT expense_id
+    FROM expenses
+    WHERE trip_id = %s
+      AND expense_id >= %s
+    ORDER BY expense_id
+    LIMIT %s
+"""
+
+
+def _write_chunk(conn, trip_id, records, participants):
+    """검증된 지출 묶음을 한 트랜잭션으로 저장 (가져오는 중에 여행이 삭제됐으면 False)"""
+    with conn.cursor() as cur:
+        # 0) 상세 페이지 버전 (trips 행을 먼저 잠가서 삭제 표시와 순서를 정한다)
+        if not bump_trip_version(cur, trip_id):
+            conn.rollback()
+            return False
+
+        # 1) expenses 여러 행을 한 문장으로 INSERT
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(records))
+        params = []
+        for r in records:
+            params.extend([trip_id, r["payer_id"], r["amount"], r["currency_code"],
+                           r["amount_krw"].to_decimal(), r["category"], r["paid_at"], r["memo"]])
+        cur.execute(
+            "INSERT INTO expenses "
+            "(trip_id, paid_by_user_id, amount, currency_code, amount_krw, "
+            " category, paid_at, memo) "
+            "VALUES " + values,
+            params
+        )
+        # 넣은 행의 id 는 lastrowid(첫 번째 id) 부터 VALUES 순서대로 커지지만
+        # 연속이라는 보장은 없다 (auto_increment_increment > 1, Galera / group replication)
+        # → 다시 읽어 온다. trips 행을 잠가 두었으므로 이 여행에 새로 생긴 행은 방금 넣은 것뿐
+        cur.execute(_NEW_IDS_SQL, (trip_id, cur.lastrowid, len(records)))
+        expense_ids = [row["expense_id"] for row in cur.fetchall()]
+        if len(expense_ids) != len(records):
+            raise RuntimeError(f"가져온 지출 id 를 다시 읽지 못했습니다: {len(expense_ids)}/{len(records)}")
+        first_id, last_id = expense_ids[0], expense_ids[-1]
+
+        # 2) N빵 내역도 한 번에
+        share_rows = []
+        for expense_id, r in zip(expense_ids, records):
+            if r["split_ids"]:
+                targets = [{"user_id": uid} for uid in r["split_ids"]]
+            else:
+                targets = participants
+            share_rows.extend(
+                (expense_id, user_id, share)
+                for user_id, share in split_even(r["amount_krw"], targets, expense_id)
+            )
+        if share_rows:
+            cur.executemany("""
+                INSERT INTO expense_participants
+                    (expense_id, user_id, share_amount_krw)
+                VALUES (%s, %s, %s)
+            """, share_rows)
+
+        # 3) 정산 요약
+        ledger.apply_expense_range(cur, trip_id, first_id, last_id, +1)
+
+    conn.commit()
+    return True
+
+
+def import_expenses(conn, trip_id, fileobj, rates, chunk_size=DEFAULT_CHUNK_SIZE,
+                    error_writer=None, max_errors_kept=100):
+    """fileobj(텍스트 모드)의 CSV 를 trip_id 여행의 지출로 가져온다
+
+    rates: 환율 이력 (currency_cache.RateTable, rate_cache.table(conn))
+    error_writer: csv.writer 를 주면 모든 오류 줄을 (줄 번호, 이유) 로 기록
+    """
+    result = ImportResult(max_errors_kept=max_errors_kept)
+
+    with conn.cursor() as cur:
+        members, participants = _load_members(cur, trip_id)
+
+    reader = csv.reader(fileobj)
+    header = next(reader, None)
+    if header is None:
+        result.add_error(1, "빈 파일입니다.", error_writer)
+        return result
+
+    columns = [_HEADER_ALIASES.get(h.strip().lower()) for h in header]
+    if "payer" not in columns or "amount" not in columns:
+        result.add_error(1, "헤더에 payer, amount 열이 필요합니다.", error_writer)
+        return result
+
+    chunk = []
+    for values in reader:
+        line_no = reader.line_num
+        if not any(v.strip() for v in values):
+            continue    # 빈 줄
+        result.rows_read += 1
+
+        row = {col: v for col, v in zip(columns, values) if col}
+        try:
+            chunk.append(_parse_row(row, members, rates))
+        except ValueError as e:
+            result.add_error(line_no, str(e), error_writer)
+            continue
+
+        if len(chunk) >= chunk_size:
+            if not _write_chunk(conn, trip_id, chunk, participants):
+                result.add_error(line_no, _TRIP_DELETED, error_writer)
+                return result
+            result.imported += len(chunk)
+            result.chunks += 1
+            chunk = []
+
+    if chunk:
+        if not _write_chunk(conn, trip_id, chunk, participants):
+            result.add_error(reader.line_num, _TRIP_DELETED, error_writer)
+            return result
+        result.imported += len(chunk)
+        result.chunks += 1
+
+    return result
+
+
+def open_upload(file_storage):
+    """Flask 업로드 파일을 텍스트 스트림으로 (BOM 있는 엑셀 CSV 도 처리)"""
+    return io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig", newline="")
+
+
+def main(argv):
+    args = argv[1:]
+    chunk_size = DEFAULT_CHUNK_SIZE
+    errors_path = None
+    if "--chunk" in args:
+        i = args.index("--chunk")
+        chunk_size = int(args[i + 1])
+        del args[i:i + 2]
+    if "--errors" in args:
+        i = args.index("--errors")
+        errors_path = args[i + 1]
+        del args[i:i + 2]
+
+    if len(args) != 2:
+        print("사용법: python expense_import.py <trip_id> <file.csv> "
+              "[--chunk 1000] [--errors errors.csv]")
+        return 2
+
+    trip_id = int(args[0])
+    path = args[1]
+
+    from app import pool, rate_cache
+    conn = pool.acquire()
+    error_file = open(errors_path, "w", newline="", encoding="utf-8") if errors_path else None
+    try:
+        error_writer = None
+        if error_file:
+            error_writer = csv.writer(error_file)
+            error_writer.writerow(["line", "error"])
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            result = import_expenses(conn, trip_id, f, rate_cache.table(conn),
+                                     chunk_size=chunk_size, error_writer=error_writer)
+    finally:
+        conn.close()
+        if error_file:
+            error_file.close()
+
+    print(f"읽은 줄 {result.rows_read}, 저장 {result.imported}, 오류 {result.error_count} "
+          f"(chunk {result.chunks}번 커밋)")
+    for line_no, message in result.errors[:20]:
+        print(f"  {line_no}번째 줄: {message}")
+    return 1 if result.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,251 @@
+# --------------------------
+# 참가자 변경 후 N빵 다시 나누기
+# --------------------------
+# 참가자를 추가 / 삭제해도 기존 지출의 expense_participants 는 그대로라서
+# 지출을 하나씩 수정(expense_edit)해야 맞춰졌다.
+# resplit_trip 은 여행 1개의 N빵 행 전체를 몇 개의 집합 단위 SQL 로 한 트랜잭션 안에서 다시 계산한다.
+#
+#  1) 더 이상 참가자가 아닌 사람의 N빵 행 삭제
+#  2) 새 참가자 추가: "기존 참가자 전원" 으로 나누던 지출에만 새 참가자 행 추가
+#     (CSV 가져오기에서 일부 인원만 나눈 지출은 그 인원 그대로)
+#  3) N빵 행이 하나도 안 남은 지출은 참가자 전원으로
+#  4) 지출마다 금액을 원 단위 소수 둘째 자리(1전)로 나누고, 나머지 1전들은
+#     largest-remainder 방식으로 나눠 줘서 합계가 amount_krw 와 정확히 같게
+#     (균등 분할이라 나머지 크기는 모두 같으므로 순서는 (순번 + expense_id) 로 돌아가며 정한다
+#      → 매번 같은 사람이 1전을 더 내지 않음)
+#  5) 바뀐 행만 임시 테이블에 모아서 UPDATE 1번 → trip_balances 재계산
+#     (4 ~ 5 는 환율 재계산 후 지출 금액만 바뀐 경우에도 쓴다: reshare_range)
+#
+# 기존 행은 지우지 않고 금액만 고치므로 is_settled / settled_at 은 유지된다.
+# 지출이 많은 여행은 요청 안에서 하지 않고 jobs 작업('resplit')으로 백그라운드에서 처리한다.
+#
+#   python expense_resplit.py <trip_id|all>
+
+import sys
+
+import ledger
+from trip_cache import bump_trip_version
+
+
+# 이제 참가자가 아닌 사람의 N빵 행  (파라미터: trip_id)
+_REMOVE_NON_MEMBERS_SQL = """
+    DELETE ep
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+    LEFT JOIN trip_participants tp
+           ON tp.trip_id = e.trip_id AND tp.user_id = ep.user_id
+    WHERE e.trip_id = %s
+      AND tp.tp_id IS NULL
+"""
+
+# {where}(expenses e 조건) 지출의 새 N빵 금액 중 지금 값과 다른 행 → (ep_id, share)
+_NEW_SHARES_SQL = """
+    SELECT s.ep_id, s.share
+    FROM (
+        SELECT r.ep_id,
+               r.old_share,
+               SIGN(r.cents) * (
+                   (ABS(r.cents) - ABS(r.cents) %% r.n) / r.n
+                   + CASE WHEN (r.k + r.expense_id) %% r.n < ABS(r.cents) %% r.n
+                          THEN 1 ELSE 0 END
+               ) / 100 AS share
+        FROM (
+            SELECT ep.ep_id,
+                   ep.expense_id,
+                   ep.share_amount_krw AS old_share,
+                   ROUND(e.amount_krw * 100) AS cents,
+                   COUNT(*) OVER (PARTITION BY ep.expense_id) AS n,
+                   ROW_NUMBER() OVER (PARTITION BY ep.expense_id
+                                      ORDER BY ep.user_id, ep.ep_id) - 1 AS k
+            FROM expense_participants ep
+            JOIN expenses e ON ep.expense_id = e.expense_id
+            WHERE {where}
+        ) r
+    ) s
+    WHERE s.share <> s.old_share
+"""
+
+
+def _in_list(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def count_trip_expenses(cur, trip_id):
+    cur.execute("""
+        SELECT COUNT(*) AS cnt
+        FROM expenses
+        WHERE trip_id = %s
+    """, (trip_id,))
+    return cur.fetchone()["cnt"]
+
+
+def resplit_trip(cur, trip_id, new_user_ids=()):
+    """여행의 N빵 행을 현재 참가자 기준으로 다시 나누고 trip_balances 도 다시 계산
+
+    new_user_ids: 방금 추가된 참가자 (전원 N빵이던 지출에 포함시킬 사람)
+    반환값: {'removed': n, 'added': n, 'updated': n}
+    """
+    counts = {"removed": 0, "added": 0, "updated": 0}
+
+    # 1) 참가자가 아닌 사람의 N빵 행 삭제
+    cur.execute(_REMOVE_NON_MEMBERS_SQL, (trip_id,))
+    counts["removed"] = cur.rowcount
+
+    # 2) 새 참가자를 "기존 참가자 전원" 지출에 추가
+    new_user_ids = list(new_user_ids)
+    if new_user_ids:
+        placeholders = _in_list(new_user_ids)
+        cur.execute(
+            "INSERT INTO expense_participants (expense_id, user_id, share_amount_krw) "
+            "SELECT f.expense_id, tp.user_id, 0 "
+            "FROM ("
+            "    SELECT ep.expense_id"
+            "    FROM expense_participants ep"
+            "    JOIN expenses e ON ep.expense_id = e.expense_id"
+            "    WHERE e.trip_id = %s"
+            "      AND ep.user_id NOT IN (" + placeholders + ")"
+            "    GROUP BY ep.expense_id"
+            "    HAVING COUNT(DISTINCT ep.user_id) = ("
+            "        SELECT COUNT(*) FROM trip_participants"
+            "        WHERE trip_id = %s AND user_id NOT IN (" + placeholders + ")"
+            "    )"
+            ") f "
+            "JOIN trip_participants tp "
+            "  ON tp.trip_id = %s AND tp.user_id IN (" + placeholders + ") "
+            "WHERE NOT EXISTS ("
+            "    SELECT 1 FROM expense_participants x"
+            "    WHERE x.expense_id = f.expense_id AND x.user_id = tp.user_id"
+            ")",
+            [trip_id, *new_user_ids, trip_id, *new_user_ids, trip_id, *new_user_ids]
+        )
+        counts["added"] += cur.rowcount
+
+    # 3) N빵 행이 없는 지출 → 참가자 전원
+    cur.execute("""
+        INSERT INTO expense_participants (expense_id, user_id, share_amount_krw)
+        SELECT e.expense_id, tp.user_id, 0
+        FROM expenses e
+        JOIN trip_participants tp ON tp.trip_id = e.trip_id
+        WHERE e.trip_id = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM expense_participants x
+              WHERE x.expense_id = e.expense_id
+          )
+    """, (trip_id,))
+    counts["added"] += cur.rowcount
+
+    # 4) ~ 5) 새 금액 계산 후 바뀐 행만 UPDATE
+    counts["updated"] = _reshare(cur, "e.trip_id = %s", (trip_id,))
+
+    # 부담액이 바뀌었으므로 정산 요약도 다시 계산
+    ledger.rebuild_trip(cur, trip_id)
+    return counts
+
+
+def reshare_range(cur, first_id, last_id):
+    """expense_id 가 first_id ~ last_id 인 지출의 N빵 금액을 amount_krw 기준으로 다시 나눈다
+
+    N빵 인원은 그대로, 금액만 (환율 재계산 등으로 amount_krw 가 바뀐 뒤) → 바뀐 행 수
+    trip_balances 는 호출한 쪽에서 맞춘다.
+    """
+    return _reshare(cur, "e.expense_id BETWEEN %s AND %s", (first_id, last_id))
+
+
+def _reshare(cur, where, params):
+    """where(expenses e 조건)에 해당하는 지출의 N빵 금액 다시 나누기 → 바뀐 행 수"""
+    # 1전 단위 정수로 나누고 나머지는 돌아가며 1전씩
+    # MySQL 은 같은 임시 테이블을 한 쿼리에서 두 번 열 수 없으므로 UPDATE 는 COALESCE 로
+    cur.execute("DROP TEMPORARY TABLE IF EXISTS resplit_shares")
+    cur.execute("""
+        CREATE TEMPORARY TABLE resplit_shares (
+            ep_id  INT PRIMARY KEY,
+            share  DECIMAL(12,2) NOT NULL
+        )
+    """)
+    try:
+        cur.execute("INSERT INTO resplit_shares (ep_id, share) "
+                    + _NEW_SHARES_SQL.format(where=where), params)
+        updated = cur.rowcount
+
+        # 바뀐 행만 실제로 값이 바뀐다
+        if updated:
+            cur.execute("""
+                UPDATE expense_participants
+                SET share_amount_krw = COALESCE(
+                    (SELECT s.share FROM resplit_shares s
+                     WHERE s.ep_id = expense_participants.ep_id),
+                    share_amount_krw
+                )
+                WHERE expense_id IN (
+                    SELECT e.expense_id FROM expenses e WHERE """ + where + """
+                )
+            """, params)
+    finally:
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS resplit_shares")
+    return updated
+
+
+# --------------------------
+# 백그라운드 작업 (jobs.py, 지출이 많은 여행)
+# --------------------------
+
+def resplit_job(ctx, payload):
+    """jobs 작업 'resplit': {'trip_id': .., 'new_user_ids': [..]}"""
+    trip_id = payload["trip_id"]
+    conn = ctx.acquire()
+    try:
+        with conn.cursor() as cur:
+            # 상세 페이지 캐시 무효화 (trips.version + 1)
+            # trips 행을 먼저 잠근다 → 그 사이 삭제 표시된 여행이면 정리(trip_purge)에 맡기고 끝
+            if not bump_trip_version(cur, trip_id):
+                conn.rollback()
+                return
+            counts = resplit_trip(cur, trip_id, payload.get("new_user_ids") or [])
+            ctx.progress(counts["updated"], message=f"삭제 {counts['removed']} / 추가 {counts['added']}",
+                         cur=cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def merge_resplit_payload(old, new):
+    """아직 실행 전인 같은 여행 작업에 새 참가자를 합친다"""
+    users = set((old or {}).get("new_user_ids") or []) | set(new.get("new_user_ids") or [])
+    return {"trip_id": new["trip_id"], "new_user_ids": sorted(users)}
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("사용법: python expense_resplit.py <trip_id|all>")
+        return 2
+
+    from app import pool
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            if argv[1] == "all":
+                cur.execute("SELECT trip_id FROM trips ORDER BY trip_id")
+                trip_ids = [r["trip_id"] for r in cur.fetchall()]
+            else:
+                trip_ids = [int(argv[1])]
+            for trip_id in trip_ids:
+                # trips 행을 먼저 잠그고, 삭제 표시된 여행은 건너뛴다
+                if not bump_trip_version(cur, trip_id):
+                    conn.rollback()
+                    print(f"trip {trip_id}: 없거나 삭제된 여행")
+                    continue
+                counts = resplit_trip(cur, trip_id)
+                # 여행마다 커밋 (트랜잭션을 짧게)
+                conn.commit()
+                print(f"trip {trip_id}: 삭제 {counts['removed']} / 추가 {counts['added']} "
+                      f"/ 금액 변경 {counts['updated']}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,89 @@
+# --------------------------
+# N빵 내역(expense_participants) 저장
+# --------------------------
+# 참가자 수만큼 INSERT 를 하나씩 보내지 않고
+#  - 새 지출: 여러 행을 VALUES (...), (...), ... 한 문장으로 INSERT
+#  - 지출 수정: 기존 행과 비교해서 바뀐 것만 UPDATE / 빠진 사람만 DELETE / 새 사람만 INSERT
+#    (전부 지우고 다시 넣지 않으므로 is_settled 같은 값도 유지되고 binlog / 락도 줄어든다)
+#
+# 금액은 1전 단위 정수로 나누므로 (money.py) N빵 합계가 항상 지출 금액과 같다.
+
+from money import Money, from_minor, split, to_minor
+
+
+def split_even(amount_krw, participants, offset=0):
+    """참가자 수로 균등 분배 → [(user_id, share), ...]  (share 는 Decimal, 합계 = amount_krw)
+
+    나머지 1전은 user_id 순서 + offset(expense_id) 로 돌아가며 준다 (expense_resplit 의 SQL 과 같은 결과)
+    """
+    if not participants:
+        return []
+    if isinstance(amount_krw, Money):
+        total = amount_krw.minor
+    else:
+        total = to_minor((amount_krw,))[0]
+    user_ids = sorted(p['user_id'] for p in participants)
+    shares = split(total, len(user_ids), offset)
+    return [(user_id, from_minor(share)) for user_id, share in zip(user_ids, shares)]
+
+
+def insert_shares(cur, expense_id, shares):
+    """shares: [(user_id, share), ...] 를 한 번에 INSERT"""
+    if not shares:
+        return
+    # pymysql 의 executemany 는 INSERT ... VALUES 를 여러 행짜리 한 문장으로 합쳐서 보낸다
+    cur.executemany("""
+        INSERT INTO expense_participants
+            (expense_id, user_id, share_amount_krw)
+        VALUES (%s, %s, %s)
+    """, [(expense_id, user_id, share) for user_id, share in shares])
+
+
+def sync_shares(cur, expense_id, shares):
+    """기존 N빵 내역을 shares 와 같아지도록 바뀐 부분만 고친다"""
+    cur.execute("""
+        SELECT ep_id, user_id, share_amount_krw
+        FROM expense_participants
+        WHERE expense_id = %s
+        ORDER BY ep_id
+    """, (expense_id,))
+    rows = cur.fetchall()
+
+    wanted = dict(shares)
+    existing = {}
+    to_delete = []
+    for r in rows:
+        if r['user_id'] in existing or r['user_id'] not in wanted:
+            # 더 이상 포함되지 않는 사람 (또는 같은 사람이 중복으로 들어간 행)
+            to_delete.append(r['ep_id'])
+        else:
+            existing[r['user_id']] = r
+
+    to_update = []
+    for user_id, r in existing.items():
+        old, new = to_minor((r['share_amount_krw'], wanted[user_id]))
+        if old != new:
+            to_update.append((r['ep_id'], wanted[user_id]))
+
+    to_insert = [(user_id, share) for user_id, share in shares if user_id not in existing]
+
+    if to_delete:
+        placeholders = ", ".join(["%s"] * len(to_delete))
+        cur.execute(
+            "DELETE FROM expense_participants WHERE ep_id IN (" + placeholders + ")",
+            to_delete
+        )
+
+    if to_update:
+        # 바뀐 행 여러 개를 CASE 로 한 문장에
+        cases = " ".join(["WHEN %s THEN %s"] * len(to_update))
+        placeholders = ", ".join(["%s"] * len(to_update))
+        params = [v for pair in to_update for v in pair] + [ep_id for ep_id, _ in to_update]
+        cur.execute(
+            "UPDATE expense_participants "
+            "SET share_amount_krw = CASE ep_id " + cases + " END "
+            "WHERE ep_id IN (" + placeholders + ")",
+            params
+        )
+
+    insert_shares(cur, expense_id, to_insert)
@@ -0,0 +1,475 @@
+# --------------------------
+# 대용량 테스트 데이터 생성기
+# --------------------------
+# insert_sample_data.sql 은 여행 1개 / 유저 3명뿐이라 성능 확인에는 쓸 수 없다.
+# 유저 / 여행 / 참가자 / Day / 액티비티 / 지출(여러 통화) / N빵 / 송금 / 정산 요약을
+# 원하는 양만큼 만든다. 같은 --seed 면 항상 같은 데이터가 나온다.
+#
+# 출력 형식 (--format)
+#   tsv : 테이블마다 <table>.tsv + load.sql (LOAD DATA LOCAL INFILE, 가장 빠름)
+#           mysql --local-infile=1 travelmate < out/load.sql
+#   sql : 여러 행 INSERT 를 --batch 행씩 묶은 data.sql (MySQL / sqlite3 둘 다 실행 가능)
+#   db  : app.py 의 저장소(MySQL 또는 SQLite)에 바로 INSERT (--batch 행마다 커밋)
+#
+# tsv / sql 은 id 를 직접 넣는다 (기본 1000번부터).
+# schema.sql + insert_sample_data.sql 을 실행한 DB 를 기준으로 하므로
+# (currency 환율이 있어야 하고, 샘플 데이터 id 와 겹치지 않게) 다른 데이터가 있으면
+# --start-id 를 그보다 크게 준다. db 는 현재 MAX(id) 다음부터 쓴다.
+#
+# 예) N빵 약 1,000만 행: 여행 10만 개 × 지출 평균 25건 × 참가자 평균 4명
+#   python generate_data.py --users 200000 --trips 100000 --expenses 10-40 --out out/
+#
+# 파일은 테이블별로 한 줄씩 바로 쓰므로 양이 많아도 메모리는 여행 1개 분량만 쓴다.
+
+import argparse
+import datetime
+import os
+import random
+import sys
+from dataclasses import dataclass
+
+from money import split
+
+# 적재 순서 (FK 가 가리키는 쪽이 먼저) 와 열 목록
+TABLES = [
+    ("users", ("user_id", "name", "email")),
+    ("trips", ("trip_id", "title", "start_date", "end_date", "total_budget_krw", "created_by")),
+    ("trip_participants", ("tp_id", "trip_id", "user_id", "role")),
+    ("destinations", ("destination_id", "trip_id", "day_no", "country_name", "city_name", "note")),
+    ("activities", ("activity_id", "destination_id", "name", "category", "start_time",
+                    "end_time", "cost", "currency_code", "cost_krw", "memo")),
+    ("expenses", ("expense_id", "trip_id", "paid_by_user_id", "amount", "currency_code",
+                  "amount_krw", "category", "payment_method", "paid_at", "memo")),
+    ("expense_participants", ("ep_id", "expense_id", "user_id", "share_amount_krw", "is_settled")),
+    ("settlement_transactions", ("id", "trip_id", "payer_name", "receiver_name", "amount",
+                                 "is_done", "done_at")),
+    ("trip_balances", ("trip_id", "user_id", "total_paid", "total_share",
+                       "settled_out", "settled_in")),
+    ("trip_expense_rollups", ("trip_id", "paid_day", "category", "expense_count", "total_krw")),
+]
+
+# id 열 (trip_balances / trip_expense_rollups 는 복합 키라 없음)
+_ID_COLUMNS = {table: cols[0] for table, cols in TABLES
+               if table not in ("trip_balances", "trip_expense_rollups")}
+
+# (국가, 도시, 통화) — 통화는 insert_sample_data.sql 의 currency 와 같아야 한다
+PLACES = [
+    ("Japan", "Fukuoka", "JPY"), ("Japan", "Osaka", "JPY"), ("Japan", "Tokyo", "JPY"),
+    ("USA", "New York", "USD"), ("France", "Paris", "EUR"), ("Italy", "Rome", "EUR"),
+    ("China", "Shanghai", "CNY"), ("Hong Kong", "Hong Kong", "HKD"),
+    ("Taiwan", "Taipei", "TWD"), ("Thailand", "Bangkok", "THB"),
+    ("Vietnam", "Hanoi", "VND"), ("Singapore", "Singapore", "SGD"),
+    ("Korea", "Jeju", "KRW"),
+]
+
+# insert_sample_data.sql 의 환율 (db 형식은 DB 의 currency 테이블 값을 쓴다)
+DEFAULT_RATES = {
+    "KRW": 1.0, "JPY": 9.42, "USD": 1468.0, "EUR": 1711.0, "CNY": 208.0,
+    "HKD": 189.0, "TWD": 47.1, "THB": 38.0, "VND": 0.055, "SGD": 1130.0,
+}
+
+# 지출 1건 금액 범위 (원화 기준, 실제 통화 금액은 환율로 나눠서 만든다)
+_AMOUNT_KRW_RANGE = (5000, 300000)
+EXPENSE_CATEGORIES = ["food", "transport", "shopping", "tour", "sightseeing", "hotel", "cafe"]
+ACTIVITY_CATEGORIES = ["tour", "sightseeing", "shopping", "food", "rest"]
+PAYMENT_METHODS = ["card", "cash", "card", "card"]
+
+
+@dataclass
+class Spec:
+    users: int = 1000
+    trips: int = 100
+    participants: dict = None        # {인원: 가중치}
+    days: tuple = (3, 7)
+    activities: tuple = (0, 4)       # Day 마다
+    expenses: tuple = (10, 40)       # 여행마다
+    local_currency_ratio: float = 0.7
+    partial_split_ratio: float = 0.2    # 일부 인원만 N빵하는 지출 비율
+    settlements: tuple = (0, 2)      # 여행마다 완료된 송금 수
+    seed: int = 42
+
+
+def parse_range(text):
+    """'3-7' → (3, 7), '5' → (5, 5)"""
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        lo, hi = int(lo), int(hi)
+    else:
+        lo = hi = int(text)
+    if lo < 0 or hi < lo:
+        raise argparse.ArgumentTypeError(f"잘못된 범위: {text}")
+    return (lo, hi)
+
+
+def parse_distribution(text):
+    """'2:20,3:30,4:25' → {2: 20, 3: 30, 4: 25}"""
+    dist = {}
+    for part in text.split(","):
+        size, weight = part.split(":")
+        if int(size) < 1:
+            raise argparse.ArgumentTypeError("참가자 수는 1명 이상")
+        dist[int(size)] = float(weight)
+    return dist
+
+
+def _cents(value):
+    """원 단위 금액(센트 정수) → 'DECIMAL(…,2)' 문자열"""
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    return f"{sign}{value // 100}.{value % 100:02d}"
+
+
+# --------------------------
+# 생성
+# --------------------------
+
+class Generator:
+
+    def __init__(self, spec, sink, rates=None, start_ids=None):
+        self.spec = spec
+        self.sink = sink
+        self.rng = random.Random(spec.seed)
+        self.rates = rates or DEFAULT_RATES
+        self.places = [p for p in PLACES if p[2] in self.rates]
+        self.next_id = {table: (start_ids or {}).get(table, 1) for table in _ID_COLUMNS}
+
+        dist = spec.participants or {2: 20, 3: 30, 4: 25, 5: 15, 6: 7, 8: 3}
+        self._sizes = list(dist)
+        self._weights = [dist[s] for s in self._sizes]
+        self.user_ids = []
+        self.counts = {table: 0 for table, _ in TABLES}
+
+    def _id(self, table):
+        value = self.next_id[table]
+        self.next_id[table] += 1
+        return value
+
+    def _emit(self, table, row):
+        self.sink.add(table, row)
+        self.counts[table] += 1
+
+    def run(self):
+        for _ in range(self.spec.users):
+            user_id = self._id("users")
+            self.user_ids.append(user_id)
+            self._emit("users", (user_id, f"user{user_id}", f"user{user_id}@example.com"))
+
+        for n in range(self.spec.trips):
+            self._trip(n)
+
+        self.sink.close()
+        return self.counts
+
+    def _trip(self, n):
+        rng = self.rng
+        spec = self.spec
+        trip_id = self._id("trips")
+
+        # 1) 여행 + 참가자
+        size = rng.choices(self._sizes, self._weights)[0]
+        members = rng.sample(self.user_ids, min(size, len(self.user_ids)))
+        days = rng.randint(*spec.days)
+        country, city, local = rng.choice(self.places)
+
+        if rng.random() < 0.01:
+            start = None    # 출발일 미정 여행도 조금 (목록 정렬의 NULL 처리 확인용)
+        else:
+            start = datetime.date(2023, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 4))
+        end = start + datetime.timedelta(days=max(days - 1, 0)) if start else None
+
+        self._emit("trips", (trip_id, f"{city} {days}일 여행 #{n + 1}",
+                             start, end, rng.randint(5, 50) * 100000, members[0]))
+        for i, user_id in enumerate(members):
+            self._emit("trip_participants",
+                       (self._id("trip_participants"), trip_id, user_id,
+                        "owner" if i == 0 else "member"))
+
+        # 2) Day / 액티비티
+        rate = self.rates[local]
+        for day in range(1, days + 1):
+            destination_id = self._id("destinations")
+            self._emit("destinations", (destination_id, trip_id, day, country, city, None))
+            for a in range(rng.randint(*spec.activities)):
+                cost_krw = rng.randint(5, 300) * 100
+                hour = 9 + a * 2
+                self._emit("activities", (
+                    self._id("activities"), destination_id, f"activity {day}-{a + 1}",
+                    rng.choice(ACTIVITY_CATEGORIES),
+                    f"{hour:02d}:00:00", f"{hour + 1:02d}:30:00",
+                    _cents(round(cost_krw / rate * 100)), local,
+                    _cents(cost_krw * 100), None,
+                ))
+
+        # 3) 지출 + N빵 (금액은 센트 정수로 계산해서 합계가 정확히 맞게)
+        paid = {u: 0 for u in members}
+        share = {u: 0 for u in members}
+        rollups = {}     # (결제일, 카테고리) -> [건수, 센트]
+        for _ in range(rng.randint(*spec.expenses)):
+            code = local if rng.random() < spec.local_currency_ratio else "KRW"
+            code_rate = self.rates[code]
+            target_krw = rng.randint(*_AMOUNT_KRW_RANGE)
+            amount = max(round(target_krw / code_rate, 2), 0.01)
+            amount_cents = round(amount * 100)
+            krw_cents = round(amount * code_rate * 100)
+
+            payer = rng.choice(members)
+            if len(members) > 1 and rng.random() < spec.partial_split_ratio:
+                targets = rng.sample(members, rng.randint(1, len(members) - 1))
+            else:
+                targets = members
+
+            day_offset = rng.randrange(days)
+            base = start or datetime.date(2025, 1, 1)
+            paid_at = datetime.datetime.combine(
+                base + datetime.timedelta(days=day_offset),
+                datetime.time(rng.randint(7, 23), rng.randrange(60)),
+            )
+
+            expense_id = self._id("expenses")
+            category = rng.choice(EXPENSE_CATEGORIES)
+            self._emit("expenses", (
+                expense_id, trip_id, payer, _cents(amount_cents), code, _cents(krw_cents),
+                category, rng.choice(PAYMENT_METHODS), paid_at, None,
+            ))
+            paid[payer] += krw_cents
+            rollup = rollups.setdefault((paid_at.date(), category), [0, 0])
+            rollup[0] += 1
+            rollup[1] += krw_cents
+
+            # app 의 split_even 과 같이 1전 단위로 나누고 나머지는 user_id 순서 + expense_id 로
+            for user_id, cents in zip(sorted(targets), split(krw_cents, len(targets), expense_id)):
+                self._emit("expense_participants",
+                           (self._id("expense_participants"), expense_id, user_id,
+                            _cents(cents), 0))
+                share[user_id] += cents
+
+        # 4) 완료된 송금 (이름으로 저장되므로 user{id})
+        s_out = {u: 0 for u in members}
+        s_in = {u: 0 for u in members}
+        if len(members) > 1:
+            for _ in range(rng.randint(*spec.settlements)):
+                sender, receiver = rng.sample(members, 2)
+                amount = rng.randint(1, 100) * 1000
+                done_at = datetime.datetime.combine(
+                    (end or datetime.date(2025, 1, 1)), datetime.time(21, 0))
+                self._emit("settlement_transactions", (
+                    self._id("settlement_transactions"), trip_id,
+                    f"user{sender}", f"user{receiver}", amount, 1, done_at,
+                ))
+                s_out[sender] += amount * 100
+                s_in[receiver] += amount * 100
+
+        # 5) 정산 요약 (ledger.rebuild_trip 결과와 같은 값)
+        for user_id in members:
+            if paid[user_id] or share[user_id] or s_out[user_id] or s_in[user_id]:
+                self._emit("trip_balances", (
+                    trip_id, user_id, _cents(paid[user_id]), _cents(share[user_id]),
+                    _cents(s_out[user_id]), _cents(s_in[user_id]),
+                ))
+
+        # 6) 결제일 × 카테고리 지출 합계 (ledger.rebuild_trip 결과와 같은 값)
+        for (paid_day, category), (count, cents) in sorted(rollups.items()):
+            self._emit("trip_expense_rollups", (trip_id, paid_day, category, count, _cents(cents)))
+
+
+# --------------------------
+# 출력
+# --------------------------
+
+def _tsv_value(value):
+    if value is None:
+        return "\\N"
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    return text
+
+
+def _sql_value(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class TsvSink:
+    """LOAD DATA INFILE 기본 형식 (탭 구분, NULL 은 \\N)"""
+
+    def __init__(self, out_dir):
+        self.out_dir = os.path.abspath(out_dir)
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._files = {
+            table: open(os.path.join(self.out_dir, f"{table}.tsv"), "w",
+                        encoding="utf-8", newline="\n", buffering=1024 * 1024)
+            for table, _ in TABLES
+        }
+
+    def add(self, table, row):
+        self._files[table].write("\t".join([_tsv_value(v) for v in row]) + "\n")
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+        lines = [
+            "-- generate_data.py 가 만든 파일 적재",
+            "-- mysql --local-infile=1 travelmate < load.sql",
+            "SET foreign_key_checks = 0;",
+            "SET unique_checks = 0;",
+        ]
+        for table, columns in TABLES:
+            path = os.path.join(self.out_dir, f"{table}.tsv").replace("\\", "/")
+            lines.append(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} "
+                         f"CHARACTER SET utf8mb4 ({', '.join(columns)});")
+        lines += [
+            "SET unique_checks = 1;",
+            "SET foreign_key_checks = 1;",
+        ]
+        lines += [f"ANALYZE TABLE {table};" for table, _ in TABLES]
+        with open(os.path.join(self.out_dir, "load.sql"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class SqlSink:
+    """여러 행 INSERT 를 batch 행씩 묶은 data.sql"""
+
+    def __init__(self, out_dir, batch=1000):
+        os.makedirs(out_dir, exist_ok=True)
+        self.batch = batch
+        self._file = open(os.path.join(out_dir, "data.sql"), "w",
+                          encoding="utf-8", buffering=1024 * 1024)
+        self._rows = {table: [] for table, _ in TABLES}
+        self._pending = 0
+        self._file.write("-- generate_data.py 가 만든 데이터\n")
+
+    def add(self, table, row):
+        self._rows[table].append("(" + ", ".join(_sql_value(v) for v in row) + ")")
+        self._pending += 1
+        if self._pending >= self.batch:
+            self._flush()
+
+    def _flush(self):
+        # FK 순서대로 (참가자보다 여행이 먼저 들어가게)
+        for table, columns in TABLES:
+            rows = self._rows[table]
+            if rows:
+                self._file.write(f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n"
+                                 + ",\n".join(rows) + ";\n")
+                rows.clear()
+        self._pending = 0
+
+    def close(self):
+        self._flush()
+        self._file.close()
+
+
+class DbSink:
+    """app.py 저장소에 바로 INSERT (batch 행마다 executemany + 커밋)"""
+
+    def __init__(self, conn, batch=1000):
+        self.conn = conn
+        self.batch = batch
+        self._rows = {table: [] for table, _ in TABLES}
+        self._pending = 0
+
+    def add(self, table, row):
+        self._rows[table].append(row)
+        self._pending += 1
+        if self._pending >= self.batch:
+            self._flush()
+
+    def _flush(self):
+        with self.conn.cursor() as cur:
+            for table, columns in TABLES:
+                rows = self._rows[table]
+                if rows:
+                    placeholders = ", ".join(["%s"] * len(columns))
+                    cur.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                        rows
+                    )
+                    rows.clear()
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self._flush()
+
+
+def db_start_ids(conn):
+    """현재 테이블들의 MAX(id) + 1"""
+    start = {}
+    with conn.cursor() as cur:
+        for table, column in _ID_COLUMNS.items():
+            cur.execute(f"SELECT MAX({column}) AS max_id FROM {table}")
+            row = cur.fetchone()
+            start[table] = (row["max_id"] or 0) + 1
+    return start
+
+
+def db_rates(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT currency_code, rate_to_krw FROM currency")
+        return {r["currency_code"]: float(r["rate_to_krw"]) for r in cur.fetchall()}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="대용량 테스트 데이터 생성")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--trips", type=int, default=100)
+    parser.add_argument("--participants", type=parse_distribution,
+                        default="2:20,3:30,4:25,5:15,6:7,8:3",
+                        help="여행당 참가자 수 분포 '인원:가중치,...'")
+    parser.add_argument("--days", type=parse_range, default="3-7", help="여행 일수 범위")
+    parser.add_argument("--activities", type=parse_range, default="0-4", help="Day 당 액티비티 수")
+    parser.add_argument("--expenses", type=parse_range, default="10-40", help="여행당 지출 수")
+    parser.add_argument("--settlements", type=parse_range, default="0-2", help="여행당 완료 송금 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=("tsv", "sql", "db"), default="tsv")
+    parser.add_argument("--out", default="generated", help="tsv / sql 출력 폴더")
+    parser.add_argument("--batch", type=int, default=1000, help="sql / db: 한 번에 넣을 행 수")
+    parser.add_argument("--start-id", type=int, default=1000, help="tsv / sql: 모든 테이블의 첫 id")
+    args = parser.parse_args(argv[1:])
+
+    if args.users < max(args.participants):
+        parser.error("--users 는 최대 참가자 수보다 많아야 합니다")
+
+    spec = Spec(
+        users=args.users, trips=args.trips, participants=args.participants,
+        days=args.days, activities=args.activities, expenses=args.expenses,
+        settlements=args.settlements, seed=args.seed,
+    )
+
+    started = datetime.datetime.now()
+    conn = None
+    if args.format == "db":
+        from app import pool
+        conn = pool.acquire()
+        sink = DbSink(conn, batch=args.batch)
+        rates = db_rates(conn)
+        start_ids = db_start_ids(conn)
+    else:
+        sink = TsvSink(args.out) if args.format == "tsv" else SqlSink(args.out, batch=args.batch)
+        rates = DEFAULT_RATES
+        start_ids = {table: args.start_id for table in _ID_COLUMNS}
+
+    try:
+        counts = Generator(spec, sink, rates=rates, start_ids=start_ids).run()
+    finally:
+        if conn is not None:
+            conn.close()
+
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    for table, _ in TABLES:
+        print(f"  {table:<24} {counts[table]:>12,}")
+    print(f"{sum(counts.values()):,}행 생성 ({elapsed:.1f}초, seed={args.seed})")
+    if args.format == "tsv":
+        print(f"적재: mysql --local-infile=1 travelmate < {os.path.join(args.out, 'load.sql')}")
+    elif args.format == "sql":
+        print(f"적재: mysql travelmate < {os.path.join(args.out, 'data.sql')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
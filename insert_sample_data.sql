@@ -19,6 +19,11 @@ VALUES
     ('VND', 'Vietnam Dong', 0.055),
     ('SGD', 'Singapore Dollar', 1130);
 
+-- 환율 이력의 첫 기록 = 기준 환율 (이후 currency_rates.py set 으로 바꾸기 전 날짜에 적용)
+INSERT INTO currency_rates (currency_code, effective_at, rate, updated_at)
+SELECT currency_code, '1000-01-01 00:00:00', rate_to_krw, CURRENT_TIMESTAMP
+FROM currency;
+
 
 -- 여행 1개 (규슈 3박4일)
 INSERT INTO trips (title, start_date, end_date, total_budget_krw, created_by)
@@ -80,3 +85,28 @@ VALUES
     (3, 1, 6066, 0),
     (3, 2, 6066, 0),
     (3, 3, 6066, 0);
+
+-- 정산 요약 (trip_balances) 초기값
+-- 위에서 직접 넣은 지출/N빵 기준으로 계산 (이후에는 app.py 가 자동 갱신)
+-- 이미 데이터가 있는 DB라면: python ledger.py rebuild
+INSERT INTO trip_balances (trip_id, user_id, total_paid, total_share)
+SELECT x.trip_id, x.user_id, SUM(x.paid), SUM(x.share)
+FROM (
+    SELECT trip_id, paid_by_user_id AS user_id, amount_krw AS paid, 0 AS share
+    FROM expenses
+    UNION ALL
+    SELECT e.trip_id, ep.user_id, 0, ep.share_amount_krw
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+) x
+GROUP BY x.trip_id, x.user_id;
+
+-- 여행 × 결제일 × 카테고리 지출 합계 (trip_expense_rollups) 초기값 (이후에는 ledger.py 가 자동 갱신)
+INSERT INTO trip_expense_rollups (trip_id, paid_day, category, expense_count, total_krw)
+SELECT trip_id,
+       COALESCE(DATE(paid_at), '1000-01-01'),
+       COALESCE(category, ''),
+       COUNT(*),
+       SUM(amount_krw)
+FROM expenses
+GROUP BY trip_id, COALESCE(DATE(paid_at), '1000-01-01'), COALESCE(category, '');
@@ -0,0 +1,514 @@
+# --------------------------
+# 백그라운드 작업 (jobs 테이블 + 스레드 풀)
+# --------------------------
+# 여행 삭제 정리, 큰 여행의 N빵 재계산처럼 요청 안에서 하기엔 무거운 일을
+# jobs 테이블에 기록해 두고 같은 프로세스의 스레드 풀이 꺼내서 실행한다. (외부 브로커 없음)
+#
+#  - enqueue(cur, kind, key, payload) : 라우트의 트랜잭션 안에서 작업 등록
+#      → 커밋되어야 작업이 보이므로 "데이터는 바뀌었는데 작업은 없는" 상태가 안 생긴다
+#      → 커밋 후 wake() 를 부르면 바로 시작 (안 불러도 poll_interval 안에 시작)
+#  - job_key 는 UNIQUE: 같은 키로 다시 등록하면 새 행을 만들지 않고 기존 행을 다시 queued 로
+#      (payload 는 등록할 때 준 merge 함수로 합침)
+#      실행 중이면 행은 running 그대로 두고 rerun 만 표시 → 끝난 뒤 queued 로 되돌려 한 번 더 실행
+#      (running 을 queued 로 바꾸면 heartbeat 가 멈추고 다른 프로세스가 같은 작업을 동시에 꺼내 간다)
+#  - 같은 키의 작업은 동시에 두 개 실행하지 않는다
+#  - 실패하면 max_attempts 까지 점점 늦게 다시 시도, 그래도 안 되면 failed
+#  - 실행 중인 작업은 heartbeat 스레드가 lease/4 초마다 updated_at 을 갱신한다.
+#    lease 초 넘게 갱신이 없는 running 작업(그 프로세스가 죽음)만 다른 프로세스가 queued 로 되돌린다
+#    (시각 비교는 모두 DB 의 NOW() 기준 — 앱 서버와 DB 의 시간대가 달라도 어긋나지 않게)
+#    → 여러 프로세스가 떠 있어도 살아 있는 쪽이 실행 중인 작업을 다시 실행하지 않는다
+#    (그래도 작업 함수는 여러 번 실행돼도 결과가 같아야 한다)
+#  - register(..., every=초) 로 등록한 작업은 주기 작업: job_key = kind 로 하나만 두고,
+#    끝나면(실패해도) done 대신 every 초 뒤로 run_after 를 잡아 다시 queued 로
+#
+#   python jobs.py list [status]   # 최근 작업 목록
+#   python jobs.py run             # 대기 중인 작업을 지금 이 프로세스에서 모두 실행
+#   python jobs.py retry <job_id>  # failed 작업 다시 queued 로
+
+import datetime
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RETRY_DELAYS = (10, 60, 300)   # 실패 후 다시 시도하기까지 기다리는 시간(초)
+DEFAULT_LEASE = 120            # 이 시간(초) 동안 heartbeat 가 없는 running 작업은 주인이 죽은 것으로 본다
+
+log = logging.getLogger("travelmate.jobs")
+
+_COLUMNS = """
+    job_id, kind, job_key, payload, status, progress, total, message, error,
+    attempts, max_attempts, run_after, created_at, started_at, updated_at, finished_at
+"""
+
+# 실행할 차례인 작업 후보 (idx_jobs_status(status, job_id) 로 정렬 없이)
+_CLAIM_SQL = """
+    SELECT """ + _COLUMNS + """
+    FROM jobs
+    WHERE status = 'queued'
+      AND (run_after IS NULL OR run_after <= NOW())
+    ORDER BY job_id
+    LIMIT 20
+"""
+
+
+def _replace(old, new):
+    return new
+
+
+class JobContext:
+    """작업 함수에 넘기는 값 (커넥션 빌리기 / 진행 상황 기록)"""
+
+    def __init__(self, runner, job):
+        self.job_id = job["job_id"]
+        self.key = job["job_key"]
+        self.attempt = job["attempts"]
+        self.acquire = runner.acquire
+
+    def progress(self, done, total=None, message=None, cur=None):
+        """진행 상황 기록 (done 은 누적값)
+
+        cur 를 주면 작업의 트랜잭션 안에서 같이 커밋되고,
+        없으면 커넥션을 따로 빌려서 바로 커밋한다 (커넥션을 쥔 채로 부르지 말 것)
+        """
+        params = (done, total, message and message[:255], self.job_id)
+        sql = """
+            UPDATE jobs
+            SET progress = %s,
+                total = COALESCE(%s, total),
+                message = COALESCE(%s, message),
+                updated_at = NOW()
+            WHERE job_id = %s
+        """
+        if cur is not None:
+            cur.execute(sql, params)
+            return
+        conn = self.acquire()
+        try:
+            with conn.cursor() as c:
+                c.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class JobRunner:
+
+    def __init__(self, acquire, workers=2, poll_interval=5.0, max_attempts=3, lease=DEFAULT_LEASE):
+        self.acquire = acquire          # pool.acquire
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self._handlers = {}             # kind -> (func, merge)
+        self._periodic = {}             # kind -> 실행 간격(초)
+        self._lock = threading.Lock()
+        self._running = {}              # 이 프로세스에서 실행 중인 job_key -> job_id (고르는 중이면 None)
+        self._slots = threading.Semaphore(workers)
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._dispatcher = None
+        self._heartbeat = None
+
+    def register(self, kind, func, merge=None, every=None):
+        """kind 작업을 func(ctx, payload) 로 실행
+
+        merge(old_payload, new_payload): 같은 키의 작업이 아직 안 끝났을 때 다시 등록되면
+                                         payload 를 어떻게 합칠지 (기본: 새 값)
+        every: 주기 작업이면 실행 간격(초) — 시작할 때 대기열에 없으면 넣고, 끝날 때마다 다시 예약
+        """
+        self._handlers[kind] = (func, merge or _replace)
+        if every:
+            self._periodic[kind] = every
+
+    # ---- 등록 ----
+
+    def enqueue(self, cur, kind, key, payload=None):
+        """작업 등록 (호출한 쪽 트랜잭션 안에서) → job_id"""
+        if kind not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 종류: {kind}")
+        cur.execute("""
+            INSERT IGNORE INTO jobs (kind, job_key, payload, status, max_attempts, created_at, updated_at)
+            VALUES (%s, %s, %s, 'queued', %s, NOW(), NOW())
+        """, (kind, key, json.dumps(payload), self.max_attempts))
+        if cur.rowcount == 1:
+            return cur.lastrowid
+
+        # 같은 키가 이미 있음 → 다시 queued 로
+        # 아직 실행 전 / 실행 중인 작업의 payload 만 합친다 (끝난 작업의 것은 버림)
+        cur.execute("""
+            SELECT job_id, status, payload
+            FROM jobs
+            WHERE job_key = %s
+        """, (key,))
+        row = cur.fetchone()
+        merged = payload
+        if row["status"] in ("queued", "running"):
+            merged = self._handlers[kind][1](_loads(row["payload"]), payload)
+
+        # 실행 중이면 행은 running 그대로 두고 rerun 만 표시 → 끝나면 run_job 이 queued 로 되돌린다
+        # (status 는 UPDATE 시점의 값으로 한 문장에서 판단, MySQL 은 SET 을 왼쪽부터 적용하므로 맨 뒤에)
+        cur.execute("""
+            UPDATE jobs
+            SET payload = %s,
+                rerun = CASE WHEN status = 'running' THEN 1 ELSE 0 END,
+                attempts = CASE WHEN status = 'running' THEN attempts ELSE 0 END,
+                error = CASE WHEN status = 'running' THEN error ELSE NULL END,
+                run_after = CASE WHEN status = 'running' THEN run_after ELSE NULL END,
+                finished_at = CASE WHEN status = 'running' THEN finished_at ELSE NULL END,
+                updated_at = NOW(),
+                status = CASE WHEN status = 'running' THEN 'running' ELSE 'queued' END
+            WHERE job_id = %s
+        """, (json.dumps(merged), row["job_id"]))
+        return row["job_id"]
+
+    def wake(self):
+        """커밋 직후 호출하면 poll_interval 을 기다리지 않고 바로 시작"""
+        self._wakeup.set()
+
+    # ---- 실행 ----
+
+    def start(self):
+        """처음 한 번만 스레드 풀 + 작업을 나눠 주는 스레드 시작"""
+        with self._lock:
+            if self._dispatcher is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="job")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                name="job-dispatcher", daemon=True)
+            self._dispatcher.start()
+        self._start_heartbeat()
+
+    def _dispatch_loop(self):
+        recovered = False
+        while True:
+            # 시작할 때의 recover() 는 성공할 때까지 매 주기 다시 (DB 가 아직 준비 안 됐을 수 있음)
+            try:
+                if recovered:
+                    self.requeue_stale()
+                else:
+                    self.recover()
+                    recovered = True
+            except Exception:
+                log.exception("멈춘 작업 복구 / 주기 작업 예약 실패 (다음 주기에 다시)")
+            try:
+                self._dispatch()
+            except Exception:
+                log.exception("작업 분배 실패 (다음 주기에 다시)")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch(self):
+        """빈 worker 수만큼 queued 작업을 running 으로 바꿔서 스레드 풀에 넘긴다"""
+        while self._slots.acquire(blocking=False):
+            submitted = False
+            try:
+                job = self._claim()
+                if job is None:
+                    return
+                self._executor.submit(self._run_slot, job)
+                submitted = True
+            finally:
+                # 고르다가 / 넘기다가 실패해도 자리는 돌려준다
+                if not submitted:
+                    self._slots.release()
+
+    def _run_slot(self, job):
+        try:
+            self.run_job(job)
+        except Exception:
+            # 작업 함수의 예외는 run_job 이 기록한다 → 여기는 결과 기록 자체가 실패한 경우
+            # (running 으로 남은 행은 lease 가 지나면 다시 queued)
+            log.exception("작업 #%s 결과 기록 실패", job["job_id"])
+        finally:
+            with self._lock:
+                self._running.pop(job["job_key"], None)
+            self._slots.release()
+            self.wake()
+
+    # ---- heartbeat / 복구 ----
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop,
+                                               name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.lease / 4)
+            try:
+                self.beat()
+            except Exception:
+                log.exception("작업 heartbeat 기록 실패")
+
+    def beat(self):
+        """이 프로세스에서 실행 중인 작업의 updated_at 갱신 (아직 살아 있음)"""
+        with self._lock:
+            job_ids = [job_id for job_id in self._running.values() if job_id is not None]
+        if not job_ids:
+            return
+        self._update("""
+            UPDATE jobs
+            SET updated_at = NOW()
+            WHERE status = 'running'
+              AND job_id IN (""" + ", ".join(["%s"] * len(job_ids)) + """)
+        """, job_ids)
+
+    def requeue_stale(self):
+        """lease 초 넘게 heartbeat 가 없는 running 작업(프로세스가 죽음)을 queued 로 → 되돌린 수"""
+        conn = self.acquire()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE jobs
+                    SET status = 'queued', rerun = 0, updated_at = NOW()
+                    WHERE status = 'running'
+                      AND updated_at < NOW() - INTERVAL %s SECOND
+                """, (self.lease,))
+                recovered = cur.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return recovered
+
+    def recover(self):
+        """멈춘 작업을 queued 로 + 주기 작업 예약 (시작할 때, 성공할 때까지)"""
+        recovered = self.requeue_stale()
+        conn = self.acquire()
+        try:
+            with conn.cursor() as cur:
+                # 이미 예약되어 있으면 그 시각(run_after)을 그대로 둔다
+                for kind in self._periodic:
+                    cur.execute("""
+                        SELECT status
+                        FROM jobs
+                        WHERE job_key = %s
+                    """, (kind,))
+                    row = cur.fetchone()
+                    if row is None or row["status"] not in ("queued", "running"):
+                        self.enqueue(cur, kind, kind)
+            conn.commit()
+        finally:
+            conn.close()
+        return recovered
+
+    def _claim(self):
+        """실행할 작업 1개를 running 으로 바꾸고 돌려준다 (없으면 None)"""
+        conn = self.acquire()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(_CLAIM_SQL)
+                candidates = cur.fetchall()
+
+                for job in candidates:
+                    with self._lock:
+                        if job["job_key"] in self._running:
+                            continue    # 같은 키가 아직 실행 중 → 끝난 뒤에
+                        self._running[job["job_key"]] = None
+
+                    try:
+                        cur.execute("""
+                            UPDATE jobs
+                            SET status = 'running',
+                                attempts = attempts + 1,
+                                started_at = NOW(),
+                                updated_at = NOW()
+                            WHERE job_id = %s
+                              AND status = 'queued'
+                        """, (job["job_id"],))
+                        claimed = cur.rowcount == 1
+                        if claimed:
+                            conn.commit()
+                    except Exception:
+                        with self._lock:
+                            self._running.pop(job["job_key"], None)
+                        raise
+
+                    with self._lock:
+                        if claimed:
+                            self._running[job["job_key"]] = job["job_id"]
+                        else:
+                            self._running.pop(job["job_key"], None)
+                    if claimed:
+                        job["attempts"] += 1
+                        return job
+            conn.commit()
+            return None
+        finally:
+            conn.close()
+
+    def run_job(self, job):
+        """running 으로 바뀐 작업 1개 실행 → 결과 status"""
+        handler = self._handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"등록되지 않은 작업 종류: {job['kind']}")
+            handler[0](JobContext(self, job), _loads(job["payload"]))
+        except Exception as e:
+            return self._finish_failed(job, e)
+
+        if job["kind"] in self._periodic:
+            self._reschedule(job, None)
+            return "done"
+
+        # 실행 중에 같은 키로 다시 등록됐으면 (rerun = 1) done 대신 queued 로 → 한 번 더 실행
+        # (rerun = 0 은 맨 뒤에: MySQL 은 SET 을 왼쪽부터 적용한다)
+        self._update("""
+            UPDATE jobs
+            SET status = CASE WHEN rerun = 1 THEN 'queued' ELSE 'done' END,
+                attempts = CASE WHEN rerun = 1 THEN 0 ELSE attempts END,
+                finished_at = CASE WHEN rerun = 1 THEN NULL ELSE NOW() END,
+                error = NULL,
+                updated_at = NOW(),
+                rerun = 0
+            WHERE job_id = %s
+              AND status = 'running'
+        """, (job["job_id"],))
+        return "done"
+
+    def _finish_failed(self, job, error):
+        message = f"{type(error).__name__}: {error}"[:255]
+        if job["attempts"] < job["max_attempts"]:
+            delay = RETRY_DELAYS[min(job["attempts"], len(RETRY_DELAYS)) - 1]
+            self._update("""
+                UPDATE jobs
+                SET status = 'queued', error = %s, run_after = NOW() + INTERVAL %s SECOND,
+                    updated_at = NOW(), rerun = 0
+                WHERE job_id = %s
+                  AND status = 'running'
+            """, (message, delay, job["job_id"]))
+            return "retry"
+
+        if job["kind"] in self._periodic:
+            # 주기 작업은 failed 로 멈추지 않고 다음 주기에 다시
+            self._reschedule(job, message)
+            return "failed"
+
+        # 실행 중에 다시 등록됐으면 새 요청이므로 처음부터 다시 시도
+        self._update("""
+            UPDATE jobs
+            SET status = CASE WHEN rerun = 1 THEN 'queued' ELSE 'failed' END,
+                attempts = CASE WHEN rerun = 1 THEN 0 ELSE attempts END,
+                finished_at = CASE WHEN rerun = 1 THEN NULL ELSE NOW() END,
+                error = %s,
+                updated_at = NOW(),
+                rerun = 0
+            WHERE job_id = %s
+              AND status = 'running'
+        """, (message, job["job_id"]))
+        return "failed"
+
+    def _reschedule(self, job, error):
+        """주기 작업: 다음 실행 시각으로 다시 queued (실행 중에 다시 등록됐으면 바로)"""
+        self._update("""
+            UPDATE jobs
+            SET status = 'queued', error = %s, attempts = 0,
+                run_after = CASE WHEN rerun = 1 THEN NULL ELSE NOW() + INTERVAL %s SECOND END,
+                finished_at = NOW(), updated_at = NOW(), rerun = 0
+            WHERE job_id = %s
+              AND status = 'running'
+        """, (error, self._periodic[job["kind"]], job["job_id"]))
+
+    def _update(self, sql, params):
+        conn = self.acquire()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def run_pending(self):
+        """대기 중인 작업을 지금 스레드에서 차례로 실행 (CLI 용) → {status: 개수}"""
+        results = {}
+        self._start_heartbeat()
+        while True:
+            job = self._claim()
+            if job is None:
+                return results
+            try:
+                status = self.run_job(job)
+            finally:
+                with self._lock:
+                    self._running.pop(job["job_key"], None)
+            results[status] = results.get(status, 0) + 1
+
+    # ---- 조회 ----
+
+    def get(self, cur, job_id):
+        cur.execute("SELECT " + _COLUMNS + " FROM jobs WHERE job_id = %s", (job_id,))
+        return _public(cur.fetchone())
+
+    def recent(self, cur, status=None, limit=50):
+        if status:
+            cur.execute("SELECT " + _COLUMNS + " FROM jobs WHERE status = %s "
+                        "ORDER BY job_id DESC LIMIT %s", (status, limit))
+        else:
+            cur.execute("SELECT " + _COLUMNS + " FROM jobs ORDER BY job_id DESC LIMIT %s",
+                        (limit,))
+        return [_public(r) for r in cur.fetchall()]
+
+
+def _loads(text):
+    return json.loads(text) if text else None
+
+
+def _public(row):
+    """JSON 으로 돌려줄 모양 (payload 는 dict 로, 날짜는 문자열로)"""
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = _loads(job["payload"])
+    for key in ("run_after", "created_at", "started_at", "updated_at", "finished_at"):
+        if isinstance(job[key], datetime.datetime):
+            job[key] = job[key].isoformat(sep=" ")
+    return job
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("list", "run", "retry"):
+        print("사용법: python jobs.py list [status] | run | retry <job_id>")
+        return 2
+
+    from app import pool, job_runner
+    command = argv[1]
+
+    if command == "run":
+        # 서버가 같이 돌고 있을 수 있으므로 running 작업은 건드리지 않고 queued 만
+        results = job_runner.run_pending()
+        print(", ".join(f"{k} {v}" for k, v in sorted(results.items())) or "대기 중인 작업 없음")
+        return 1 if results.get("failed") else 0
+
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            if command == "retry":
+                cur.execute("""
+                    UPDATE jobs
+                    SET status = 'queued', attempts = 0, error = NULL, run_after = NULL,
+                        finished_at = NULL, updated_at = NOW()
+                    WHERE job_id = %s
+                      AND status = 'failed'
+                """, (int(argv[2]),))
+                conn.commit()
+                print("다시 대기열에 넣었습니다" if cur.rowcount else "failed 상태인 작업이 아닙니다")
+                return 0
+
+            for job in job_runner.recent(cur, argv[2] if len(argv) > 2 else None):
+                done = f"{job['progress']}/{job['total']}" if job["total"] else str(job["progress"])
+                print(f"#{job['job_id']:<6} {job['status']:<8} {job['kind']:<12} {job['job_key']:<30} "
+                      f"진행 {done:<12} 시도 {job['attempts']}/{job['max_attempts']} "
+                      f"{job['error'] or job['message'] or ''}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,341 @@
+# --------------------------
+# 여행별 정산 요약 (trip_balances)
+# --------------------------
+# trip_detail 에서 매번 expenses / expense_participants 전체를 GROUP BY 하지 않도록
+# 사람별 합계(결제액, 부담액, 보낸 송금, 받은 송금)를 trip_balances 에 미리 쌓아 둔다.
+#
+# 지출/송금을 저장하는 라우트가 같은 트랜잭션 안에서 아래 함수를 호출한다.
+#  - apply_expense(cur, expense_id, +1)  : 지출 INSERT 후 (N빵 행까지 넣은 다음)
+#  - apply_expense(cur, expense_id, -1)  : 지출 수정/삭제 전 (기존 값 빼기)
+#  - apply_expense_range(...)            : 여러 지출을 한 번에 넣은 뒤 (CSV 가져오기)
+#  - apply_expense_id_range(...)         : 여러 여행에 걸친 expense_id 구간 (환율 재계산 전후)
+#  - apply_settlement(...)               : 송금 완료 기록 후
+#  - rebuild_trip(cur, trip_id)          : 여러 행이 한꺼번에 지워질 때 (참가자 삭제 등)
+#
+# 금액은 DB에 저장된 DECIMAL 값을 INSERT ... SELECT 로 그대로 더하고 빼기 때문에
+# 파이썬 float 반올림 오차가 섞이지 않는다.
+#
+# 지출 함수들은 여행 × 결제일 × 카테고리 합계(trip_expense_rollups)도 같이 더하고 뺀다.
+# (여러 여행을 한 화면에 모아 보는 /dashboard 용, trip_rollups.py)
+# 결제일이 없으면 paid_day = '1000-01-01', 카테고리가 없으면 '' (기본 키라서 NULL 대신)
+#
+# 정합성 확인 / 재계산:
+#   python ledger.py verify [trip_id]
+#   python ledger.py rebuild [trip_id]
+
+import sys
+
+from trip_cache import bump_trip_version
+
+
+# 여행 1개의 합계를 원본 테이블에서 처음부터 계산하는 쿼리
+# (rebuild / verify 공용, 파라미터는 trip_id 4번)
+_RECOMPUTE_SQL = """
+    SELECT x.user_id,
+           SUM(x.paid)  AS total_paid,
+           SUM(x.share) AS total_share,
+           SUM(x.s_out) AS settled_out,
+           SUM(x.s_in)  AS settled_in
+    FROM (
+        SELECT paid_by_user_id AS user_id,
+               amount_krw AS paid, 0 AS share, 0 AS s_out, 0 AS s_in
+        FROM expenses
+        WHERE trip_id = %s
+
+        UNION ALL
+
+        SELECT ep.user_id, 0, ep.share_amount_krw, 0, 0
+        FROM expense_participants ep
+        JOIN expenses e ON ep.expense_id = e.expense_id
+        WHERE e.trip_id = %s
+
+        UNION ALL
+
+        SELECT u.user_id, 0, 0, st.amount, 0
+        FROM settlement_transactions st
+        JOIN trip_participants tp ON tp.trip_id = st.trip_id
+        JOIN users u ON u.user_id = tp.user_id AND u.name = st.payer_name
+        WHERE st.trip_id = %s AND st.is_done = 1
+
+        UNION ALL
+
+        SELECT u.user_id, 0, 0, 0, st.amount
+        FROM settlement_transactions st
+        JOIN trip_participants tp ON tp.trip_id = st.trip_id
+        JOIN users u ON u.user_id = tp.user_id AND u.name = st.receiver_name
+        WHERE st.trip_id = %s AND st.is_done = 1
+    ) x
+    GROUP BY x.user_id
+"""
+
+_COLUMNS = ("total_paid", "total_share", "settled_out", "settled_in")
+
+UNDATED_DAY = "1000-01-01"
+
+# expenses 에서 {where} 에 맞는 지출을 (여행, 결제일, 카테고리) 별로 더하기(%s = 1) / 빼기(-1)
+# 파라미터: sign, sign, where 의 파라미터
+_ROLLUP_SQL = """
+    INSERT INTO trip_expense_rollups (trip_id, paid_day, category, expense_count, total_krw)
+    SELECT trip_id,
+           COALESCE(DATE(paid_at), '""" + UNDATED_DAY + """'),
+           COALESCE(category, ''),
+           %s * COUNT(*),
+           %s * SUM(amount_krw)
+    FROM expenses
+    WHERE {where}
+    GROUP BY trip_id, COALESCE(DATE(paid_at), '""" + UNDATED_DAY + """'), COALESCE(category, '')
+    ON DUPLICATE KEY UPDATE expense_count = expense_count + VALUES(expense_count),
+                            total_krw = total_krw + VALUES(total_krw)
+"""
+
+
+# 지출 1건의 결제자 total_paid / N빵 참여자 total_share  (파라미터: sign, expense_id)
+_PAID_SQL = """
+    INSERT INTO trip_balances (trip_id, user_id, total_paid)
+    SELECT trip_id, paid_by_user_id, %s * amount_krw
+    FROM expenses
+    WHERE expense_id = %s
+    ON DUPLICATE KEY UPDATE total_paid = total_paid + VALUES(total_paid)
+"""
+
+_SHARE_SQL = """
+    INSERT INTO trip_balances (trip_id, user_id, total_share)
+    SELECT e.trip_id, ep.user_id, %s * ep.share_amount_krw
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+    WHERE ep.expense_id = %s
+    ON DUPLICATE KEY UPDATE total_share = total_share + VALUES(total_share)
+"""
+
+# 송금 1건을 이름이 같은 참가자의 {column}(settled_out / settled_in) 에  (파라미터: amount, trip_id, name)
+_SETTLED_SQL = """
+    INSERT INTO trip_balances (trip_id, user_id, {column})
+    SELECT tp.trip_id, u.user_id, %s
+    FROM trip_participants tp
+    JOIN users u ON tp.user_id = u.user_id
+    WHERE tp.trip_id = %s AND u.name = %s
+    ON DUPLICATE KEY UPDATE {column} = {column} + VALUES({column})
+"""
+
+
+def _apply_rollup(cur, where, params, sign):
+    cur.execute(_ROLLUP_SQL.format(where=where), (sign, sign, *params))
+
+
+def apply_expense(cur, expense_id, sign=1):
+    """지출 1건(결제액 + N빵 부담액)을 trip_balances 에 더하거나(sign=1) 뺀다(sign=-1)"""
+    # 1) 결제자 total_paid
+    cur.execute(_PAID_SQL, (sign, expense_id))
+
+    # 2) N빵 참여자 total_share
+    cur.execute(_SHARE_SQL, (sign, expense_id))
+
+    # 3) 여행 × 결제일 × 카테고리 합계
+    _apply_rollup(cur, "expense_id = %s", (expense_id,), sign)
+
+
+def apply_expense_range(cur, trip_id, first_id, last_id, sign=1):
+    """expense_id 가 first_id ~ last_id 인 지출 묶음을 한 번에 반영 (CSV 가져오기 등)"""
+    cur.execute("""
+        INSERT INTO trip_balances (trip_id, user_id, total_paid)
+        SELECT trip_id, paid_by_user_id, %s * SUM(amount_krw)
+        FROM expenses
+        WHERE trip_id = %s
+          AND expense_id BETWEEN %s AND %s
+        GROUP BY trip_id, paid_by_user_id
+        ON DUPLICATE KEY UPDATE total_paid = total_paid + VALUES(total_paid)
+    """, (sign, trip_id, first_id, last_id))
+
+    cur.execute("""
+        INSERT INTO trip_balances (trip_id, user_id, total_share)
+        SELECT e.trip_id, ep.user_id, %s * SUM(ep.share_amount_krw)
+        FROM expense_participants ep
+        JOIN expenses e ON ep.expense_id = e.expense_id
+        WHERE e.trip_id = %s
+          AND e.expense_id BETWEEN %s AND %s
+        GROUP BY e.trip_id, ep.user_id
+        ON DUPLICATE KEY UPDATE total_share = total_share + VALUES(total_share)
+    """, (sign, trip_id, first_id, last_id))
+
+    _apply_rollup(cur, "trip_id = %s AND expense_id BETWEEN %s AND %s",
+                  (trip_id, first_id, last_id), sign)
+
+
+def apply_expense_id_range(cur, first_id, last_id, sign=1):
+    """expense_id 가 first_id ~ last_id 인 지출을 여행 구분 없이 한 번에 반영 (환율 재계산)"""
+    cur.execute("""
+        INSERT INTO trip_balances (trip_id, user_id, total_paid)
+        SELECT trip_id, paid_by_user_id, %s * SUM(amount_krw)
+        FROM expenses
+        WHERE expense_id BETWEEN %s AND %s
+        GROUP BY trip_id, paid_by_user_id
+        ON DUPLICATE KEY UPDATE total_paid = total_paid + VALUES(total_paid)
+    """, (sign, first_id, last_id))
+
+    cur.execute("""
+        INSERT INTO trip_balances (trip_id, user_id, total_share)
+        SELECT e.trip_id, ep.user_id, %s * SUM(ep.share_amount_krw)
+        FROM expense_participants ep
+        JOIN expenses e ON ep.expense_id = e.expense_id
+        WHERE e.expense_id BETWEEN %s AND %s
+        GROUP BY e.trip_id, ep.user_id
+        ON DUPLICATE KEY UPDATE total_share = total_share + VALUES(total_share)
+    """, (sign, first_id, last_id))
+
+    _apply_rollup(cur, "expense_id BETWEEN %s AND %s", (first_id, last_id), sign)
+
+
+def apply_settlement(cur, trip_id, payer_name, receiver_name, amount):
+    """완료된 송금 1건을 보낸 사람 settled_out / 받은 사람 settled_in 에 반영"""
+    # settlement_transactions 는 이름으로 저장되어 있으므로
+    # 이 여행 참가자 중 같은 이름인 사람에게 반영한다
+    cur.execute(_SETTLED_SQL.format(column="settled_out"), (amount, trip_id, payer_name))
+
+    cur.execute(_SETTLED_SQL.format(column="settled_in"), (amount, trip_id, receiver_name))
+
+
+def rebuild_trip(cur, trip_id):
+    """여행 1개의 trip_balances / trip_expense_rollups 를 원본 테이블에서 다시 계산"""
+    cur.execute("""
+        DELETE FROM trip_balances
+        WHERE trip_id = %s
+    """, (trip_id,))
+
+    cur.execute(
+        "INSERT INTO trip_balances "
+        "(trip_id, user_id, total_paid, total_share, settled_out, settled_in) "
+        "SELECT %s, r.user_id, r.total_paid, r.total_share, r.settled_out, r.settled_in "
+        "FROM (" + _RECOMPUTE_SQL + ") r",
+        (trip_id, trip_id, trip_id, trip_id, trip_id)
+    )
+
+    cur.execute("""
+        DELETE FROM trip_expense_rollups
+        WHERE trip_id = %s
+    """, (trip_id,))
+    _apply_rollup(cur, "trip_id = %s", (trip_id,), 1)
+
+
+def verify_trip(cur, trip_id):
+    """저장된 값과 새로 계산한 값이 다른 사람 목록을 돌려준다 (빈 리스트면 정상)"""
+    cur.execute(_RECOMPUTE_SQL, (trip_id, trip_id, trip_id, trip_id))
+    expected = {r["user_id"]: r for r in cur.fetchall()}
+
+    cur.execute("""
+        SELECT user_id, total_paid, total_share, settled_out, settled_in
+        FROM trip_balances
+        WHERE trip_id = %s
+    """, (trip_id,))
+    stored = {r["user_id"]: r for r in cur.fetchall()}
+
+    drift = []
+    for user_id in sorted(set(expected) | set(stored)):
+        exp = expected.get(user_id) or {}
+        got = stored.get(user_id) or {}
+        for col in _COLUMNS:
+            want = exp.get(col) or 0
+            have = got.get(col) or 0
+            # 원 단위 소수 둘째 자리까지 비교 (SQLite 는 합계가 float 라 끝자리 오차가 생김)
+            if round(float(want), 2) != round(float(have), 2):
+                drift.append({
+                    "trip_id": trip_id,
+                    "user_id": user_id,
+                    "column": col,
+                    "expected": want,
+                    "stored": have,
+                })
+    return drift
+
+
+def verify_trip_rollups(cur, trip_id):
+    """trip_expense_rollups 중 새로 계산한 값과 다른 (결제일, 카테고리) 목록 (빈 리스트면 정상)
+
+    정리 작업 전이라 expense_count 가 0 으로 남은 행은 없는 것과 같게 본다
+    """
+    cur.execute("""
+        SELECT COALESCE(DATE(paid_at), '""" + UNDATED_DAY + """') AS paid_day,
+               COALESCE(category, '') AS category,
+               COUNT(*) AS expense_count,
+               SUM(amount_krw) AS total_krw
+        FROM expenses
+        WHERE trip_id = %s
+        GROUP BY COALESCE(DATE(paid_at), '""" + UNDATED_DAY + """'), COALESCE(category, '')
+    """, (trip_id,))
+    expected = {(str(r["paid_day"]), r["category"]): r for r in cur.fetchall()}
+
+    cur.execute("""
+        SELECT paid_day, category, expense_count, total_krw
+        FROM trip_expense_rollups
+        WHERE trip_id = %s
+    """, (trip_id,))
+    stored = {(str(r["paid_day"]), r["category"]): r for r in cur.fetchall()}
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        exp = expected.get(key) or {}
+        got = stored.get(key) or {}
+        for col in ("expense_count", "total_krw"):
+            want = exp.get(col) or 0
+            have = got.get(col) or 0
+            if round(float(want), 2) != round(float(have), 2):
+                drift.append({
+                    "trip_id": trip_id,
+                    "paid_day": key[0],
+                    "category": key[1],
+                    "column": col,
+                    "expected": want,
+                    "stored": have,
+                })
+    return drift
+
+
+def _trip_ids(cur, trip_id=None):
+    if trip_id is not None:
+        return [trip_id]
+    cur.execute("SELECT trip_id FROM trips ORDER BY trip_id")
+    return [r["trip_id"] for r in cur.fetchall()]
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("verify", "rebuild"):
+        print("사용법: python ledger.py verify|rebuild [trip_id]")
+        return 2
+
+    command = argv[1]
+    trip_id = int(argv[2]) if len(argv) > 2 else None
+
+    from app import pool
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            trip_ids = _trip_ids(cur, trip_id)
+            total_drift = 0
+
+            for tid in trip_ids:
+                drift = verify_trip(cur, tid)
+                total_drift += len(drift)
+                for d in drift:
+                    print(f"[drift] trip={d['trip_id']} user={d['user_id']} "
+                          f"{d['column']}: stored={d['stored']} expected={d['expected']}")
+
+                rollup_drift = verify_trip_rollups(cur, tid)
+                total_drift += len(rollup_drift)
+                for d in rollup_drift:
+                    print(f"[drift] trip={d['trip_id']} day={d['paid_day']} category={d['category']!r} "
+                          f"{d['column']}: stored={d['stored']} expected={d['expected']}")
+
+                if command == "rebuild":
+                    rebuild_trip(cur, tid)
+                    bump_trip_version(cur, tid)
+                    # 여행마다 바로 커밋 (큰 DB에서도 트랜잭션을 짧게)
+                    conn.commit()
+
+        print(f"{len(trip_ids)}개 여행 확인, 불일치 {total_drift}건"
+              + (" → 재계산 완료" if command == "rebuild" else ""))
+        return 1 if (command == "verify" and total_drift) else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
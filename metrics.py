@@ -0,0 +1,138 @@
+# --------------------------
+# 요청별 DB / 렌더링 시간 측정
+# --------------------------
+# 라우트 코드는 그대로 두고
+#  - 커서(db_pool.TracedCursor)가 execute / fetch 시간을 알려 주면 RequestStats 에 쌓고
+#  - Flask 템플릿 시그널로 렌더링 시간을 잰다.
+# 요청이 끝나면
+#  - Server-Timing 헤더 (브라우저 개발자 도구 Network → Timing 에 표시)
+#  - /metrics (Prometheus 텍스트 형식, 라우트별 응답 시간 히스토그램) 에 반영한다.
+
+import threading
+
+# 응답 시간 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _one_line(sql, limit=120):
+    """여러 줄 SQL → 공백 하나로 이은 한 줄 (길면 자름)"""
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class RequestStats:
+    """요청 1개 동안의 DB / 템플릿 시간"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slowest_sql = None
+        self.slowest_time = 0.0
+        self.render_time = 0.0
+
+    def add(self, kind, sql, seconds):
+        self.db_time += seconds
+        if kind == "fetch":
+            return
+        self.query_count += 1
+        if seconds >= self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_sql = sql
+
+    def server_timing(self, total):
+        """Server-Timing 헤더 값 (시간 단위는 ms)"""
+        parts = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'render;dur={self.render_time * 1000:.1f}',
+        ]
+        if self.slowest_sql:
+            # 헤더에는 ASCII 만, 따옴표/역슬래시는 빼고
+            desc = _one_line(self.slowest_sql, 80)
+            desc = desc.encode("ascii", "replace").decode("ascii")
+            desc = desc.replace("\\", "").replace('"', "'")
+            parts.append(f'db-slowest;dur={self.slowest_time * 1000:.1f};desc="{desc}"')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ", ".join(parts)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """라우트(endpoint)별 누적 값 → Prometheus 텍스트"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._latency = {}     # (endpoint, method) -> [bucket counts..., sum, count]
+        self._requests = {}    # (endpoint, method, status) -> count
+        self._db = {}          # endpoint -> [queries, db seconds, render seconds]
+
+    def observe(self, endpoint, method, status, seconds, stats=None):
+        with self._lock:
+            key = (endpoint, method)
+            hist = self._latency.get(key)
+            if hist is None:
+                hist = self._latency[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+            rkey = (endpoint, method, status)
+            self._requests[rkey] = self._requests.get(rkey, 0) + 1
+
+            if stats is not None:
+                db = self._db.setdefault(endpoint, [0, 0.0, 0.0])
+                db[0] += stats.query_count
+                db[1] += stats.db_time
+                db[2] += stats.render_time
+
+    def render(self, gauges=None):
+        """gauges: {(이름, 설명): 값} — 커넥션 풀 상태처럼 요청 시점의 값"""
+        lines = []
+        with self._lock:
+            name = "travelmate_request_duration_seconds"
+            lines.append(f"# HELP {name} 요청 처리 시간")
+            lines.append(f"# TYPE {name} histogram")
+            for (endpoint, method), hist in sorted(self._latency.items()):
+                base = [("endpoint", endpoint), ("method", method)]
+                for i, upper in enumerate(self.buckets):
+                    lines.append(f"{name}_bucket{_labels(base + [('le', repr(upper))])} {hist[i]}")
+                lines.append(f"{name}_bucket{_labels(base + [('le', '+Inf')])} {hist[-1]}")
+                lines.append(f"{name}_sum{_labels(base)} {hist[-2]:.6f}")
+                lines.append(f"{name}_count{_labels(base)} {hist[-1]}")
+
+            name = "travelmate_requests_total"
+            lines.append(f"# HELP {name} 응답 코드별 요청 수")
+            lines.append(f"# TYPE {name} counter")
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                labels = _labels([("endpoint", endpoint), ("method", method), ("status", status)])
+                lines.append(f"{name}{labels} {count}")
+
+            for index, name, help_text in (
+                (0, "travelmate_db_queries_total", "실행한 쿼리 수"),
+                (1, "travelmate_db_seconds_total", "DB 에서 보낸 시간 (execute + fetch)"),
+                (2, "travelmate_template_render_seconds_total", "템플릿 렌더링 시간"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for endpoint, values in sorted(self._db.items()):
+                    value = values[index]
+                    value = f"{value:.6f}" if isinstance(value, float) else value
+                    lines.append(f"{name}{_labels([('endpoint', endpoint)])} {value}")
+
+        for (name, help_text), value in (gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
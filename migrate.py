@@ -0,0 +1,106 @@
+# --------------------------
+# DB 마이그레이션
+# --------------------------
+# migrations/ 폴더의 NNN_이름.sql 파일을 번호 순서대로 한 번씩만 실행한다.
+# 실행한 파일은 schema_migrations 테이블에 기록된다.
+# (schema.sql 로 새로 만든 DB는 이미 최신이라 기록만 되어 있음)
+#
+#   python migrate.py          # 아직 안 한 migration 실행
+#   python migrate.py status   # 적용 여부만 보기
+
+import os
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def migration_files():
+    """[(version, path), ...]  파일 이름 순서 = 적용 순서"""
+    files = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith(".sql"):
+            files.append((filename[:-4], os.path.join(MIGRATIONS_DIR, filename)))
+    return files
+
+
+def split_statements(sql):
+    """';' 로 끝나는 줄을 기준으로 SQL 문 나누기 (-- 주석 줄은 버림)"""
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip().rstrip(";")
+            if statement:
+                statements.append(statement)
+            current = []
+
+    rest = "\n".join(current).strip()
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version      VARCHAR(100) PRIMARY KEY,
+            applied_at   DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {r["version"] for r in cur.fetchall()}
+
+
+def migrate(conn, dry_run=False):
+    with conn.cursor() as cur:
+        done = applied_versions(cur)
+        pending = [(v, p) for v, p in migration_files() if v not in done]
+
+        for version, path in migration_files():
+            mark = "적용됨" if version in done else "대기"
+            print(f"  [{mark}] {version}")
+
+        if dry_run:
+            return pending
+
+        for version, path in pending:
+            print(f"→ {version} 실행 중...")
+            with open(path, encoding="utf-8") as f:
+                statements = split_statements(f.read())
+
+            # MySQL 은 DDL 마다 자동 커밋되므로 파일 단위로 기록만 남긴다
+            for statement in statements:
+                cur.execute(statement)
+            cur.execute("""
+                INSERT INTO schema_migrations (version)
+                VALUES (%s)
+            """, (version,))
+            conn.commit()
+
+    return pending
+
+
+def main(argv):
+    from app import backend, pool
+    conn = pool.acquire()
+    try:
+        dry_run = len(argv) > 1 and argv[1] == "status"
+        if backend.name != "mysql":
+            # migrations/*.sql 은 MySQL 문법 → SQLite 는 schema_sqlite.sql 로 새로 만든다
+            print(f"{backend.name} 저장소는 migration 을 실행하지 않습니다 (상태만 표시)")
+            dry_run = True
+        pending = migrate(conn, dry_run=dry_run)
+        if dry_run:
+            print(f"대기 중인 migration {len(pending)}개")
+        else:
+            print(f"migration {len(pending)}개 적용 완료")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,47 @@
+-- 정산 요약 테이블 (ledger.py)
+-- 이 테이블이 생기기 전에 만든 DB용: 테이블을 만들고 기존 데이터로 채운다.
+
+CREATE TABLE trip_balances (
+    trip_id       INT NOT NULL,
+    user_id       INT NOT NULL,
+    total_paid    DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_share   DECIMAL(14,2) NOT NULL DEFAULT 0,
+    settled_out   DECIMAL(14,2) NOT NULL DEFAULT 0,
+    settled_in    DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (trip_id, user_id),
+    CONSTRAINT fk_tb_trip
+        FOREIGN KEY (trip_id) REFERENCES trips(trip_id),
+    CONSTRAINT fk_tb_user
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+INSERT INTO trip_balances (trip_id, user_id, total_paid, total_share, settled_out, settled_in)
+SELECT x.trip_id, x.user_id, SUM(x.paid), SUM(x.share), SUM(x.s_out), SUM(x.s_in)
+FROM (
+    SELECT trip_id, paid_by_user_id AS user_id,
+           amount_krw AS paid, 0 AS share, 0 AS s_out, 0 AS s_in
+    FROM expenses
+
+    UNION ALL
+
+    SELECT e.trip_id, ep.user_id, 0, ep.share_amount_krw, 0, 0
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+
+    UNION ALL
+
+    SELECT st.trip_id, u.user_id, 0, 0, st.amount, 0
+    FROM settlement_transactions st
+    JOIN trip_participants tp ON tp.trip_id = st.trip_id
+    JOIN users u ON u.user_id = tp.user_id AND u.name = st.payer_name
+    WHERE st.is_done = 1
+
+    UNION ALL
+
+    SELECT st.trip_id, u.user_id, 0, 0, 0, st.amount
+    FROM settlement_transactions st
+    JOIN trip_participants tp ON tp.trip_id = st.trip_id
+    JOIN users u ON u.user_id = tp.user_id AND u.name = st.receiver_name
+    WHERE st.is_done = 1
+) x
+GROUP BY x.trip_id, x.user_id;
@@ -0,0 +1,38 @@
+-- app.py 쿼리용 보조 인덱스
+-- FK 때문에 자동으로 생긴 인덱스 중 새 인덱스의 앞부분과 겹치는 것은 같이 정리한다
+-- (새 인덱스가 FK 검사에도 쓰이므로 제약 조건은 그대로 유지됨)
+
+-- 여행 목록: ORDER BY start_date
+ALTER TABLE trips
+    ADD INDEX idx_trips_start (start_date);
+
+-- 여행 상세 Day 목록: WHERE trip_id ORDER BY day_no
+ALTER TABLE destinations
+    ADD INDEX idx_dest_trip_day (trip_id, day_no),
+    DROP INDEX fk_dest_trip;
+
+-- 액티비티: destination_id 로 찾고 start_time 순서
+ALTER TABLE activities
+    ADD INDEX idx_act_dest_start (destination_id, start_time),
+    DROP INDEX fk_act_dest;
+
+-- 지출 목록: WHERE trip_id ORDER BY paid_at
+-- 결제자별 합계 / 참가자 삭제: WHERE trip_id [AND paid_by_user_id] (amount_krw 까지 커버)
+ALTER TABLE expenses
+    ADD INDEX idx_exp_trip_paid (trip_id, paid_at),
+    ADD INDEX idx_exp_trip_payer (trip_id, paid_by_user_id, amount_krw),
+    DROP INDEX fk_exp_trip;
+
+-- N빵 내역: expense_id 로 찾고 user_id / 부담액까지 인덱스에서 바로 읽기
+ALTER TABLE expense_participants
+    ADD INDEX idx_ep_exp_user (expense_id, user_id, share_amount_krw),
+    DROP INDEX fk_ep_exp;
+
+-- 완료된 송금: WHERE trip_id AND is_done = 1
+ALTER TABLE settlement_transactions
+    ADD INDEX idx_st_trip_done (trip_id, is_done),
+    DROP INDEX trip_id;
+
+-- 참가자 추가: 같은 이름의 user 찾기
+ALTER TABLE users
+    ADD INDEX idx_users_name (name);
@@ -0,0 +1,4 @@
+-- 여행 목록 제목 검색 (title LIKE '앞부분%')
+-- 출발일 정렬/범위는 002 의 idx_trips_start (start_date [+ trip_id]) 를 그대로 사용
+ALTER TABLE trips
+    ADD INDEX idx_trips_title (title);
@@ -0,0 +1,4 @@
+-- 여행 상세 페이지 ETag / HTML 캐시용 버전 번호
+-- 여행에 속한 데이터를 바꾸는 라우트가 같은 트랜잭션에서 1씩 올린다 (trip_cache.py)
+ALTER TABLE trips
+    ADD COLUMN version INT NOT NULL DEFAULT 0;
@@ -0,0 +1,19 @@
+-- 여행 삭제를 "숨김 표시 + 백그라운드 정리" 로 (trip_purge.py)
+-- deleted_at 이 있는 여행은 목록 / 상세에서 바로 안 보이고,
+-- 딸린 행들은 작은 트랜잭션으로 나눠서 지운 뒤 마지막에 trips 행을 지운다.
+ALTER TABLE trips
+    ADD COLUMN deleted_at DATETIME NULL;
+
+-- 정리 진행 상황 (서버가 중간에 죽어도 status 가 done 이 아니면 다시 이어서 진행)
+CREATE TABLE trip_purges (
+    trip_id        INT PRIMARY KEY,
+    status         VARCHAR(10) NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    step           VARCHAR(30),                              -- 지금 지우고 있는 테이블
+    rows_deleted   INT NOT NULL DEFAULT 0,
+    batches        INT NOT NULL DEFAULT 0,
+    error          VARCHAR(255),
+    requested_at   DATETIME NOT NULL,
+    updated_at     DATETIME,
+    finished_at    DATETIME,
+    INDEX idx_purge_status (status)
+);
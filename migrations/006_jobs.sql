@@ -0,0 +1,33 @@
+-- 백그라운드 작업 (jobs.py)
+-- 라우트가 트랜잭션 안에서 등록하고, 앱 안의 스레드 풀이 꺼내서 실행한다.
+CREATE TABLE jobs (
+    job_id         INT AUTO_INCREMENT PRIMARY KEY,
+    kind           VARCHAR(50) NOT NULL,                     -- trip_purge / resplit ...
+    job_key        VARCHAR(150) NOT NULL,                    -- 같은 작업 중복 등록 방지 (예: trip_purge:12)
+    payload        TEXT,                                     -- JSON
+    status         VARCHAR(10) NOT NULL DEFAULT 'queued',    -- queued / running / done / failed
+    progress       INT NOT NULL DEFAULT 0,
+    total          INT,
+    message        VARCHAR(255),
+    error          VARCHAR(255),
+    attempts       INT NOT NULL DEFAULT 0,
+    max_attempts   INT NOT NULL DEFAULT 3,
+    run_after      DATETIME,                                 -- 실패 후 다시 시도할 시각
+    created_at     DATETIME NOT NULL,
+    started_at     DATETIME,
+    updated_at     DATETIME,
+    finished_at    DATETIME,
+    UNIQUE KEY uq_jobs_key (job_key),
+    INDEX idx_jobs_status (status, job_id)
+);
+
+-- 005 이후 아직 끝나지 않은 여행 정리는 작업으로 옮겨서 이어서 진행
+INSERT INTO jobs (kind, job_key, payload, status, created_at, updated_at)
+SELECT 'trip_purge',
+       CONCAT('trip_purge:', trip_id),
+       CONCAT('{"trip_id": ', trip_id, '}'),
+       'queued',
+       NOW(),
+       NOW()
+FROM trip_purges
+WHERE status <> 'done';
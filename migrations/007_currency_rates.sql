@@ -0,0 +1,17 @@
+-- 통화별 환율 이력 (currency_cache.py 가 통째로 읽어서 (통화, 결제일시) 로 찾는다)
+-- currency.rate_to_krw 는 "지금 환율" 로 그대로 두고, 환율을 바꿀 때는 currency_rates.py 로 둘 다 기록
+CREATE TABLE currency_rates (
+    rate_id        INT AUTO_INCREMENT PRIMARY KEY,
+    currency_code  VARCHAR(3) NOT NULL,
+    effective_at   DATETIME NOT NULL,            -- 이 시각부터 적용
+    rate           DECIMAL(12,4) NOT NULL,       -- 1 단위 = rate 원
+    updated_at     DATETIME NOT NULL,
+    UNIQUE KEY uq_rates_code_time (currency_code, effective_at),
+    CONSTRAINT fk_rates_currency
+        FOREIGN KEY (currency_code) REFERENCES currency(currency_code)
+);
+
+-- 지금까지의 환율을 첫 기록으로 (이전 이력은 알 수 없으므로 가장 오래된 시각부터 적용)
+INSERT INTO currency_rates (currency_code, effective_at, rate, updated_at)
+SELECT currency_code, '1000-01-01 00:00:00', rate_to_krw, NOW()
+FROM currency;
@@ -0,0 +1,39 @@
+-- 여러 여행을 한 화면에 모아 보기 위한 요약 테이블 (/dashboard, trip_rollups.py)
+--
+-- trip_expense_rollups : 여행 × 결제일 × 카테고리 지출 합계
+--   지출을 저장 / 수정 / 삭제하는 트랜잭션에서 ledger.py 가 같이 더하고 뺀다 (trip_balances 와 같은 방식)
+--   결제일이 없으면 '1000-01-01', 카테고리가 없으면 '' (기본 키에는 NULL 을 쓸 수 없어서)
+-- expense_month_rollups : 모든 여행의 월 × 카테고리 합계
+--   지출마다 고치면 모든 여행이 같은 행을 잠그므로, 정리 작업(jobs 'rollup_compact')이 주기적으로 다시 채운다
+-- 참가자 × 여행 결제액 / 부담액은 이미 trip_balances 에 있다.
+
+CREATE TABLE trip_expense_rollups (
+    trip_id        INT NOT NULL,
+    paid_day       DATE NOT NULL,
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (trip_id, paid_day, category),
+    CONSTRAINT fk_ter_trip
+        FOREIGN KEY (trip_id) REFERENCES trips(trip_id)
+);
+
+CREATE TABLE expense_month_rollups (
+    month_start    DATE NOT NULL,                    -- 그 달 1일 (결제일 없는 지출은 '1000-01-01')
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    trip_count     INT NOT NULL DEFAULT 0,
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      DECIMAL(16,2) NOT NULL DEFAULT 0,
+    computed_at    DATETIME NOT NULL,
+    PRIMARY KEY (month_start, category)
+);
+
+-- 기존 지출로 채우기 (월 합계는 첫 정리 작업 때 채워진다)
+INSERT INTO trip_expense_rollups (trip_id, paid_day, category, expense_count, total_krw)
+SELECT trip_id,
+       COALESCE(DATE(paid_at), '1000-01-01'),
+       COALESCE(category, ''),
+       COUNT(*),
+       SUM(amount_krw)
+FROM expenses
+GROUP BY trip_id, COALESCE(DATE(paid_at), '1000-01-01'), COALESCE(category, '');
@@ -0,0 +1,5 @@
+-- 실행 중인 작업이 같은 키로 다시 등록되면 행은 running 그대로 두고 rerun = 1 만 표시한다 (jobs.py)
+-- 끝날 때 rerun 이면 queued 로 되돌려 합쳐진 payload 로 한 번 더 실행
+-- (queued 로 바로 바꾸면 heartbeat 가 멈추고 다른 프로세스가 같은 작업을 동시에 꺼내 갈 수 있었다)
+ALTER TABLE jobs
+    ADD COLUMN rerun TINYINT NOT NULL DEFAULT 0;
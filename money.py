@@ -0,0 +1,169 @@
+# --------------------------
+# 금액 계산 (정수 최소 단위)
+# --------------------------
+# DB 의 금액 컬럼은 모두 DECIMAL(.., 2) 인데, 파이썬 쪽에서는 행마다 float 로 바꿔서
+# 곱하고 나누고 round 했다. 변환 비용도 들고, round(금액 / 인원, 2) 로 나눈 N빵은
+# 합계가 지출 금액과 1전씩 어긋났다.
+# 여기서는 금액을 "소수 둘째 자리 단위 정수" (1원 = 100) 로만 다룬다.
+#
+#  - Money       : (minor, currency) 두 칸짜리 값 객체 (__slots__)
+#  - to_minor    : DECIMAL / 문자열 / 숫자 목록 → 정수 목록 (한 번에)
+#  - split       : 정수 금액을 n 개로 나누기, 합계는 항상 원래 금액과 같다
+#                  (나머지 1전은 (순번 + offset) % n 으로 돌아가며 → expense_resplit 의 SQL 과 같은 규칙)
+#  - convert     : 같은 환율로 여러 금액 환산 (환율을 분수로 한 번 바꿔 두고 정수 곱셈 + 반올림)
+#  - round_units : 원 단위로 반올림하면서 합계는 유지 (정산 balance 합이 0 으로 남도록)
+#
+# 반올림은 모두 0.5 에서 0 에서 먼 쪽 (MySQL DECIMAL 의 ROUND 와 같게).
+# DB 에 넣을 때는 from_minor() / Money.to_decimal() 로 Decimal 로 바꿔서 넘긴다.
+#
+# float 로 하던 예전 방식과의 비교: python bench_money.py
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+SCALE = 100    # 1원(1 통화 단위) = 100 최소 단위
+
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        # 2.675 같은 float 를 이진수 값이 아니라 보이는 그대로
+        return Decimal(repr(value))
+    if isinstance(value, str):
+        value = value.replace(",", "").strip()
+    try:
+        return Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"금액이 숫자가 아닙니다: {value!r}")
+
+
+def to_minor(values):
+    """금액 목록 → 최소 단위 정수 목록 (소수 셋째 자리에서 반올림)"""
+    result = []
+    for value in values:
+        d = _to_decimal(value)
+        if not d.is_finite():
+            raise ValueError(f"금액이 숫자가 아닙니다: {value!r}")
+        result.append(int((d * SCALE).to_integral_value(ROUND_HALF_UP)))
+    return result
+
+
+def from_minor(minor):
+    """최소 단위 정수 → DB 에 넣을 Decimal (소수 둘째 자리)"""
+    return Decimal(minor).scaleb(-2)
+
+
+def _round_div(a, b):
+    """a / b 를 정수로 반올림 (b > 0, 0.5 는 0 에서 먼 쪽)"""
+    if a >= 0:
+        return (2 * a + b) // (2 * b)
+    return -((-2 * a + b) // (2 * b))
+
+
+@lru_cache(maxsize=1024)
+def _ratio(rate):
+    return _to_decimal(rate).as_integer_ratio()
+
+
+def convert(amounts, rate):
+    """같은 통화 금액(최소 단위) 목록 × rate → 원화 최소 단위 목록 (각각 반올림)"""
+    num, den = _ratio(rate)
+    return [_round_div(a * num, den) for a in amounts]
+
+
+def split(total, n, offset=0):
+    """정수 금액 total 을 n 개로 → 합계가 total 과 정확히 같은 정수 목록
+
+    몫은 모두 같고, 나머지는 (순번 + offset) % n 이 작은 쪽부터 1씩 더 준다.
+    (offset 에 expense_id 를 주면 지출마다 1전 더 내는 사람이 돌아간다)
+    """
+    if n <= 0:
+        return []
+    sign = -1 if total < 0 else 1
+    quotient, remainder = divmod(abs(total), n)
+    return [sign * (quotient + (1 if (k + offset) % n < remainder else 0))
+            for k in range(n)]
+
+
+def round_units(values, unit=SCALE):
+    """최소 단위 정수 목록을 unit(기본 1원) 단위 정수로 반올림
+
+    하나씩 반올림하면 합계가 어긋날 수 있으므로, 내림한 뒤 모자란 만큼을
+    나머지가 큰 순서(같으면 앞쪽)대로 1씩 올려 준다 → 결과 합계 = 전체 합계를 반올림한 값
+    """
+    values = list(values)
+    floors = [v // unit for v in values]
+    need = _round_div(sum(values), unit) - sum(floors)
+    if need:
+        order = sorted(range(len(values)), key=lambda i: (-(values[i] - floors[i] * unit), i))
+        for i in order[:need]:
+            floors[i] += 1
+    return floors
+
+
+class Money:
+    """최소 단위 정수 + 통화 코드"""
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor, currency="KRW"):
+        self.minor = int(minor)
+        self.currency = currency
+
+    @classmethod
+    def of(cls, value, currency="KRW"):
+        """Decimal / 문자열 / 숫자 금액 → Money (잘못된 값이면 ValueError)"""
+        return cls(to_minor((value,))[0], currency)
+
+    def to_decimal(self):
+        return from_minor(self.minor)
+
+    def convert(self, rate, currency="KRW"):
+        """rate(1 단위 = rate 원) 로 환산한 Money"""
+        return Money(convert((self.minor,), rate)[0], currency)
+
+    def split(self, n, offset=0):
+        return [Money(m, self.currency) for m in split(self.minor, n, offset)]
+
+    def _check(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        if other.currency != self.currency:
+            raise ValueError(f"통화가 다른 금액끼리 계산할 수 없습니다: {self.currency}, {other.currency}")
+        return other
+
+    def __add__(self, other):
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other):
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __lt__(self, other):
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return self.minor < other.minor
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __repr__(self):
+        return f"Money('{self.to_decimal()}', '{self.currency}')"
+
+    def __str__(self):
+        return f"{self.to_decimal()} {self.currency}"
@@ -0,0 +1,255 @@
+# --------------------------
+# app.py 라우트 SQL
+# --------------------------
+# 라우트가 실행하는 쿼리 문자열을 한곳에 모아 둔다.
+# explain_check.py 가 같은 상수로 EXPLAIN 을 돌리므로
+# 쿼리를 고치면 검사 대상도 같이 바뀐다 (손으로 복사해 둔 SQL 이 어긋나지 않게).
+#
+# 다른 모듈(trip_snapshot / trip_pages / ledger / jobs ...)의 쿼리는 각 모듈의 상수를 쓴다.
+
+# --- 여행 ---
+
+TRIP_INSERT = """
+    INSERT INTO trips (title, start_date, end_date)
+    VALUES (%s, %s, %s)
+"""
+
+# 지출 / Day / 액티비티 입력 폼, CSV 가져오기 화면의 여행 정보 (삭제된 여행 제외)
+TRIP_HEADER = """
+    SELECT trip_id, title, start_date, end_date
+    FROM trips
+    WHERE trip_id = %s
+      AND deleted_at IS NULL
+"""
+
+# 이 여행 참가자 목록 (N빵 기준, uk_trip_user 순서 그대로)
+TRIP_PARTICIPANTS = """
+    SELECT u.user_id, u.name
+    FROM trip_participants tp
+    JOIN users u ON tp.user_id = u.user_id
+    WHERE tp.trip_id = %s
+    ORDER BY tp.user_id
+"""
+
+# 액티비티 폼의 Day 선택 목록
+TRIP_DESTINATIONS = """
+    SELECT destination_id, day_no, country_name, city_name
+    FROM destinations
+    WHERE trip_id = %s
+    ORDER BY day_no
+"""
+
+# --- 지출 ---
+
+EXPENSE_INSERT = """
+    INSERT INTO expenses
+        (trip_id, paid_by_user_id, amount, currency_code,
+         amount_krw, category, payment_method, paid_at, memo)
+    VALUES
+        (%s, %s, %s, %s, %s, %s, %s, NOW(), %s)
+"""
+
+# 수정할 지출 1건 (삭제된 여행의 지출 제외)
+EXPENSE_FOR_EDIT = """
+    SELECT
+        e.expense_id,
+        e.trip_id,
+        e.paid_by_user_id,
+        e.amount,
+        e.currency_code,
+        e.category,
+        e.payment_method,
+        e.memo,
+        e.paid_at,
+        t.title,
+        t.start_date,
+        t.end_date
+    FROM expenses e
+    JOIN trips t ON e.trip_id = t.trip_id
+    WHERE e.expense_id = %s
+      AND t.deleted_at IS NULL
+"""
+
+EXPENSE_UPDATE = """
+    UPDATE expenses
+    SET paid_by_user_id = %s,
+        amount = %s,
+        currency_code = %s,
+        amount_krw = %s,
+        category = %s,
+        payment_method = %s,
+        memo = %s
+    WHERE expense_id = %s
+"""
+
+EXPENSE_TRIP = """
+    SELECT trip_id
+    FROM expenses
+    WHERE expense_id = %s
+"""
+
+EXPENSE_SHARES_DELETE = """
+    DELETE FROM expense_participants
+    WHERE expense_id = %s
+"""
+
+EXPENSE_DELETE = """
+    DELETE FROM expenses
+    WHERE expense_id = %s
+"""
+
+# --- Day (destinations) ---
+
+DESTINATION_INSERT = """
+    INSERT INTO destinations
+        (trip_id, day_no, country_name, city_name, note)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# 수정할 Day 1개 (삭제된 여행의 Day 제외)
+DESTINATION_FOR_EDIT = """
+    SELECT d.destination_id, d.trip_id, d.day_no, d.country_name, d.city_name, d.note
+    FROM destinations d
+    JOIN trips t ON d.trip_id = t.trip_id
+    WHERE d.destination_id = %s
+      AND t.deleted_at IS NULL
+"""
+
+DESTINATION_UPDATE = """
+    UPDATE destinations
+    SET day_no = %s,
+        country_name = %s,
+        city_name = %s,
+        note = %s
+    WHERE destination_id = %s
+"""
+
+DESTINATION_TRIP = """
+    SELECT trip_id
+    FROM destinations
+    WHERE destination_id = %s
+"""
+
+DESTINATION_ACTIVITIES_DELETE = """
+    DELETE FROM activities
+    WHERE destination_id = %s
+"""
+
+DESTINATION_DELETE = """
+    DELETE FROM destinations
+    WHERE destination_id = %s
+"""
+
+# --- 액티비티 ---
+
+ACTIVITY_INSERT = """
+    INSERT INTO activities
+        (destination_id, name, category, start_time, end_time,
+         cost, currency_code, cost_krw, memo)
+    VALUES
+        (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# 수정할 액티비티 1개 (삭제된 여행의 액티비티 제외)
+ACTIVITY_FOR_EDIT = """
+    SELECT
+        a.activity_id,
+        a.destination_id,
+        a.name,
+        a.category,
+        a.start_time,
+        a.end_time,
+        a.cost,
+        a.currency_code,
+        a.cost_krw,
+        a.memo,
+        d.trip_id
+    FROM activities a
+    JOIN destinations d ON a.destination_id = d.destination_id
+    JOIN trips t ON d.trip_id = t.trip_id
+    WHERE a.activity_id = %s
+      AND t.deleted_at IS NULL
+"""
+
+ACTIVITY_UPDATE = """
+    UPDATE activities
+    SET destination_id = %s,
+        name = %s,
+        category = %s,
+        start_time = %s,
+        end_time = %s,
+        cost = %s,
+        currency_code = %s,
+        cost_krw = %s,
+        memo = %s
+    WHERE activity_id = %s
+"""
+
+ACTIVITY_TRIP = """
+    SELECT d.trip_id
+    FROM activities a
+    JOIN destinations d ON a.destination_id = d.destination_id
+    WHERE a.activity_id = %s
+"""
+
+ACTIVITY_DELETE = """
+    DELETE FROM activities
+    WHERE activity_id = %s
+"""
+
+# --- 참가자 ---
+
+USER_BY_NAME = """
+    SELECT user_id
+    FROM users
+    WHERE name = %s
+"""
+
+USER_INSERT = """
+    INSERT INTO users (name)
+    VALUES (%s)
+"""
+
+# 이미 참가자면 무시 (uk_trip_user)
+PARTICIPANT_INSERT = """
+    INSERT IGNORE INTO trip_participants (trip_id, user_id)
+    VALUES (%s, %s)
+"""
+
+# 나가는 사람의 N빵 행
+PARTICIPANT_SHARES_DELETE = """
+    DELETE ep
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+    WHERE e.trip_id = %s
+      AND ep.user_id = %s
+"""
+
+# 나가는 사람이 결제한 지출의 N빵 행 (다른 참가자 몫까지)
+PARTICIPANT_PAID_SHARES_DELETE = """
+    DELETE ep
+    FROM expense_participants ep
+    JOIN expenses e ON ep.expense_id = e.expense_id
+    WHERE e.trip_id = %s
+      AND e.paid_by_user_id = %s
+"""
+
+PARTICIPANT_EXPENSES_DELETE = """
+    DELETE FROM expenses
+    WHERE trip_id = %s
+      AND paid_by_user_id = %s
+"""
+
+PARTICIPANT_DELETE = """
+    DELETE FROM trip_participants
+    WHERE trip_id = %s
+      AND user_id = %s
+"""
+
+# --- 정산 ---
+
+SETTLEMENT_INSERT = """
+    INSERT INTO settlement_transactions
+        (trip_id, payer_name, receiver_name, amount, is_done, done_at)
+    VALUES (%s, %s, %s, %s, 1, NOW())
+"""
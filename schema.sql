@@ -3,7 +3,8 @@ CREATE TABLE users (
     user_id        INT AUTO_INCREMENT PRIMARY KEY,
     name           VARCHAR(50) NOT NULL,
     email          VARCHAR(100),
-    created_at     DATETIME DEFAULT CURRENT_TIMESTAMP
+    created_at     DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_users_name (name)
 );
 
 -- 2) TRIPS
@@ -14,6 +15,10 @@ CREATE TABLE trips (
     end_date           DATE,
     total_budget_krw   INT,
     created_by         INT,
+    version            INT NOT NULL DEFAULT 0,   -- 상세 페이지 캐시 버전 (변경 시 +1)
+    deleted_at         DATETIME NULL,            -- 삭제 요청 시각 (딸린 행은 trip_purge.py 가 정리)
+    INDEX idx_trips_start (start_date),
+    INDEX idx_trips_title (title),
     CONSTRAINT fk_trips_user
         FOREIGN KEY (created_by) REFERENCES users(user_id)
 );
@@ -39,6 +44,7 @@ CREATE TABLE destinations (
     country_name     VARCHAR(50),
     city_name        VARCHAR(50),
     note             VARCHAR(255),
+    INDEX idx_dest_trip_day (trip_id, day_no),
     CONSTRAINT fk_dest_trip
         FOREIGN KEY (trip_id) REFERENCES trips(trip_id)
 );
@@ -63,6 +69,7 @@ CREATE TABLE activities (
     currency_code    VARCHAR(3),
     cost_krw         DECIMAL(12,2),
     memo             VARCHAR(255),
+    INDEX idx_act_dest_start (destination_id, start_time),
     CONSTRAINT fk_act_dest
         FOREIGN KEY (destination_id) REFERENCES destinations(destination_id),
     CONSTRAINT fk_act_currency
@@ -100,6 +107,8 @@ CREATE TABLE expenses (
     payment_method       VARCHAR(20),
     paid_at              DATETIME,
     memo                 VARCHAR(255),
+    INDEX idx_exp_trip_paid (trip_id, paid_at),
+    INDEX idx_exp_trip_payer (trip_id, paid_by_user_id, amount_krw),
     CONSTRAINT fk_exp_trip
         FOREIGN KEY (trip_id) REFERENCES trips(trip_id),
     CONSTRAINT fk_exp_act
@@ -118,12 +127,14 @@ CREATE TABLE expense_participants (
     share_amount_krw  DECIMAL(12,2) NOT NULL,
     is_settled        BOOLEAN DEFAULT 0,
     settled_at        DATETIME,
+    INDEX idx_ep_exp_user (expense_id, user_id, share_amount_krw),
     CONSTRAINT fk_ep_exp
         FOREIGN KEY (expense_id) REFERENCES expenses(expense_id),
     CONSTRAINT fk_ep_user
         FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 
+-- 10) SETTLEMENT_TRANSACTIONS (완료된 송금 기록)
 CREATE TABLE settlement_transactions (
     id INT AUTO_INCREMENT PRIMARY KEY,
     trip_id INT NOT NULL,
@@ -132,5 +143,118 @@ CREATE TABLE settlement_transactions (
     amount INT NOT NULL,
     is_done TINYINT(1) DEFAULT 0,
     done_at DATETIME NULL,
+    INDEX idx_st_trip_done (trip_id, is_done),
     FOREIGN KEY (trip_id) REFERENCES trips(trip_id)
 );
+
+-- 11) TRIP_BALANCES (여행별 개인 정산 요약)
+--     지출/송금 저장 시 같은 트랜잭션에서 함께 갱신 (ledger.py)
+CREATE TABLE trip_balances (
+    trip_id       INT NOT NULL,
+    user_id       INT NOT NULL,
+    total_paid    DECIMAL(14,2) NOT NULL DEFAULT 0,   -- 결제한 금액 합계
+    total_share   DECIMAL(14,2) NOT NULL DEFAULT 0,   -- N빵 부담액 합계
+    settled_out   DECIMAL(14,2) NOT NULL DEFAULT 0,   -- 완료된 송금: 보낸 금액
+    settled_in    DECIMAL(14,2) NOT NULL DEFAULT 0,   -- 완료된 송금: 받은 금액
+    PRIMARY KEY (trip_id, user_id),
+    CONSTRAINT fk_tb_trip
+        FOREIGN KEY (trip_id) REFERENCES trips(trip_id),
+    CONSTRAINT fk_tb_user
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+-- 12) TRIP_PURGES (삭제된 여행의 딸린 행 정리 진행 상황, trip_purge.py)
+CREATE TABLE trip_purges (
+    trip_id        INT PRIMARY KEY,
+    status         VARCHAR(10) NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    step           VARCHAR(30),                              -- 지금 지우고 있는 테이블
+    rows_deleted   INT NOT NULL DEFAULT 0,
+    batches        INT NOT NULL DEFAULT 0,
+    error          VARCHAR(255),
+    requested_at   DATETIME NOT NULL,
+    updated_at     DATETIME,
+    finished_at    DATETIME,
+    INDEX idx_purge_status (status)
+);
+
+-- 13) JOBS (백그라운드 작업, jobs.py)
+CREATE TABLE jobs (
+    job_id         INT AUTO_INCREMENT PRIMARY KEY,
+    kind           VARCHAR(50) NOT NULL,                     -- trip_purge / resplit ...
+    job_key        VARCHAR(150) NOT NULL,                    -- 같은 작업 중복 등록 방지 (예: trip_purge:12)
+    payload        TEXT,                                     -- JSON
+    status         VARCHAR(10) NOT NULL DEFAULT 'queued',    -- queued / running / done / failed
+    progress       INT NOT NULL DEFAULT 0,
+    total          INT,
+    message        VARCHAR(255),
+    error          VARCHAR(255),
+    attempts       INT NOT NULL DEFAULT 0,
+    max_attempts   INT NOT NULL DEFAULT 3,
+    run_after      DATETIME,                                 -- 실패 후 다시 시도할 시각
+    created_at     DATETIME NOT NULL,
+    started_at     DATETIME,
+    updated_at     DATETIME,
+    finished_at    DATETIME,
+    rerun          TINYINT NOT NULL DEFAULT 0,               -- 실행 중에 다시 등록됨 → 끝나면 한 번 더
+    UNIQUE KEY uq_jobs_key (job_key),
+    INDEX idx_jobs_status (status, job_id)
+);
+
+-- 14) CURRENCY_RATES (통화별 환율 이력, currency_cache.py)
+-- 통화마다 '1000-01-01 00:00:00' 기준 환율 기록부터 시작한다
+-- (insert_sample_data.sql / currency_rates.add_rate 가 currency.rate_to_krw 로 채움)
+-- 이력이 없는 통화는 currency.rate_to_krw 를 모든 시각의 환율로 쓴다
+CREATE TABLE currency_rates (
+    rate_id        INT AUTO_INCREMENT PRIMARY KEY,
+    currency_code  VARCHAR(3) NOT NULL,
+    effective_at   DATETIME NOT NULL,            -- 이 시각부터 적용
+    rate           DECIMAL(12,4) NOT NULL,       -- 1 단위 = rate 원
+    updated_at     DATETIME NOT NULL,
+    UNIQUE KEY uq_rates_code_time (currency_code, effective_at),
+    CONSTRAINT fk_rates_currency
+        FOREIGN KEY (currency_code) REFERENCES currency(currency_code)
+);
+
+-- 15) TRIP_EXPENSE_ROLLUPS (여행 × 결제일 × 카테고리 지출 합계, /dashboard)
+--     지출 저장 시 같은 트랜잭션에서 함께 갱신 (ledger.py)
+--     결제일이 없으면 '1000-01-01', 카테고리가 없으면 ''
+CREATE TABLE trip_expense_rollups (
+    trip_id        INT NOT NULL,
+    paid_day       DATE NOT NULL,
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (trip_id, paid_day, category),
+    CONSTRAINT fk_ter_trip
+        FOREIGN KEY (trip_id) REFERENCES trips(trip_id)
+);
+
+-- 16) EXPENSE_MONTH_ROLLUPS (모든 여행의 월 × 카테고리 합계, /dashboard)
+--     정리 작업(jobs 'rollup_compact', trip_rollups.py)이 주기적으로 다시 채움
+CREATE TABLE expense_month_rollups (
+    month_start    DATE NOT NULL,                    -- 그 달 1일 (결제일 없는 지출은 '1000-01-01')
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    trip_count     INT NOT NULL DEFAULT 0,
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      DECIMAL(16,2) NOT NULL DEFAULT 0,
+    computed_at    DATETIME NOT NULL,
+    PRIMARY KEY (month_start, category)
+);
+
+-- 17) SCHEMA_MIGRATIONS (migrate.py 가 적용한 migrations/*.sql 기록)
+--     이 schema.sql 에는 아래 버전까지 이미 반영되어 있음
+CREATE TABLE schema_migrations (
+    version      VARCHAR(100) PRIMARY KEY,
+    applied_at   DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version)
+VALUES
+    ('001_trip_balances'),
+    ('002_indexes'),
+    ('003_trip_list_indexes'),
+    ('004_trip_version'),
+    ('005_trip_soft_delete'),
+    ('006_jobs'),
+    ('007_currency_rates'),
+    ('008_trip_rollups');
@@ -0,0 +1,223 @@
+-- SQLite 용 스키마 (schema.sql 과 같은 구조)
+-- MySQL 없이 테스트 / 벤치마크할 때 sqlite_backend.py 가 새 DB 에 한 번 실행한다.
+-- schema.sql 이나 migrations/ 를 고치면 여기도 같이 고칠 것.
+--
+--  - INT AUTO_INCREMENT PRIMARY KEY → INTEGER PRIMARY KEY AUTOINCREMENT (id 재사용 안 함)
+--  - DECIMAL → NUMERIC (파이썬에서는 float 로 읽힘)
+--  - ENUM → TEXT + CHECK
+--  - 인덱스는 CREATE INDEX 로 따로
+
+-- 1) USERS
+CREATE TABLE users (
+    user_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    name           VARCHAR(50) NOT NULL,
+    email          VARCHAR(100),
+    created_at     DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_users_name ON users (name);
+
+-- 2) TRIPS
+CREATE TABLE trips (
+    trip_id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    title              VARCHAR(100) NOT NULL,
+    start_date         DATE,
+    end_date           DATE,
+    total_budget_krw   INT,
+    created_by         INT REFERENCES users(user_id),
+    version            INT NOT NULL DEFAULT 0,
+    deleted_at         DATETIME NULL
+);
+CREATE INDEX idx_trips_start ON trips (start_date);
+CREATE INDEX idx_trips_title ON trips (title);
+
+-- 3) TRIP_PARTICIPANTS
+CREATE TABLE trip_participants (
+    tp_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    trip_id    INT NOT NULL REFERENCES trips(trip_id),
+    user_id    INT NOT NULL REFERENCES users(user_id),
+    role       TEXT DEFAULT 'member' CHECK (role IN ('owner', 'member')),
+    UNIQUE (trip_id, user_id)
+);
+
+-- 4) DESTINATIONS
+CREATE TABLE destinations (
+    destination_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    trip_id          INT NOT NULL,
+    day_no           INT NOT NULL,
+    country_name     VARCHAR(50),
+    city_name        VARCHAR(50),
+    note             VARCHAR(255)
+);
+CREATE INDEX idx_dest_trip_day ON destinations (trip_id, day_no);
+
+-- 5) CURRENCY
+CREATE TABLE currency (
+    currency_code   VARCHAR(3) PRIMARY KEY,
+    currency_name   VARCHAR(20),
+    rate_to_krw     NUMERIC NOT NULL,
+    updated_at      DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 6) ACTIVITIES
+CREATE TABLE activities (
+    activity_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    destination_id   INT NOT NULL,
+    name             VARCHAR(100) NOT NULL,
+    category         VARCHAR(50),
+    start_time       TIME,
+    end_time         TIME,
+    cost             NUMERIC,
+    currency_code    VARCHAR(3) REFERENCES currency(currency_code),
+    cost_krw         NUMERIC,
+    memo             VARCHAR(255)
+);
+CREATE INDEX idx_act_dest_start ON activities (destination_id, start_time);
+
+-- 7) TRANSPORTS
+CREATE TABLE transports (
+    transport_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    trip_id        INT NOT NULL REFERENCES trips(trip_id),
+    from_city      VARCHAR(50),
+    to_city        VARCHAR(50),
+    mode           VARCHAR(30),
+    duration_min   INT,
+    cost           NUMERIC,
+    currency_code  VARCHAR(3) REFERENCES currency(currency_code),
+    cost_krw       NUMERIC,
+    depart_at      DATETIME
+);
+
+-- 8) EXPENSES
+CREATE TABLE expenses (
+    expense_id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    trip_id              INT NOT NULL,
+    related_activity_id  INT REFERENCES activities(activity_id),
+    paid_by_user_id      INT NOT NULL REFERENCES users(user_id),
+    amount               NUMERIC NOT NULL,
+    currency_code        VARCHAR(3) NOT NULL REFERENCES currency(currency_code),
+    amount_krw           NUMERIC NOT NULL,
+    category             VARCHAR(50),
+    payment_method       VARCHAR(20),
+    paid_at              DATETIME,
+    memo                 VARCHAR(255)
+);
+CREATE INDEX idx_exp_trip_paid ON expenses (trip_id, paid_at);
+CREATE INDEX idx_exp_trip_payer ON expenses (trip_id, paid_by_user_id, amount_krw);
+
+-- 9) EXPENSE_PARTICIPANTS
+CREATE TABLE expense_participants (
+    ep_id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    expense_id        INT NOT NULL,
+    user_id           INT NOT NULL REFERENCES users(user_id),
+    share_amount_krw  NUMERIC NOT NULL,
+    is_settled        BOOLEAN DEFAULT 0,
+    settled_at        DATETIME
+);
+CREATE INDEX idx_ep_exp_user ON expense_participants (expense_id, user_id, share_amount_krw);
+
+-- 10) SETTLEMENT_TRANSACTIONS
+CREATE TABLE settlement_transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    trip_id INT NOT NULL REFERENCES trips(trip_id),
+    payer_name VARCHAR(50) NOT NULL,
+    receiver_name VARCHAR(50) NOT NULL,
+    amount INT NOT NULL,
+    is_done TINYINT DEFAULT 0,
+    done_at DATETIME NULL
+);
+CREATE INDEX idx_st_trip_done ON settlement_transactions (trip_id, is_done);
+
+-- 11) TRIP_BALANCES
+CREATE TABLE trip_balances (
+    trip_id       INT NOT NULL REFERENCES trips(trip_id),
+    user_id       INT NOT NULL REFERENCES users(user_id),
+    total_paid    NUMERIC NOT NULL DEFAULT 0,
+    total_share   NUMERIC NOT NULL DEFAULT 0,
+    settled_out   NUMERIC NOT NULL DEFAULT 0,
+    settled_in    NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (trip_id, user_id)
+);
+
+-- 12) TRIP_PURGES
+CREATE TABLE trip_purges (
+    trip_id        INTEGER PRIMARY KEY,
+    status         VARCHAR(10) NOT NULL DEFAULT 'pending',
+    step           VARCHAR(30),
+    rows_deleted   INT NOT NULL DEFAULT 0,
+    batches        INT NOT NULL DEFAULT 0,
+    error          VARCHAR(255),
+    requested_at   DATETIME NOT NULL,
+    updated_at     DATETIME,
+    finished_at    DATETIME
+);
+CREATE INDEX idx_purge_status ON trip_purges (status);
+
+-- 13) JOBS
+CREATE TABLE jobs (
+    job_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind           VARCHAR(50) NOT NULL,
+    job_key        VARCHAR(150) NOT NULL UNIQUE,
+    payload        TEXT,
+    status         VARCHAR(10) NOT NULL DEFAULT 'queued',
+    progress       INT NOT NULL DEFAULT 0,
+    total          INT,
+    message        VARCHAR(255),
+    error          VARCHAR(255),
+    attempts       INT NOT NULL DEFAULT 0,
+    max_attempts   INT NOT NULL DEFAULT 3,
+    run_after      DATETIME,
+    created_at     DATETIME NOT NULL,
+    started_at     DATETIME,
+    updated_at     DATETIME,
+    finished_at    DATETIME,
+    rerun          TINYINT NOT NULL DEFAULT 0
+);
+CREATE INDEX idx_jobs_status ON jobs (status, job_id);
+
+-- 14) CURRENCY_RATES (통화마다 '1000-01-01 00:00:00' 기준 환율부터, schema.sql 참고)
+CREATE TABLE currency_rates (
+    rate_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    currency_code  VARCHAR(3) NOT NULL REFERENCES currency(currency_code),
+    effective_at   DATETIME NOT NULL,
+    rate           NUMERIC NOT NULL,
+    updated_at     DATETIME NOT NULL,
+    UNIQUE (currency_code, effective_at)
+);
+
+-- 15) TRIP_EXPENSE_ROLLUPS
+CREATE TABLE trip_expense_rollups (
+    trip_id        INT NOT NULL REFERENCES trips(trip_id),
+    paid_day       DATE NOT NULL,
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (trip_id, paid_day, category)
+);
+
+-- 16) EXPENSE_MONTH_ROLLUPS
+CREATE TABLE expense_month_rollups (
+    month_start    DATE NOT NULL,
+    category       VARCHAR(50) NOT NULL DEFAULT '',
+    trip_count     INT NOT NULL DEFAULT 0,
+    expense_count  INT NOT NULL DEFAULT 0,
+    total_krw      NUMERIC NOT NULL DEFAULT 0,
+    computed_at    DATETIME NOT NULL,
+    PRIMARY KEY (month_start, category)
+);
+
+-- 17) SCHEMA_MIGRATIONS
+CREATE TABLE schema_migrations (
+    version      VARCHAR(100) PRIMARY KEY,
+    applied_at   DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+INSERT INTO schema_migrations (version)
+VALUES
+    ('001_trip_balances'),
+    ('002_indexes'),
+    ('003_trip_list_indexes'),
+    ('004_trip_version'),
+    ('005_trip_soft_delete'),
+    ('006_jobs'),
+    ('007_currency_rates'),
+    ('008_trip_rollups');
@@ -0,0 +1,163 @@
+# --------------------------
+# 송금 정리 (누가 누구에게 얼마 보내면 되는지)
+# --------------------------
+# 입력: [(이름, balance), ...]   balance 는 원 단위 정수
+#        balance > 0 : 받아야 할 돈,  balance < 0 : 더 내야 할 돈
+# 출력: [{"from": 보낼 사람, "to": 받을 사람, "amount": 금액}, ...]
+#
+# 두 가지 방식
+#  - greedy : 가장 많이 내야 하는 사람 ↔ 가장 많이 받아야 하는 사람을 힙으로 골라
+#             계속 맞춰 준다. O(n log n), 송금 횟수는 최대 n-1.
+#  - exact  : 합이 0이 되는 부분집합(그룹)으로 최대한 많이 쪼갠 뒤
+#             그룹 안에서만 송금 → 송금 횟수 = n - 그룹 수 (최소).
+#             부분집합 DP 라서 O(2^n · n), 인원이 적을 때만 사용.
+#  - auto   : 0이 아닌 사람이 EXACT_CUTOFF 명 이하면 exact, 아니면 greedy.
+
+import heapq
+
+from money import round_units, to_minor
+
+EXACT_CUTOFF = 12
+
+
+def summarize_balances(balance_rows):
+    """trip_balances 요약 행에 완료된 송금까지 반영한 '현재' 정산 결과
+
+      - original_balance = total_paid - total_share
+      - new_balance = original_balance + 보낸금액 - 받은금액
+      - final_paid  = total_share + new_balance
+
+    DECIMAL 값을 열마다 한 번에 1전 단위 정수로 바꿔서 계산하고 (float 변환 없음),
+    원 단위로 반올림할 때도 전체 합계는 유지한다 → balance 합이 0 이면 반올림 후에도 0
+    """
+    rows = list(balance_rows)
+    balances = to_minor(r["balance"] for r in rows)
+    shares = to_minor(r["total_share"] for r in rows)
+    sent = to_minor(r["settled_out"] for r in rows)         # 보낸 총 금액
+    received = to_minor(r["settled_in"] for r in rows)      # 받은 총 금액
+
+    new_balances = [b + s - r for b, s, r in zip(balances, sent, received)]
+    # 송금까지 포함해 최종적으로 부담한 금액
+    final_paid = [share + b for share, b in zip(shares, new_balances)]
+
+    settlement = []
+    for row, balance, paid in zip(rows, round_units(new_balances), round_units(final_paid)):
+        new_row = dict(row)
+        new_row["balance"] = balance
+        new_row["final_paid"] = paid
+        settlement.append(new_row)
+    return settlement
+
+
+def greedy_transfers(balances):
+    """힙 기반 greedy 매칭. 0이 된 사람은 빠지므로 송금은 최대 (인원-1)번"""
+    receivers = []   # (-받을 금액, 순서, 이름)  → 큰 금액부터 꺼내기 위해 음수
+    payers = []      # (-낼 금액, 순서, 이름)
+    for order, (name, balance) in enumerate(balances):
+        balance = int(balance)
+        if balance > 0:
+            receivers.append((-balance, order, name))
+        elif balance < 0:
+            payers.append((balance, order, name))
+    heapq.heapify(receivers)
+    heapq.heapify(payers)
+
+    transactions = []
+    while payers and receivers:
+        pay_amt, pay_order, pay_name = heapq.heappop(payers)
+        rec_amt, rec_order, rec_name = heapq.heappop(receivers)
+
+        send_amount = min(-pay_amt, -rec_amt)
+        transactions.append({
+            "from": pay_name,
+            "to": rec_name,
+            "amount": send_amount
+        })
+
+        # 남은 금액이 있으면 다시 힙에 넣기
+        if -pay_amt > send_amount:
+            heapq.heappush(payers, (pay_amt + send_amount, pay_order, pay_name))
+        if -rec_amt > send_amount:
+            heapq.heappush(receivers, (rec_amt + send_amount, rec_order, rec_name))
+
+    return transactions
+
+
+def _zero_sum_groups(amounts):
+    """amounts 를 합이 0인 그룹으로 최대한 많이 나눈다 (인덱스 리스트의 리스트).
+
+    dp[mask] = mask 의 원소를 하나씩 빼 나가는 순서 중에서
+               '남은 집합의 합이 0' 이 되는 순간의 최대 횟수
+    그 순서를 따라가며 합이 0이 되는 지점마다 끊으면 각 구간의 합이 0인 그룹이 된다.
+    (전체 합이 0이 아니면 첫 구간에 남는 금액이 몰린다)
+    """
+    n = len(amounts)
+    full = (1 << n) - 1
+
+    total = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        total[mask] = total[mask ^ low] + amounts[low.bit_length() - 1]
+
+    dp = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        best = 0
+        m = mask
+        while m:
+            low = m & -m
+            if dp[mask ^ low] > best:
+                best = dp[mask ^ low]
+            m ^= low
+        dp[mask] = best + (1 if total[mask] == 0 else 0)
+
+    # 역추적
+    groups = []
+    current = []
+    mask = full
+    while mask:
+        is_zero = total[mask] == 0
+        if is_zero and current:
+            groups.append(current)
+            current = []
+
+        need = dp[mask] - (1 if is_zero else 0)
+        m = mask
+        while m:
+            low = m & -m
+            if dp[mask ^ low] == need:
+                break
+            m ^= low
+        current.append(low.bit_length() - 1)
+        mask ^= low
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def exact_transfers(balances):
+    """송금 횟수가 최소가 되는 정리 (인원이 적을 때만)"""
+    people = [(name, int(b)) for name, b in balances if int(b) != 0]
+    if not people:
+        return []
+
+    groups = _zero_sum_groups([b for _, b in people])
+
+    transactions = []
+    for group in groups:
+        # 원래 순서를 유지해서 같은 입력이면 항상 같은 결과
+        transactions.extend(greedy_transfers([people[i] for i in sorted(group)]))
+    return transactions
+
+
+def compute_transfers(balances, mode="auto", exact_cutoff=EXACT_CUTOFF):
+    """balance 목록에서 송금 목록 계산 (mode: auto / greedy / exact)"""
+    if mode == "greedy":
+        return greedy_transfers(balances)
+    if mode == "exact":
+        return exact_transfers(balances)
+
+    nonzero = sum(1 for _, b in balances if int(b) != 0)
+    if nonzero <= exact_cutoff:
+        return exact_transfers(balances)
+    return greedy_transfers(balances)
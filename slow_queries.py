@@ -0,0 +1,213 @@
+# --------------------------
+# 느린 쿼리 기록 + 자동 EXPLAIN
+# --------------------------
+# MySQL slow log 를 켜지 않고도 앱에서 보낸 쿼리 중 threshold 초를 넘은 것을 모은다.
+# (db_pool 의 tracer 로 등록 → 모든 커서의 execute / executemany 시간을 받는다)
+#
+#  - SQL 은 값/공백을 지운 형태(normalize_sql)로 묶어서 횟수 / 총 시간 / 최대 시간을 쌓는다
+#  - 최근 기록은 메모리 링 버퍼(capacity 개), log_path 를 주면 회전 파일에도 JSON 한 줄씩
+#  - 처음 보는 느린 쿼리는 백그라운드 스레드가 실행 계획을 떠서 같이 보관
+#    (MySQL 은 EXPLAIN FORMAT=JSON, SQLite 는 EXPLAIN QUERY PLAN → storage.py)
+#    (요청 스레드는 큐에 넣기만 하고 바로 돌아간다)
+#
+# /debug/slow-queries 에서 총 시간이 큰 순서로 볼 수 있다.
+
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+from collections import deque
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_CASE_LIST = re.compile(r"(WHEN \? THEN \?)(?: WHEN \? THEN \?)+", re.IGNORECASE)
+
+# 서로 다른 쿼리 종류를 이 이상 쌓지 않는다 (총 시간이 가장 작은 것부터 버림)
+MAX_DISTINCT = 500
+
+
+def normalize_sql(sql):
+    """값 / 공백 / 여러 행 VALUES / IN 목록 길이 차이를 지워서 같은 쿼리끼리 묶이게"""
+    text = " ".join(sql.split())
+    text = text.replace("%s", "?")
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _VALUES_LIST.sub(r"VALUES \1, ...", text)
+    text = _CASE_LIST.sub(r"\1 ...", text)
+    return text
+
+
+def param_shape(params):
+    """바인딩 값 대신 타입만 남긴다 → '(int, str)', 'executemany 120 × (int, int, float)'"""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    if isinstance(params, (list, tuple)):
+        types = [type(v).__name__ for v in params]
+        if len(types) > 8:
+            # 여러 행 INSERT 처럼 긴 목록은 앞부분 + 개수만
+            return "(" + ", ".join(types[:8]) + f", ... {len(types)}개)"
+        return "(" + ", ".join(types) + ")"
+    return type(params).__name__
+
+
+def _explainable(sql):
+    words = sql.split(None, 1)
+    if not words or words[0].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT", "REPLACE"):
+        return False
+    # 여러 문장(multi-statement)은 EXPLAIN 한 번으로 볼 수 없다
+    return ";" not in sql.strip().rstrip(";")
+
+
+class SlowQueryLog:
+
+    def __init__(self, threshold=0.1, capacity=200, log_path=None,
+                 acquire=None, explain=None):
+        self.threshold = threshold      # 이 시간(초) 이상이면 기록
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=capacity)
+        self._stats = {}                # 정규화 SQL -> 집계 dict
+        self._acquire = acquire         # EXPLAIN 용 커넥션을 빌려오는 함수 (pool.acquire)
+        self._explain = explain if acquire is not None else None    # explain(cur, sql, params)
+        self._queue = queue.Queue(maxsize=100)
+        self._worker = None
+
+        self._logger = None
+        if log_path:
+            self._logger = logging.getLogger("travelmate.slow_query")
+            self._logger.propagate = False
+            if not self._logger.handlers:
+                handler = logging.handlers.RotatingFileHandler(
+                    log_path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+
+    # ---- 기록 ----
+
+    def record(self, kind, sql, params, seconds, route=None):
+        """tracer 에서 호출 (threshold 미만이면 아무것도 안 함)"""
+        if kind == "fetch" or seconds < self.threshold:
+            return
+
+        normalized = normalize_sql(sql)
+        shape = param_shape(params)
+        if kind == "executemany":
+            rows = len(params) if params is not None else 0
+            first = params[0] if rows else None
+            shape = f"executemany {rows} × {param_shape(first)}"
+
+        entry = {
+            "at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "route": route,
+            "sql": normalized,
+            "params": shape,
+            "ms": round(seconds * 1000, 3),
+        }
+
+        need_explain = False
+        with self._lock:
+            self._recent.append(entry)
+            stat = self._stats.get(normalized)
+            if stat is None:
+                if len(self._stats) >= MAX_DISTINCT:
+                    smallest = min(self._stats, key=lambda k: self._stats[k]["total"])
+                    del self._stats[smallest]
+                stat = self._stats[normalized] = {
+                    "sql": normalized, "count": 0, "total": 0.0, "max": 0.0,
+                    "routes": set(), "params": shape, "explain": None,
+                    "explaining": False,
+                }
+            if (stat["explain"] is None and not stat["explaining"]
+                    and kind == "execute" and _explainable(sql)):
+                stat["explaining"] = True
+                need_explain = True
+            stat["count"] += 1
+            stat["total"] += seconds
+            stat["max"] = max(stat["max"], seconds)
+            if route:
+                stat["routes"].add(route)
+
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry, ensure_ascii=False))
+
+        if need_explain and self._explain is not None:
+            self._enqueue_explain(normalized, sql, params)
+
+    # ---- 백그라운드 EXPLAIN ----
+
+    def _enqueue_explain(self, normalized, sql, params):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._explain_loop, name="slow-query-explain", daemon=True
+                )
+                self._worker.start()
+        try:
+            self._queue.put_nowait((normalized, sql, params))
+        except queue.Full:
+            # 밀려 있으면 이번에는 건너뛰고, 다음에 또 느리면 그때 다시 시도
+            with self._lock:
+                stat = self._stats.get(normalized)
+                if stat is not None:
+                    stat["explaining"] = False
+
+    def _explain_loop(self):
+        while True:
+            normalized, sql, params = self._queue.get()
+            try:
+                plan = self._run_explain(sql, params)
+            except Exception as e:
+                plan = {"error": str(e)}
+            with self._lock:
+                stat = self._stats.get(normalized)
+                if stat is not None:
+                    stat["explain"] = plan
+            if self._logger is not None:
+                self._logger.info(json.dumps({"sql": normalized, "explain": plan},
+                                             ensure_ascii=False, default=str))
+
+    def _run_explain(self, sql, params):
+        conn = self._acquire(timeout=1.0)
+        try:
+            with conn.cursor() as cur:
+                return self._explain(cur, sql, params)
+        finally:
+            conn.close()
+
+    # ---- 조회 ----
+
+    def top(self, limit=50):
+        """총 시간이 큰 순서"""
+        with self._lock:
+            stats = sorted(self._stats.values(), key=lambda s: s["total"], reverse=True)
+            return [
+                {
+                    "sql": s["sql"],
+                    "count": s["count"],
+                    "total_ms": round(s["total"] * 1000, 3),
+                    "avg_ms": round(s["total"] / s["count"] * 1000, 3),
+                    "max_ms": round(s["max"] * 1000, 3),
+                    "routes": sorted(s["routes"]),
+                    "params": s["params"],
+                    "explain": s["explain"],
+                }
+                for s in stats[:limit]
+            ]
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._stats.clear()
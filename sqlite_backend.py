@@ -0,0 +1,289 @@
+# --------------------------
+# SQLite 저장소 (MySQL 없이 테스트 / 벤치마크)
+# --------------------------
+# app.py 와 다른 모듈들은 pymysql 커넥션 / DictCursor 를 쓰는 것처럼 작성되어 있다.
+# 여기서는 sqlite3 를 같은 모양(cursor(), execute(sql, params), fetchone() → dict,
+# lastrowid, commit / rollback / ping)으로 감싸고, SQL 은 실행 직전에 SQLite 문법으로 바꾼다.
+#
+# translate_sql 이 바꾸는 것
+#   %s                              → ?   (%% → %)
+#   NOW()                           → datetime('now', 'localtime')
+#   NOW() ± INTERVAL %s SECOND       → datetime('now', 'localtime', '±' || ? || ' seconds')
+#   INSERT IGNORE                   → INSERT OR IGNORE
+#   ON DUPLICATE KEY UPDATE c = c + VALUES(c)
+#                                   → ON CONFLICT DO UPDATE SET c = c + excluded.c
+#   DELETE a FROM t a JOIN ... WHERE ...
+#                                   → DELETE FROM t WHERE rowid IN (SELECT a.rowid FROM t a JOIN ... WHERE ...)
+#   DROP TEMPORARY TABLE            → DROP TABLE (CREATE TEMPORARY TABLE 은 그대로 됨)
+#
+# 그 밖의 차이
+#  - DECIMAL 은 float 로 읽힌다 (MySQL 은 Decimal). 금액은 money._to_decimal, 환율은
+#    currency_cache._to_rate 가 Decimal(repr(x)) 로 바꾸므로 보이는 값 그대로 Decimal 이 된다.
+#  - DATE / DATETIME / TIME 은 pymysql 과 같은 date / datetime / timedelta 로 읽는다.
+#  - multi-statement 는 지원하지 않으므로 trip_snapshot 은 하나씩 실행한다.
+#  - 여러 행 INSERT 의 lastrowid 는 MySQL 처럼 "첫 번째 행 id" 로 맞춘다 (expense_import).
+#  - :memory: 는 커넥션마다 DB 가 따로 생기므로 이름 붙은 공유 메모리 DB 를 쓰고
+#    풀 크기를 1 로 둔다 (동시 쓰기는 파일 DB + WAL 로).
+
+import datetime
+import decimal
+import functools
+import itertools
+import os
+import re
+import sqlite3
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---- 값 변환 (파이썬 → SQLite, SQLite → 파이썬) ----
+
+def _parse_time(value):
+    parts = [int(p) for p in value.decode().split(":")]
+    while len(parts) < 3:
+        parts.append(0)
+    return datetime.timedelta(hours=parts[0], minutes=parts[1], seconds=parts[2])
+
+
+def _parse_datetime(value):
+    text = value.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _format_timedelta(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+sqlite3.register_adapter(decimal.Decimal, float)
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(" "))
+sqlite3.register_adapter(datetime.timedelta, _format_timedelta)
+sqlite3.register_converter("DATE", _parse_date)
+sqlite3.register_converter("DATETIME", _parse_datetime)
+sqlite3.register_converter("TIME", _parse_time)
+
+
+# ---- SQL 방언 변환 ----
+
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_NOW = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+_NOW_INTERVAL = re.compile(r"\bNOW\(\)\s*([+-])\s*INTERVAL\s+%s\s+SECOND\b", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES_FUNC = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_DELETE_JOIN = re.compile(r"^\s*DELETE\s+(\w+)\s+FROM\s+(\w+)\s+\1\b(.*)$",
+                          re.IGNORECASE | re.DOTALL)
+_DROP_TEMPORARY = re.compile(r"\bDROP\s+TEMPORARY\s+TABLE\b", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%s|%%")
+
+
+@functools.lru_cache(maxsize=1024)
+def translate_sql(sql, has_params=True):
+    """MySQL 문법 SQL → SQLite 문법 (같은 문자열은 캐시)"""
+    text = _INSERT_IGNORE.sub("INSERT OR IGNORE", sql)
+    text = _NOW_INTERVAL.sub(r"datetime('now', 'localtime', '\1' || %s || ' seconds')", text)
+    text = _NOW.sub("datetime('now', 'localtime')", text)
+    text = _DROP_TEMPORARY.sub("DROP TABLE", text)
+
+    m = _ON_DUPLICATE.search(text)
+    if m:
+        updates = _VALUES_FUNC.sub(r"excluded.\1", m.group(1))
+        text = text[:m.start()] + "ON CONFLICT DO UPDATE SET" + updates
+
+    m = _DELETE_JOIN.match(text)
+    if m:
+        alias, table, rest = m.groups()
+        text = (f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT {alias}.rowid FROM {table} {alias}{rest})")
+
+    # pymysql 은 파라미터가 있을 때만 % 를 해석한다
+    if has_params:
+        text = _PLACEHOLDER.sub(lambda p: "?" if p.group() == "%s" else "%", text)
+    return text
+
+
+def _is_insert(sql):
+    return sql.lstrip()[:6].upper() == "INSERT"
+
+
+# ---- pymysql 모양의 커넥션 / 커서 ----
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """pymysql DictCursor 와 같은 방식으로 쓰는 커서 (결과는 필요할 때 한 행씩 읽음)"""
+
+    def __init__(self, db):
+        self._cur = db.cursor()
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def execute(self, query, args=None):
+        sql = translate_sql(query, args is not None)
+        self._cur.execute(sql, tuple(args) if args is not None else ())
+        self._after_write(sql)
+        return self.rowcount
+
+    def executemany(self, query, args):
+        sql = translate_sql(query, True)
+        self._cur.executemany(sql, [tuple(a) for a in args])
+        self._after_write(sql)
+        return self.rowcount
+
+    def _after_write(self, sql):
+        self.rowcount = self._cur.rowcount
+        lastrowid = self._cur.lastrowid
+        if _is_insert(sql) and lastrowid and self.rowcount > 1:
+            # SQLite 는 마지막 행 id, MySQL 은 첫 번째 행 id 를 돌려준다
+            lastrowid = lastrowid - self.rowcount + 1
+        self.lastrowid = lastrowid
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def nextset(self):
+        return None
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteConnection:
+
+    def __init__(self, database, uri=False, busy_timeout=5.0):
+        self._db = sqlite3.connect(
+            database, uri=uri, timeout=busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,    # 풀이 한 번에 한 스레드에게만 빌려준다
+        )
+        self._db.row_factory = _dict_row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        # cursorclass (SSDictCursor 등) 는 무시: sqlite3 커서는 원래 한 행씩 읽는다
+        return SQLiteCursor(self._db)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def ping(self, reconnect=True):
+        return True
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._db.close()
+
+    def executescript(self, script):
+        self._db.executescript(script)
+
+
+def connect(database, uri=False, busy_timeout=5.0):
+    """ConnectionPool(connect=...) 에 넘기는 연결 함수"""
+    return SQLiteConnection(database, uri=uri, busy_timeout=busy_timeout)
+
+
+# ---- 저장소 ----
+
+_memory_ids = itertools.count(1)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    multi_statements = False
+
+    def __init__(self, path=":memory:", sample_data=True, pool_size=10,
+                 pool_timeout=5.0):
+        self.sample_data = sample_data
+        self.pool_timeout = pool_timeout
+
+        if path == ":memory:":
+            # 풀의 커넥션들이 같은 DB 를 보도록 이름 붙은 공유 메모리 DB
+            self.database = f"file:travelmate_mem_{os.getpid()}_{next(_memory_ids)}?mode=memory&cache=shared"
+            self.uri = True
+            self.pool_size = 1
+            # 마지막 커넥션이 닫히면 메모리 DB 가 사라지므로 하나는 계속 열어 둔다
+            self._keeper = connect(self.database, uri=True)
+        else:
+            self.database = path
+            self.uri = False
+            self.pool_size = pool_size
+            self._keeper = None
+
+    def initialize(self):
+        """테이블이 없으면 schema_sqlite.sql (+ 샘플 데이터) 실행"""
+        conn = connect(self.database, uri=self.uri)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'trips'")
+                if cur.fetchone():
+                    return False
+            if not self.uri:
+                conn.executescript("PRAGMA journal_mode = WAL;")
+            conn.executescript(_read("schema_sqlite.sql"))
+            if self.sample_data:
+                conn.executescript(_read("insert_sample_data.sql"))
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def create_pool(self):
+        from db_pool import ConnectionPool
+        self.initialize()
+        return ConnectionPool(
+            dict(database=self.database, uri=self.uri, busy_timeout=self.pool_timeout),
+            max_size=self.pool_size,
+            timeout=self.pool_timeout,
+            connect=connect,
+        )
+
+    def explain(self, cur, sql, params):
+        """느린 쿼리 기록용 실행 계획"""
+        # 접두어를 붙인 뒤 translate_sql 을 거치면 ^DELETE ... JOIN 같은 패턴이 안 맞으므로
+        # 먼저 SQLite 문법으로 바꾸고 접두어를 붙여 sqlite3 커서로 바로 실행한다
+        text = "EXPLAIN QUERY PLAN " + translate_sql(sql, params is not None)
+        cur._cur.execute(text, tuple(params) if params is not None else ())
+        return [{"id": r["id"], "parent": r["parent"], "detail": r["detail"]}
+                for r in cur.fetchall()]
+
+
+def _read(filename):
+    with open(os.path.join(BASE_DIR, filename), encoding="utf-8") as f:
+        return f.read()
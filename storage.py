@@ -0,0 +1,78 @@
+# --------------------------
+# 저장소(DB 종류) 선택
+# --------------------------
+# app.py 는 어떤 DB 인지 모르고 pool.acquire() → cursor().execute(...) 만 쓴다.
+# 여기서 설정(DB_BACKEND)에 맞는 저장소를 골라 커넥션 풀을 만든다.
+#
+#  - mysql  : 운영용. pymysql + MULTI_STATEMENTS (기존 설정 그대로)
+#  - sqlite : MySQL 없이 테스트 / 벤치마크. SQLITE_PATH 가 파일 경로 또는 ':memory:'
+#             (sqlite_backend.py 가 SQL 문법 차이를 실행 직전에 바꿔 준다)
+#
+# 저장소마다 다른 점
+#  - multi_statements : trip_snapshot 이 SELECT 여러 개를 한 번에 보낼 수 있는지
+#  - explain(cur, sql, params) : 느린 쿼리 기록에 붙일 실행 계획
+
+import json
+
+import pymysql
+
+from db_pool import ConnectionPool
+from sqlite_backend import SQLiteBackend
+
+
+class MySQLBackend:
+    name = "mysql"
+    multi_statements = True
+
+    def __init__(self, host, user, password, database, pool_size=10,
+                 pool_timeout=5.0, ping_interval=30.0):
+        self.connect_kwargs = dict(
+            host=host,
+            user=user,
+            password=password,
+            db=database,
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            # trip_detail 의 SELECT 여러 개를 한 번에 보내기 위해 (trip_snapshot.py)
+            client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS
+        )
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.ping_interval = ping_interval
+
+    def create_pool(self):
+        return ConnectionPool(
+            self.connect_kwargs,
+            max_size=self.pool_size,
+            timeout=self.pool_timeout,
+            ping_interval=self.ping_interval,
+        )
+
+    def explain(self, cur, sql, params):
+        cur.execute("EXPLAIN FORMAT=JSON " + sql, params)
+        row = cur.fetchone()
+        text = next(iter(row.values())) if row else None
+        return json.loads(text) if text else None
+
+
+def create_backend(config):
+    """app.config → 저장소 객체"""
+    kind = config.get('DB_BACKEND', 'mysql')
+    if kind == 'mysql':
+        return MySQLBackend(
+            host=config['DB_HOST'],
+            user=config['DB_USER'],
+            password=config['DB_PASSWORD'],
+            database=config['DB_NAME'],
+            pool_size=config['DB_POOL_SIZE'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            ping_interval=config['DB_POOL_PING_INTERVAL'],
+        )
+    if kind == 'sqlite':
+        return SQLiteBackend(
+            path=config.get('SQLITE_PATH', ':memory:'),
+            sample_data=config.get('SQLITE_SAMPLE_DATA', True),
+            pool_size=config['DB_POOL_SIZE'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    raise ValueError(f"알 수 없는 DB_BACKEND: {kind}")
@@ -0,0 +1,297 @@
+# --------------------------
+# 여행 지출 분석 (일자 / 도시 / 분류 / 결제자 / 통화별)
+# --------------------------
+# 지출 10만 건짜리 여행이어도 파이썬으로 행을 10만 개 가져오지 않는다.
+#
+#  1) SQL 에서 (결제일, 분류, 결제자, 통화, 도시) 조합마다 SUM / COUNT 로 묶어 둔 행만 읽는다.
+#     모든 분석은 이 조합들의 합으로 나오므로 잃는 정보가 없고, 행 수는 조합 수(보통 수천 개)로 줄어든다.
+#     금액은 SQL 에서 1전 단위 정수(CAST(ROUND(SUM(..) * 100) AS SIGNED INTEGER))로 받는다.
+#  2) 읽은 행을 열(column) 목록으로 바꾸고, 각 차원(일자 / 분류 / ...)을 정수 코드로 바꾼 뒤
+#     코드별 합계를 bincount 로 한 번에 낸다 (numpy 가 있으면 np.bincount, 없으면 같은 계산을 리스트로).
+#  3) 예산 소진(burn-down) 은 일자별 합계의 누적합, 참가자별 결제액 / 부담액도 일자별 누적으로 돌려준다.
+#
+# 도시는 지출에 연결된 액티비티의 Day 도시, 없으면 결제일에 해당하는 Day(여행 시작일 + day_no - 1)의 도시.
+# 여행 / Day / 참가자 / 지출 / N빵 / 액티비티 쿼리는 trip_snapshot 처럼 DB 왕복 1번에 보낸다.
+# 결과는 app.py 에서 (trip_id, version) 으로 캐시하므로 같은 version 이면 다시 계산하지 않는다.
+
+import datetime
+from itertools import accumulate
+
+from trip_snapshot import fetch_result_sets
+
+try:
+    import numpy as np
+except ImportError:     # numpy 가 없으면 파이썬 리스트로 같은 계산
+    np = None
+
+UNCATEGORIZED = "미분류"
+UNKNOWN_CITY = "미정"
+
+# (필드 이름, SQL)  — 모든 쿼리는 trip_id 파라미터 1개
+_QUERIES = [
+    ("trip", """
+        SELECT trip_id, title, start_date, end_date, total_budget_krw, version
+        FROM trips
+        WHERE trip_id = %s
+          AND deleted_at IS NULL
+    """),
+    ("destinations", """
+        SELECT day_no, city_name
+        FROM destinations
+        WHERE trip_id = %s
+        ORDER BY day_no
+    """),
+    ("participants", """
+        SELECT u.user_id, u.name
+        FROM trip_participants tp
+        JOIN users u ON tp.user_id = u.user_id
+        WHERE tp.trip_id = %s
+        ORDER BY tp.user_id
+    """),
+    ("expenses", """
+        SELECT DATE(e.paid_at)    AS paid_date,
+               e.category,
+               e.paid_by_user_id  AS user_id,
+               e.currency_code,
+               d.city_name,
+               COUNT(*)           AS expense_count,
+               CAST(ROUND(SUM(e.amount) * 100) AS SIGNED INTEGER)     AS amount_minor,
+               CAST(ROUND(SUM(e.amount_krw) * 100) AS SIGNED INTEGER) AS krw_minor
+        FROM expenses e
+        LEFT JOIN activities a ON a.activity_id = e.related_activity_id
+        LEFT JOIN destinations d ON d.destination_id = a.destination_id
+        WHERE e.trip_id = %s
+        GROUP BY DATE(e.paid_at), e.category, e.paid_by_user_id, e.currency_code, d.city_name
+    """),
+    ("shares", """
+        SELECT DATE(e.paid_at) AS paid_date,
+               ep.user_id,
+               CAST(ROUND(SUM(ep.share_amount_krw) * 100) AS SIGNED INTEGER) AS krw_minor
+        FROM expenses e
+        JOIN expense_participants ep ON ep.expense_id = e.expense_id
+        WHERE e.trip_id = %s
+        GROUP BY DATE(e.paid_at), ep.user_id
+    """),
+    ("planned", """
+        SELECT d.city_name,
+               CAST(ROUND(SUM(a.cost_krw) * 100) AS SIGNED INTEGER) AS krw_minor
+        FROM destinations d
+        JOIN activities a ON a.destination_id = d.destination_id
+        WHERE d.trip_id = %s
+        GROUP BY d.city_name
+    """),
+]
+
+
+# --------------------------
+# 열 단위 계산 도우미
+# --------------------------
+
+def _factorize(values):
+    """값 목록 → (정수 코드 목록, 코드 순서의 고유 값 목록)"""
+    index = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    return codes, list(index)
+
+
+def _bincount(codes, weights, size):
+    """codes 마다 weights(정수) 합계 → 길이 size 목록
+
+    np.bincount 는 float64 로 더하지만 1전 단위 정수 합이 2**53 (약 90조 원) 미만이면 정확하다
+    """
+    if np is not None and codes:
+        totals = np.bincount(np.asarray(codes, dtype=np.intp),
+                             weights=np.asarray(weights, dtype=np.float64),
+                             minlength=size)
+        return np.rint(totals).astype(np.int64).tolist()
+    totals = [0] * size
+    for code, weight in zip(codes, weights):
+        totals[code] += weight
+    return totals
+
+
+def _won(minor):
+    """1전 단위 정수 → JSON 에 넣을 원 단위 숫자"""
+    return minor / 100
+
+
+def _as_date(value):
+    """DATE(...) 결과 (MySQL 은 date, SQLite 는 'YYYY-MM-DD' 문자열) → date"""
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def _group(codes, labels, krw, counts):
+    return [(label, total, count) for label, total, count
+            in zip(labels, _bincount(codes, krw, len(labels)), _bincount(codes, counts, len(labels)))]
+
+
+# --------------------------
+# 분석
+# --------------------------
+
+def load_trip_analytics(conn, trip_id, multi_statements=True):
+    """여행 1개의 지출 분석 결과 (JSON 으로 바로 보낼 수 있는 dict, 없는 여행이면 None)"""
+    results = fetch_result_sets(conn, [sql for _, sql in _QUERIES], trip_id, multi_statements)
+    rows = {name: list(r) for (name, _), r in zip(_QUERIES, results)}
+    if not rows["trip"]:
+        return None
+    return analyze(rows["trip"][0], rows["destinations"], rows["participants"],
+                   rows["expenses"], rows["shares"], rows["planned"])
+
+
+def _day_axis(trip, dated):
+    """그래프 가로축: 여행 기간의 모든 날짜 + 기간 밖에서 결제한 날짜 (정렬)"""
+    start, end = _as_date(trip["start_date"]), _as_date(trip["end_date"])
+    days = set(dated)
+    if start and end and start <= end:
+        days.update(start + datetime.timedelta(days=i) for i in range((end - start).days + 1))
+    return sorted(days)
+
+
+def analyze(trip, destinations, participants, expense_groups, share_groups, planned_groups):
+    start = _as_date(trip["start_date"])
+    end = _as_date(trip["end_date"])
+    budget = trip["total_budget_krw"]
+
+    # Day 번호 → 도시 (같은 Day 에 도시가 여러 개면 첫 번째)
+    day_city = {}
+    for d in destinations:
+        day_city.setdefault(d["day_no"], d["city_name"])
+
+    # --- 묶인 지출 행 → 열 ---
+    paid_dates = [_as_date(r["paid_date"]) for r in expense_groups]
+    krw = [r["krw_minor"] or 0 for r in expense_groups]
+    counts = [r["expense_count"] for r in expense_groups]
+
+    days = _day_axis(trip, {d for d in paid_dates if d is not None})
+    day_index = {d: i for i, d in enumerate(days)}
+    undated = len(days)                    # 결제일이 없는 지출은 맨 끝 칸에 모아 둔다
+
+    def day_no(day):
+        return (day - start).days + 1 if start and day else None
+
+    def city_of(row, day):
+        return row["city_name"] or day_city.get(day_no(day)) or UNKNOWN_CITY
+
+    day_codes = [undated if d is None else day_index[d] for d in paid_dates]
+    category_codes, categories = _factorize(r["category"] or UNCATEGORIZED for r in expense_groups)
+    city_codes, cities = _factorize(city_of(r, d) for r, d in zip(expense_groups, paid_dates))
+    currency_codes, currencies = _factorize(r["currency_code"] for r in expense_groups)
+
+    # 참가자 + (혹시 참가자 목록에서 빠진) 결제자 / 부담자
+    names = {p["user_id"]: p["name"] for p in participants}
+    user_ids = list(names)
+    for r in list(expense_groups) + list(share_groups):
+        if r["user_id"] not in names:
+            names[r["user_id"]] = None
+            user_ids.append(r["user_id"])
+    user_index = {u: i for i, u in enumerate(user_ids)}
+
+    # --- 일자별 / 예산 소진 ---
+    ndays = len(days) + 1
+    day_totals = _bincount(day_codes, krw, ndays)
+    day_counts = _bincount(day_codes, counts, ndays)
+    spent = sum(day_totals)
+    cumulative = list(accumulate(day_totals[:undated]))
+
+    trip_days = [d for d in days if start and end and start <= d <= end]
+    by_day = []
+    for i, day in enumerate(days):
+        item = {
+            "date": day.isoformat(),
+            "day_no": day_no(day),
+            "city": day_city.get(day_no(day)),
+            "spent_krw": _won(day_totals[i]),
+            "expense_count": day_counts[i],
+            "cumulative_krw": _won(cumulative[i]),
+            "remaining_krw": None,
+            "planned_remaining_krw": None,     # 예산을 기간 동안 고르게 쓴다면 남았을 금액
+        }
+        if budget is not None:
+            item["remaining_krw"] = round(budget - _won(cumulative[i]), 2)
+            if trip_days and start <= day <= end:
+                elapsed = (day - start).days + 1
+                item["planned_remaining_krw"] = round(budget - budget * elapsed / len(trip_days), 2)
+        by_day.append(item)
+
+    # --- 분류 / 도시 / 통화 ---
+    by_category = [
+        {"category": label, "total_krw": _won(total), "expense_count": count,
+         "ratio": round(total / spent, 4) if spent else 0.0}
+        for label, total, count in _group(category_codes, categories, krw, counts)
+    ]
+    by_category.sort(key=lambda c: -c["total_krw"])
+
+    planned = {}
+    for r in planned_groups:
+        city = r["city_name"] or UNKNOWN_CITY
+        planned[city] = planned.get(city, 0) + (r["krw_minor"] or 0)
+    by_city = [
+        {"city": label, "spent_krw": _won(total), "expense_count": count,
+         "planned_krw": _won(planned.get(label, 0))}
+        for label, total, count in _group(city_codes, cities, krw, counts)
+    ]
+    for city, total in planned.items():
+        if city not in cities:
+            by_city.append({"city": city, "spent_krw": 0.0, "expense_count": 0,
+                            "planned_krw": _won(total)})
+    by_city.sort(key=lambda c: -c["spent_krw"])
+
+    amounts = [r["amount_minor"] or 0 for r in expense_groups]
+    by_currency = [
+        {"currency_code": code, "amount": _won(amount), "total_krw": _won(total),
+         "expense_count": count}
+        for (code, total, count), amount
+        in zip(_group(currency_codes, currencies, krw, counts),
+               _bincount(currency_codes, amounts, len(currencies)))
+    ]
+    by_currency.sort(key=lambda c: -c["total_krw"])
+
+    # --- 참가자별 결제액 vs 부담액 (사용자 × 일자 칸에 합계 → 일자 누적) ---
+    nusers = len(user_ids)
+    paid_cells = _bincount(
+        [user_index[r["user_id"]] * ndays + d for r, d in zip(expense_groups, day_codes)],
+        krw, nusers * ndays)
+    share_dates = [_as_date(r["paid_date"]) for r in share_groups]
+    share_cells = _bincount(
+        [user_index[r["user_id"]] * ndays + (undated if d is None else day_index[d])
+         for r, d in zip(share_groups, share_dates)],
+        [r["krw_minor"] or 0 for r in share_groups], nusers * ndays)
+
+    users = []
+    for i, user_id in enumerate(user_ids):
+        paid_row = paid_cells[i * ndays:(i + 1) * ndays]
+        share_row = share_cells[i * ndays:(i + 1) * ndays]
+        users.append({
+            "user_id": user_id,
+            "name": names[user_id],
+            "paid_krw": _won(sum(paid_row)),
+            "share_krw": _won(sum(share_row)),
+            "balance_krw": _won(sum(paid_row) - sum(share_row)),
+            # by_day 와 같은 순서의 누적 금액 (결제일 없는 지출은 합계에만 들어감)
+            "paid_series": [_won(v) for v in accumulate(paid_row[:undated])],
+            "share_series": [_won(v) for v in accumulate(share_row[:undated])],
+        })
+
+    return {
+        "trip_id": trip["trip_id"],
+        "title": trip["title"],
+        "version": trip["version"],
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "expense_count": sum(counts),
+        "budget": {
+            "total_budget_krw": budget,
+            "spent_krw": _won(spent),
+            "remaining_krw": None if budget is None else round(budget - _won(spent), 2),
+            "used_ratio": round(_won(spent) / budget, 4) if budget else None,
+            "undated_krw": _won(day_totals[undated]),
+        },
+        "by_day": by_day,
+        "by_category": by_category,
+        "by_city": by_city,
+        "by_currency": by_currency,
+        "users": users,
+    }
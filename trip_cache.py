@@ -0,0 +1,138 @@
+# --------------------------
+# 여행 상세 페이지 캐시 (버전 + ETag)
+# --------------------------
+# trips.version 은 그 여행에 속한 데이터(지출, 액티비티, Day, 참가자, 정산)가
+# 바뀔 때마다 같은 트랜잭션 안에서 1씩 올린다 (bump_trip_version).
+# 쓰기 라우트는 이걸 트랜잭션 맨 앞에서 불러서 trips 행을 잠가 두고, 삭제 표시된 여행이면 404.
+# (trip_delete 의 deleted_at 표시와 순서가 정해지므로 정리 중인 여행에 새 행이 생기지 않는다)
+#
+#  - trip_detail 은 version 만 먼저 읽어서 ETag 를 만들고,
+#    브라우저가 보낸 If-None-Match 와 같으면 무거운 쿼리 없이 304 를 돌려준다.
+#  - RenderCache 는 (trip_id, version) → 렌더링된 HTML 을 메모리에 들고 있는 LRU.
+#    version 이 바뀌면 키가 달라지므로 따로 지울 필요가 없고,
+#    전체 크기가 max_bytes 를 넘으면 오래 안 쓴 것부터 버린다.
+#  - 페이지 캐시가 빗나가도 타임라인 / 지출 / 정산 부분은 따로 캐시된다.
+#    부분마다 그리는 데 쓴 데이터로 fragment_key 를 만들어서, 지출만 바뀌었으면
+#    타임라인은 예전 HTML 을 그대로 다시 쓴다 (RenderCache 에 ((trip_id, 부분), key) 로 저장).
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+_BUMP_SQL = """
+    UPDATE trips
+    SET version = version + 1
+    WHERE trip_id = %s
+      AND deleted_at IS NULL
+"""
+
+_VERSION_SQL = """
+    SELECT version
+    FROM trips
+    WHERE trip_id = %s
+      AND deleted_at IS NULL
+"""
+
+
+def bump_trip_version(cur, trip_id):
+    """여행 데이터가 바뀌었음을 기록 (변경하는 쿼리와 같은 트랜잭션에서 호출)
+
+    없거나 삭제 표시된 여행이면 아무것도 안 하고 False
+    """
+    if trip_id is None:
+        return False
+    cur.execute(_BUMP_SQL, (trip_id,))
+    return cur.rowcount == 1
+
+
+def get_trip_version(conn, trip_id):
+    """여행의 현재 version (없거나 삭제된 여행이면 None)"""
+    with conn.cursor() as cur:
+        cur.execute(_VERSION_SQL, (trip_id,))
+        row = cur.fetchone()
+    return row["version"] if row else None
+
+
+def trip_etag(trip_id, version):
+    return f"trip-{trip_id}-v{version}"
+
+
+def fragment_key(*values):
+    """부분 템플릿에 넘기는 데이터 → 짧은 해시 (데이터가 같으면 HTML 도 같다)"""
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """(trip_id, version) → HTML, 메모리 상한이 있는 LRU"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items = OrderedDict()    # key -> (html, size)
+        self._latest = {}              # trip_id -> 캐시에 있는 version
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, trip_id, version):
+        if not self.enabled:
+            return None
+        key = (trip_id, version)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, trip_id, version, html):
+        if not self.enabled:
+            return
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            # 같은 여행의 예전 version 은 다시 쓰일 일이 없으니 바로 버린다
+            old_version = self._latest.get(trip_id)
+            if old_version is not None and old_version != version:
+                self._pop((trip_id, old_version))
+
+            self._pop((trip_id, version))
+            self._items[(trip_id, version)] = (html, size)
+            self._latest[trip_id] = version
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                (old_trip, old_ver), (_, old_size) = self._items.popitem(last=False)
+                self._bytes -= old_size
+                if self._latest.get(old_trip) == old_ver:
+                    del self._latest[old_trip]
+
+    def evict_trip(self, trip_id):
+        """여행 삭제 등으로 더 이상 필요 없는 항목 제거"""
+        with self._lock:
+            version = self._latest.pop(trip_id, None)
+            if version is not None:
+                self._pop((trip_id, version))
+
+    def _pop(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,177 @@
+# --------------------------
+# 여행 장부 내보내기 (CSV / JSON Lines)
+# --------------------------
+# 지출 / N빵 내역 / 액티비티를 파일 하나로 내려준다.
+# N빵 행이 수백만 개인 여행도 있으므로 fetchall() 로 전부 읽지 않고
+#  - pymysql SSDictCursor (unbuffered) 로 서버에서 한 행씩 받아서
+#  - 바로 CSV / JSON 한 줄로 바꾸고, 어느 정도 모이면 yield 한다.
+# → 메모리는 행 수와 상관없이 일정하고, 첫 바이트도 바로 나간다.
+#
+# 주의
+#  - unbuffered 커서는 결과를 끝까지 읽기 전까지 그 커넥션으로 다른 쿼리를 못 보낸다.
+#    그래서 내보내기 전용 커넥션을 제너레이터가 처음 돌 때 풀에서 빌리고 끝날 때 반납한다.
+#    (HEAD 요청처럼 본문을 한 번도 안 읽는 응답은 커넥션을 아예 빌리지 않는다)
+#  - ORDER BY 가 인덱스 순서와 다르면 MySQL 이 전부 정렬한 뒤에야 보내기 시작하므로
+#    지출은 idx_exp_trip_paid 순서(paid_at, expense_id)로,
+#    N빵 내역은 정렬 없이 (지출 인덱스 순서대로 조인되어 나온다) 읽는다.
+#  - 다운로드가 중간에 끊기면 남은 행을 다 읽어 버리는 대신 커넥션 자체를 버린다.
+#
+#   python trip_export.py <trip_id> [csv|jsonl] > trip.csv
+
+import csv
+import datetime
+import decimal
+import io
+import json
+import sys
+
+import pymysql
+
+# CSV 열 (세 종류 레코드를 한 파일에 담으므로 해당 없는 칸은 비워 둔다)
+CSV_COLUMNS = [
+    "record_type", "record_id", "expense_id", "day_no", "city_name", "name",
+    "user_name", "category", "amount", "currency_code", "amount_krw",
+    "paid_at", "is_settled", "memo",
+]
+
+# 이만큼 모이면 한 번에 내보낸다 (행마다 yield 하면 소켓 write 가 너무 잘게 쪼개짐)
+FLUSH_BYTES = 64 * 1024
+
+_SECTIONS = [
+    ("expense", """
+        SELECT e.expense_id AS record_id,
+               e.expense_id,
+               u.name AS user_name,
+               e.category,
+               e.amount,
+               e.currency_code,
+               e.amount_krw,
+               e.paid_at,
+               e.memo
+        FROM expenses e
+        JOIN users u ON e.paid_by_user_id = u.user_id
+        WHERE e.trip_id = %s
+        ORDER BY e.paid_at, e.expense_id
+    """),
+    ("share", """
+        SELECT ep.ep_id AS record_id,
+               ep.expense_id,
+               u.name AS user_name,
+               ep.share_amount_krw AS amount_krw,
+               ep.is_settled
+        FROM expenses e
+        JOIN expense_participants ep ON ep.expense_id = e.expense_id
+        JOIN users u ON ep.user_id = u.user_id
+        WHERE e.trip_id = %s
+    """),
+    ("activity", """
+        SELECT a.activity_id AS record_id,
+               d.day_no,
+               d.city_name,
+               a.name,
+               a.category,
+               a.cost AS amount,
+               a.currency_code,
+               a.cost_krw AS amount_krw,
+               a.memo
+        FROM activities a
+        JOIN destinations d ON a.destination_id = d.destination_id
+        WHERE d.trip_id = %s
+        ORDER BY d.day_no, a.start_time
+    """),
+]
+
+
+def iter_records(conn, trip_id):
+    """(레코드 종류, 행 dict) 를 한 행씩 돌려준다 (unbuffered)"""
+    for record_type, sql in _SECTIONS:
+        cur = conn.cursor(pymysql.cursors.SSDictCursor)
+        cur.execute(sql, (trip_id,))
+        row = cur.fetchone()
+        while row is not None:
+            yield record_type, row
+            row = cur.fetchone()
+        # 여기까지 왔으면 결과를 다 읽었으므로 close() 가 바로 끝난다
+        cur.close()
+
+
+def _json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)    # 금액은 float 로 바꾸지 않고 그대로
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    raise TypeError(f"JSON 으로 바꿀 수 없는 값: {value!r}")
+
+
+def _csv_lines(records):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    yield buf.getvalue()
+    for record_type, row in records:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow([record_type if col == "record_type" else row.get(col)
+                         for col in CSV_COLUMNS])
+        yield buf.getvalue()
+
+
+def _jsonl_lines(records):
+    for record_type, row in records:
+        row["record_type"] = record_type
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+
+
+def _batched(lines):
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def stream_export(acquire, trip_id, fmt="csv"):
+    """내보내기 본문을 조각(str)으로 돌려주는 제너레이터
+
+    acquire: 커넥션을 빌려오는 함수 (pool.acquire). 첫 조각을 만들 때 빌리고,
+    끝나면(중간에 끊기거나 close() 되어도) 여기서 반납한다.
+    """
+    lines = _csv_lines if fmt == "csv" else _jsonl_lines
+    conn = acquire()
+    finished = False
+    try:
+        yield from _batched(lines(iter_records(conn, trip_id)))
+        finished = True
+    finally:
+        if not finished:
+            # 읽다 만 unbuffered 결과가 남아 있으면 풀에 돌려줄 수 없다
+            conn.discard()
+        conn.close()
+
+
+def main(argv):
+    if len(argv) < 2 or (len(argv) > 2 and argv[2] not in ("csv", "jsonl")):
+        print("사용법: python trip_export.py <trip_id> [csv|jsonl]")
+        return 2
+
+    trip_id = int(argv[1])
+    fmt = argv[2] if len(argv) > 2 else "csv"
+
+    from app import pool
+    out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+    for chunk in stream_export(pool.acquire, trip_id, fmt):
+        out.write(chunk)
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,136 @@
+# --------------------------
+# 여행 목록 페이지네이션 (keyset)
+# --------------------------
+# OFFSET 을 쓰면 뒤 페이지로 갈수록 앞의 행을 다 읽고 버려야 해서 느려진다.
+# 대신 (start_date, trip_id) 정렬 기준으로 "이전 페이지 마지막 행 다음부터" 읽는다.
+# → idx_trips_start (start_date [+ trip_id]) 에서 바로 그 위치부터 LIMIT 만큼만 읽으므로
+#   몇 번째 페이지든 걸리는 시간이 같다.
+#
+# 커서는 "start_date|trip_id" 를 base64 로 감싼 문자열.
+# MySQL 은 ORDER BY 에서 NULL 을 가장 앞에 두므로 출발일 없는 여행이 맨 앞에 온다.
+
+import base64
+import datetime
+
+
+def encode_cursor(row):
+    start_date = row["start_date"]
+    if isinstance(start_date, (datetime.date, datetime.datetime)):
+        start_date = start_date.isoformat()[:10]
+    raw = f"{start_date or ''}|{row['trip_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(start_date 문자열 또는 None, trip_id) / 잘못된 커서면 None"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_date, trip_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        if start_date:
+            datetime.date.fromisoformat(start_date)
+        return (start_date or None, int(trip_id))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_date(value):
+    """'YYYY-MM-DD' 이면 그대로, 아니면 None"""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+def _after(key):
+    start_date, trip_id = key
+    if start_date is None:
+        return ("((start_date IS NULL AND trip_id > %s) OR start_date IS NOT NULL)",
+                [trip_id])
+    return ("(start_date > %s OR (start_date = %s AND trip_id > %s))",
+            [start_date, start_date, trip_id])
+
+
+def _before(key):
+    start_date, trip_id = key
+    if start_date is None:
+        return ("(start_date IS NULL AND trip_id < %s)", [trip_id])
+    return ("(start_date < %s OR (start_date = %s AND trip_id < %s) OR start_date IS NULL)",
+            [start_date, start_date, trip_id])
+
+
+def page_query(size, after_key=None, before_key=None,
+               date_from=None, date_to=None, title_prefix=None):
+    """여행 목록 한 페이지를 읽는 (sql, params)  — size + 1 개를 읽는다
+
+    after_key / before_key 는 decode_cursor() 결과 (둘 다 있으면 after_key 기준)
+    """
+    where = ["deleted_at IS NULL"]    # 삭제 요청된 여행은 정리 전에도 안 보이게
+    params = []
+
+    # 필터 (출발일 범위 → idx_trips_start, 제목 앞부분 → idx_trips_title)
+    if date_from:
+        where.append("start_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("start_date <= %s")
+        params.append(date_to)
+    if title_prefix:
+        # 이스케이프 문자는 '!' (역슬래시 기본값은 MySQL 에만 있어서 SQLite 와 맞춤)
+        escaped = (title_prefix.replace("!", "!!")
+                   .replace("%", "!%").replace("_", "!_"))
+        where.append("title LIKE %s ESCAPE '!'")
+        params.append(escaped + "%")
+
+    if before_key is not None and after_key is None:
+        cond, cond_params = _before(before_key)
+        order = "start_date DESC, trip_id DESC"
+    else:
+        order = "start_date, trip_id"
+        cond, cond_params = _after(after_key) if after_key else (None, [])
+
+    if cond:
+        where.append(cond)
+        params.extend(cond_params)
+
+    sql = "SELECT trip_id, title, start_date, end_date FROM trips"
+    sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT %s"
+    params.append(size + 1)    # 1개 더 읽어서 다음 페이지가 있는지 확인
+    return sql, params
+
+
+def fetch_trip_page(conn, size, after=None, before=None,
+                    date_from=None, date_to=None, title_prefix=None):
+    """여행 목록 한 페이지
+
+    돌려주는 값: dict(trips, next_cursor, prev_cursor)
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+    sql, params = page_query(size, after_key, before_key,
+                             date_from=date_from, date_to=date_to,
+                             title_prefix=title_prefix)
+
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = list(cur.fetchall())
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    if before_key is not None:
+        # 거꾸로 읽었으니 다시 뒤집기
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after_key is not None, has_more
+
+    return {
+        "trips": rows,
+        "next_cursor": encode_cursor(rows[-1]) if rows and has_next else None,
+        "prev_cursor": encode_cursor(rows[0]) if rows and has_prev else None,
+    }
@@ -0,0 +1,326 @@
+# --------------------------
+# 여행 삭제 (숨김 → 백그라운드 정리)
+# --------------------------
+# 예전 trip_delete 는 DELETE 9개를 한 트랜잭션에서 실행해서, 행이 수십만 개인 여행은
+# 락을 오래 잡고 undo log 가 커지고 요청이 타임아웃 났다.
+#
+#  1) mark_deleted : trips.deleted_at 만 채우고 바로 커밋 → 목록 / 상세에서 즉시 안 보임
+#  2) purge_trip   : 테이블마다 (자식 → 부모 순서) 그 여행 행의 PK 를 batch 개씩 순서대로 골라
+#                    (keyset) 그 구간을 지우고 매번 커밋 (짧은 트랜잭션, 한 번에 지우는 행 ≤ batch)
+#                    구간마다 풀에서 커넥션을 빌렸다 돌려주고, 사이에 pause 초 쉬어서
+#                    다른 요청이 끼어들 수 있게
+#  3) 다 지우면 trip_balances / trip_expense_rollups / trips 행 삭제, trip_purges.status = 'done'
+#
+# 진행 상황(step, rows_deleted, batches)은 지우는 트랜잭션과 같이 trip_purges 에 기록된다.
+# 지울 PK 는 남아 있는 행에서 다시 고르므로, 서버가 중간에 죽어도 그냥 다시 실행하면 이어서 진행된다.
+# 백그라운드 실행 / 재시작 후 이어서 하기는 jobs 작업('trip_purge', jobs.py)이 맡는다.
+#
+#   python trip_purge.py [trip_id] [--batch 500]   # 남은 정리 작업을 지금 실행
+
+import sys
+import time
+
+from trip_cache import bump_trip_version
+
+DEFAULT_BATCH = 500
+
+# (step, 그 여행 행의 다음 PK batch 개를 고르는 SQL, 그 PK 구간을 지우는 SQL)
+#  - 자식 → 부모 순서 (N빵 → 지출, 지출 → 액티비티(related_activity_id) → Day)
+#  - PK > 직전 구간의 마지막 id 부터 ORDER BY PK LIMIT batch 로 고르고 (keyset)
+#    고른 첫 id ~ 마지막 id 를 지운다 → 한 트랜잭션에서 지우는 행은 batch 개 이하이고,
+#    다른 여행 행만 있는 빈 구간을 하나씩 훑지 않는다
+_STEPS = [
+    ("expense_participants",
+     """SELECT ep.ep_id AS id
+        FROM expenses e
+        JOIN expense_participants ep ON ep.expense_id = e.expense_id
+        WHERE e.trip_id = %s
+          AND ep.ep_id > %s
+        ORDER BY ep.ep_id
+        LIMIT %s""",
+     """DELETE ep
+        FROM expense_participants ep
+        JOIN expenses e ON ep.expense_id = e.expense_id
+        WHERE e.trip_id = %s
+          AND ep.ep_id BETWEEN %s AND %s"""),
+    ("expenses",
+     """SELECT expense_id AS id FROM expenses
+        WHERE trip_id = %s AND expense_id > %s
+        ORDER BY expense_id LIMIT %s""",
+     "DELETE FROM expenses WHERE trip_id = %s AND expense_id BETWEEN %s AND %s"),
+    ("activities",
+     """SELECT a.activity_id AS id
+        FROM destinations d
+        JOIN activities a ON a.destination_id = d.destination_id
+        WHERE d.trip_id = %s
+          AND a.activity_id > %s
+        ORDER BY a.activity_id
+        LIMIT %s""",
+     """DELETE a
+        FROM activities a
+        JOIN destinations d ON a.destination_id = d.destination_id
+        WHERE d.trip_id = %s
+          AND a.activity_id BETWEEN %s AND %s"""),
+    ("destinations",
+     """SELECT destination_id AS id FROM destinations
+        WHERE trip_id = %s AND destination_id > %s
+        ORDER BY destination_id LIMIT %s""",
+     "DELETE FROM destinations WHERE trip_id = %s AND destination_id BETWEEN %s AND %s"),
+    ("settlement_transactions",
+     """SELECT id FROM settlement_transactions
+        WHERE trip_id = %s AND id > %s
+        ORDER BY id LIMIT %s""",
+     "DELETE FROM settlement_transactions WHERE trip_id = %s AND id BETWEEN %s AND %s"),
+    ("transports",
+     """SELECT transport_id AS id FROM transports
+        WHERE trip_id = %s AND transport_id > %s
+        ORDER BY transport_id LIMIT %s""",
+     "DELETE FROM transports WHERE trip_id = %s AND transport_id BETWEEN %s AND %s"),
+    ("trip_participants",
+     """SELECT tp_id AS id FROM trip_participants
+        WHERE trip_id = %s AND tp_id > %s
+        ORDER BY tp_id LIMIT %s""",
+     "DELETE FROM trip_participants WHERE trip_id = %s AND tp_id BETWEEN %s AND %s"),
+]
+
+
+def mark_deleted(cur, trip_id):
+    """여행을 숨기고 정리 작업을 등록 (이미 삭제된 여행이면 False)"""
+    # 상세 페이지 캐시 무효화 (trips.version + 1, 삭제 표시 전에)
+    # → trips 행을 잠그므로 이 여행에 쓰는 중인 요청이 있으면 그게 끝난 뒤에 표시된다
+    if not bump_trip_version(cur, trip_id):
+        return False
+
+    cur.execute("""
+        UPDATE trips
+        SET deleted_at = NOW()
+        WHERE trip_id = %s
+          AND deleted_at IS NULL
+    """, (trip_id,))
+
+    cur.execute("""
+        INSERT INTO trip_purges (trip_id, status, requested_at)
+        VALUES (%s, 'pending', NOW())
+        ON DUPLICATE KEY UPDATE status = VALUES(status), error = NULL
+    """, (trip_id,))
+    return True
+
+
+def _progress(cur, trip_id, step, rows):
+    cur.execute("""
+        UPDATE trip_purges
+        SET status = 'running',
+            step = %s,
+            rows_deleted = rows_deleted + %s,
+            batches = batches + 1,
+            updated_at = NOW()
+        WHERE trip_id = %s
+    """, (step, rows, trip_id))
+
+
+def _purge_batch(acquire, trip_id, step, ids_sql, delete_sql, after, batch):
+    """after 다음 PK batch 개를 골라 그 구간을 지우고 커밋 → (고른 마지막 id 또는 None, 지운 행 수)"""
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(ids_sql, (trip_id, after, batch))
+            ids = [r["id"] for r in cur.fetchall()]
+            deleted = 0
+            if ids:
+                cur.execute(delete_sql, (trip_id, ids[0], ids[-1]))
+                deleted = cur.rowcount
+                if deleted:
+                    _progress(cur, trip_id, step, deleted)
+        conn.commit()
+        return (ids[-1] if ids else None), deleted
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def purge_trip(acquire, trip_id, batch=DEFAULT_BATCH, pause=0.0, on_progress=None):
+    """삭제 표시된 여행의 딸린 행을 PK batch 개씩 지우고 마지막에 trips 행 삭제
+
+    acquire: 커넥션을 빌려오는 함수 (pool.acquire)
+    반환값: 이번에 지운 행 수 (trips 행 포함)
+    """
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT trip_id, deleted_at
+                FROM trips
+                WHERE trip_id = %s
+            """, (trip_id,))
+            trip = cur.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+
+    if trip is not None and trip["deleted_at"] is None:
+        raise ValueError(f"삭제 표시되지 않은 여행입니다: {trip_id}")
+
+    # 삭제 표시된 여행에는 쓰기 라우트가 404 를 돌려주므로 (bump_trip_version)
+    # 한 번 훑고 나면 새로 생기는 행이 없다
+    total = 0
+    if trip is not None:
+        for step, ids_sql, delete_sql in _STEPS:
+            after = 0
+            while True:
+                after, deleted = _purge_batch(acquire, trip_id, step, ids_sql, delete_sql,
+                                              after, batch)
+                if after is None:
+                    break
+                total += deleted
+                if on_progress is not None:
+                    on_progress(trip_id, step, deleted)
+                if pause:
+                    time.sleep(pause)
+
+    # 마지막: 정산 요약(여행 인원 수만큼) + 지출 요약(결제일 × 카테고리 수만큼) + trips 행
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM trip_balances
+                WHERE trip_id = %s
+            """, (trip_id,))
+            last = cur.rowcount
+
+            cur.execute("""
+                DELETE FROM trip_expense_rollups
+                WHERE trip_id = %s
+            """, (trip_id,))
+            last += cur.rowcount
+
+            cur.execute("""
+                DELETE FROM trips
+                WHERE trip_id = %s
+                  AND deleted_at IS NOT NULL
+            """, (trip_id,))
+            last += cur.rowcount
+
+            cur.execute("""
+                UPDATE trip_purges
+                SET status = 'done',
+                    step = NULL,
+                    rows_deleted = rows_deleted + %s,
+                    updated_at = NOW(),
+                    finished_at = NOW()
+                WHERE trip_id = %s
+            """, (last, trip_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return total + last
+
+
+_UNFINISHED_SQL = """
+    SELECT trip_id
+    FROM trip_purges
+    WHERE status <> 'done'
+    ORDER BY requested_at, trip_id
+"""
+
+
+def unfinished_purges(cur):
+    """아직 끝나지 않은 정리 작업의 trip_id 목록 (오래된 요청부터)"""
+    cur.execute(_UNFINISHED_SQL)
+    return [r["trip_id"] for r in cur.fetchall()]
+
+
+def purge_status(cur, limit=50):
+    cur.execute("""
+        SELECT trip_id, status, step, rows_deleted, batches, error,
+               requested_at, updated_at, finished_at
+        FROM trip_purges
+        ORDER BY requested_at DESC, trip_id DESC
+        LIMIT %s
+    """, (limit,))
+    return cur.fetchall()
+
+
+# --------------------------
+# 백그라운드 작업 (jobs.py)
+# --------------------------
+
+def purge_job(ctx, payload, batch=DEFAULT_BATCH, pause=0.0):
+    """jobs 작업 'trip_purge': {'trip_id': ..}  (실패하면 trip_purges 에도 기록하고 다시 시도)"""
+    trip_id = payload["trip_id"]
+    done = [0]
+
+    def report(trip_id, step, deleted):
+        done[0] += deleted
+        ctx.progress(done[0], message=step)
+
+    try:
+        purge_trip(ctx.acquire, trip_id, batch=batch, pause=pause, on_progress=report)
+    except Exception as e:
+        _mark_failed(ctx.acquire, trip_id, e)
+        raise
+
+
+def _mark_failed(acquire, trip_id, error):
+    """실패 기록 (다음에 다시 시작할 때 resume 대상)"""
+    try:
+        conn = acquire()
+    except Exception:
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE trip_purges
+                SET status = 'failed', error = %s, updated_at = NOW()
+                WHERE trip_id = %s
+            """, (str(error)[:255], trip_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def main(argv):
+    batch = DEFAULT_BATCH
+    args = list(argv[1:])
+    if "--batch" in args:
+        i = args.index("--batch")
+        batch = int(args[i + 1])
+        del args[i:i + 2]
+
+    from app import pool
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            trip_ids = [int(args[0])] if args else unfinished_purges(cur)
+        conn.commit()
+    finally:
+        conn.close()
+
+    if not trip_ids:
+        print("남은 정리 작업 없음")
+        return 0
+
+    def report(trip_id, step, deleted):
+        print(f"  trip {trip_id}: {step} {deleted}행")
+
+    failed = 0
+    for trip_id in trip_ids:
+        try:
+            total = purge_trip(pool.acquire, trip_id, batch=batch, on_progress=report)
+        except Exception as e:
+            _mark_failed(pool.acquire, trip_id, e)
+            print(f"trip {trip_id}: 실패 ({e})")
+            failed += 1
+            continue
+        print(f"trip {trip_id}: {total:,}행 삭제 완료")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
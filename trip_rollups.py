@@ -0,0 +1,301 @@
+# --------------------------
+# 여러 여행 요약 (대시보드)
+# --------------------------
+# 여행마다 trip_detail 처럼 expenses / expense_participants 를 GROUP BY 하면
+# 여행 5만 개 대시보드가 지출 수천만 행을 훑게 된다. /dashboard 는 요약 테이블만 읽는다.
+#
+#  - trip_expense_rollups  : 여행 × 결제일 × 카테고리 합계 (지출 저장 트랜잭션에서 ledger.py 가 갱신)
+#  - trip_balances         : 여행 × 참가자 결제액 / 부담액 / 송금 (ledger.py)
+#  - expense_month_rollups : 모든 여행의 월 × 카테고리 합계 (아래 compact 가 주기적으로 다시 채움)
+#
+# 화면은 월 × 카테고리 요약(수백 행) + 여행 목록 한 페이지(trip_pages 의 keyset 페이지네이션)의
+# 요약 행(여행 수 × 결제일 × 카테고리, 수천 행)만 읽는다.
+#
+# compact (jobs 주기 작업 'rollup_compact'):
+#  1) trip_id 구간(batch 개씩)마다 expense_count 가 0 이 된 요약 행을 지우고 커밋
+#     (지출의 결제일 / 카테고리를 고치거나 지우면 예전 행이 0 으로 남는다)
+#  2) 같은 구간의 (삭제되지 않은) 여행 요약을 월 × 카테고리로 더해 둔다 (1전 단위 정수)
+#  3) 다 훑으면 expense_month_rollups 를 한 트랜잭션에서 통째로 바꾼다
+# 중간에 멈춰도 다음 실행이 처음부터 다시 더하므로 결과는 같다.
+#
+#   python trip_rollups.py compact [--batch 1000]   # 지금 정리 + 월 요약 다시 계산
+#   python trip_rollups.py show                     # 월 × 카테고리 요약 출력
+
+import datetime
+import sys
+import time
+
+from ledger import UNDATED_DAY
+from money import from_minor, to_minor
+
+DEFAULT_BATCH = 1000
+UNDATED_MONTH = datetime.date.fromisoformat(UNDATED_DAY)
+
+
+def _as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+# compact: trip_id 구간의 요약 행 (삭제된 여행 제외)  (파라미터: first_id, last_id)
+_CHUNK_SQL = """
+    SELECT r.trip_id, r.paid_day, r.category, r.expense_count, r.total_krw
+    FROM trip_expense_rollups r
+    JOIN trips t ON t.trip_id = r.trip_id
+    WHERE r.trip_id BETWEEN %s AND %s
+      AND t.deleted_at IS NULL
+"""
+
+_MONTHS_SQL = """
+    SELECT month_start, category, trip_count, expense_count, total_krw, computed_at
+    FROM expense_month_rollups
+    ORDER BY month_start, category
+"""
+
+# 여행 목록 한 페이지 분량 ({ids} = trip_id 개수만큼의 %s)
+_TRIP_BUDGETS_SQL = """
+    SELECT trip_id, total_budget_krw
+    FROM trips
+    WHERE trip_id IN ({ids})
+"""
+
+_TRIP_CATEGORIES_SQL = """
+    SELECT trip_id, category,
+           SUM(expense_count) AS expense_count,
+           SUM(total_krw) AS total_krw
+    FROM trip_expense_rollups
+    WHERE trip_id IN ({ids})
+    GROUP BY trip_id, category
+"""
+
+_TRIP_BALANCES_SQL = """
+    SELECT trip_id,
+           COUNT(*) AS members,
+           SUM(CASE WHEN total_paid - total_share + settled_out - settled_in > 0
+                    THEN total_paid - total_share + settled_out - settled_in
+                    ELSE 0 END) AS outstanding
+    FROM trip_balances
+    WHERE trip_id IN ({ids})
+    GROUP BY trip_id
+"""
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+# --------------------------
+# 정리 (compact)
+# --------------------------
+
+def _trip_range(acquire):
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT MIN(trip_id) AS lo, MAX(trip_id) AS hi
+                FROM trip_expense_rollups
+            """)
+            row = cur.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return row["lo"], row["hi"]
+
+
+def _compact_chunk(acquire, first_id, last_id, months):
+    """trip_id 구간 1개: 0 이 된 행 삭제 + 월 × 카테고리 합계에 더하기 → 지운 행 수"""
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM trip_expense_rollups
+                WHERE trip_id BETWEEN %s AND %s
+                  AND expense_count = 0
+            """, (first_id, last_id))
+            removed = cur.rowcount
+
+            cur.execute(_CHUNK_SQL, (first_id, last_id))
+            rows = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    seen = set()    # (월, 카테고리, 여행) — 여행 수는 같은 달 같은 카테고리에서 한 번만
+    for row, total in zip(rows, to_minor(r["total_krw"] for r in rows)):
+        paid_day = _as_date(row["paid_day"])
+        month = paid_day if paid_day == UNDATED_MONTH else paid_day.replace(day=1)
+        key = (month, row["category"])
+        item = months.setdefault(key, [0, 0, 0])    # [여행 수, 건수, 1전 단위 합계]
+        if (key, row["trip_id"]) not in seen:
+            seen.add((key, row["trip_id"]))
+            item[0] += 1
+        item[1] += row["expense_count"]
+        item[2] += total
+    return removed
+
+
+def _replace_months(acquire, months):
+    conn = acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM expense_month_rollups")
+            if months:
+                cur.executemany("""
+                    INSERT INTO expense_month_rollups
+                        (month_start, category, trip_count, expense_count, total_krw, computed_at)
+                    VALUES (%s, %s, %s, %s, %s, NOW())
+                """, [(month, category, trips, count, from_minor(total))
+                      for (month, category), (trips, count, total) in sorted(months.items())])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def compact(acquire, batch=DEFAULT_BATCH, pause=0.0, on_progress=None):
+    """0 이 된 요약 행 정리 + 월 × 카테고리 요약 다시 계산
+
+    acquire: 커넥션을 빌려오는 함수 (pool.acquire)
+    on_progress(done, total, removed): 구간마다 호출 (done / total 은 훑은 trip_id 수)
+    반환값: dict(removed=지운 행 수, months=월 요약 행 수)
+    """
+    lo, hi = _trip_range(acquire)
+    months = {}
+    removed = 0
+    if lo is not None:
+        total = hi - lo + 1
+        for first_id in range(lo, hi + 1, batch):
+            last_id = min(first_id + batch - 1, hi)
+            removed += _compact_chunk(acquire, first_id, last_id, months)
+            if on_progress is not None:
+                on_progress(last_id - lo + 1, total, removed)
+            if pause:
+                time.sleep(pause)
+
+    _replace_months(acquire, months)
+    return {"removed": removed, "months": len(months)}
+
+
+def compact_job(ctx, payload, batch=DEFAULT_BATCH, pause=0.0):
+    """jobs 주기 작업 'rollup_compact'"""
+    def report(done, total, removed):
+        ctx.progress(done, total=total, message=f"0 인 행 {removed}개 삭제")
+
+    compact(ctx.acquire, batch=batch, pause=pause, on_progress=report)
+
+
+# --------------------------
+# 대시보드 읽기
+# --------------------------
+
+def load_month_rollups(cur):
+    """월 × 카테고리 요약 전체 (compact 가 마지막으로 계산한 값)"""
+    cur.execute(_MONTHS_SQL)
+    return cur.fetchall()
+
+
+def load_trip_rollups(cur, trip_ids):
+    """여행 목록 한 페이지의 요약 → {trip_id: dict(spent, 건수, 예산, 인원, 남은 송금, 카테고리별)}"""
+    if not trip_ids:
+        return {}
+    ids = list(trip_ids)
+    result = {trip_id: {
+        "spent_krw": 0.0, "expense_count": 0, "total_budget_krw": None,
+        "members": 0, "outstanding_krw": 0.0, "categories": [],
+    } for trip_id in ids}
+
+    cur.execute(_TRIP_BUDGETS_SQL.format(ids=_placeholders(ids)), ids)
+    for row in cur.fetchall():
+        result[row["trip_id"]]["total_budget_krw"] = row["total_budget_krw"]
+
+    # 여행 × 카테고리 (결제일은 더해서)
+    cur.execute(_TRIP_CATEGORIES_SQL.format(ids=_placeholders(ids)), ids)
+    rows = cur.fetchall()
+    for row, total in zip(rows, to_minor(r["total_krw"] for r in rows)):
+        if not row["expense_count"]:
+            continue
+        item = result[row["trip_id"]]
+        item["categories"].append({"category": row["category"] or None,
+                                   "expense_count": int(row["expense_count"]),
+                                   "total_krw": total / 100})
+        item["expense_count"] += int(row["expense_count"])
+        item["spent_krw"] += total
+    for item in result.values():
+        item["spent_krw"] /= 100
+        item["categories"].sort(key=lambda c: -c["total_krw"])
+
+    # 인원 / 아직 남은 송금 (송금까지 반영한 balance 중 받을 돈의 합)
+    cur.execute(_TRIP_BALANCES_SQL.format(ids=_placeholders(ids)), ids)
+    for row in cur.fetchall():
+        item = result[row["trip_id"]]
+        item["members"] = row["members"]
+        item["outstanding_krw"] = to_minor((row["outstanding"] or 0,))[0] / 100
+    return result
+
+
+def summarize_months(rows):
+    """월 × 카테고리 행 → (월별, 카테고리별, 전체) 합계"""
+    by_month, by_category = {}, {}
+    computed_at = None
+    for row, total in zip(rows, to_minor(r["total_krw"] for r in rows)):
+        month = _as_date(row["month_start"])
+        label = None if month == UNDATED_MONTH else month.strftime("%Y-%m")
+        for groups, key in ((by_month, label), (by_category, row["category"] or None)):
+            item = groups.setdefault(key, [0, 0])
+            item[0] += row["expense_count"]
+            item[1] += total
+        computed_at = max(computed_at or row["computed_at"], row["computed_at"])
+
+    return {
+        "computed_at": str(computed_at) if computed_at else None,
+        "total_krw": sum(t for _, t in by_month.values()) / 100,
+        "expense_count": sum(c for c, _ in by_month.values()),
+        "by_month": [{"month": k, "expense_count": c, "total_krw": t / 100}
+                     for k, (c, t) in sorted(by_month.items(), key=lambda kv: kv[0] or "")],
+        "by_category": sorted(({"category": k, "expense_count": c, "total_krw": t / 100}
+                               for k, (c, t) in by_category.items()),
+                              key=lambda c: -c["total_krw"]),
+    }
+
+
+def main(argv):
+    args = list(argv[1:])
+    batch = DEFAULT_BATCH
+    if "--batch" in args:
+        i = args.index("--batch")
+        batch = int(args[i + 1])
+        del args[i:i + 2]
+
+    if not args or args[0] not in ("compact", "show"):
+        print("사용법: python trip_rollups.py compact [--batch 1000] | show")
+        return 2
+
+    from app import pool
+
+    if args[0] == "compact":
+        result = compact(pool.acquire, batch=batch)
+        print(f"0 인 요약 행 {result['removed']:,}개 삭제, 월 × 카테고리 {result['months']:,}행 계산")
+        return 0
+
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cur:
+            summary = summarize_months(load_month_rollups(cur))
+    finally:
+        conn.close()
+    print(f"계산 시각 {summary['computed_at']}  전체 {summary['total_krw']:,.0f}원 "
+          f"({summary['expense_count']:,}건)")
+    for m in summary["by_month"]:
+        print(f"  {m['month'] or '날짜 없음':<10} {m['total_krw']:>18,.0f}원 {m['expense_count']:>10,}건")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,136 @@
+# --------------------------
+# 여행 상세 데이터 한 번에 읽기
+# --------------------------
+# trip_detail 은 여행 / Day / 액티비티 / 지출 / 참가자 / 정산 요약을
+# 각각 따로 cur.execute 해서 DB 왕복이 여러 번 생겼다.
+# 여기서는 SELECT 들을 ';' 로 이어 한 번에 보내고 (multi-statement)
+# nextset() 으로 결과를 차례대로 받아서 DB 왕복을 1번으로 줄인다.
+#
+# 커넥션에 CLIENT.MULTI_STATEMENTS 플래그가 있어야 한다 (app.py 풀 설정).
+# 플래그가 없는 커넥션이면 multi_statements=False 로 하나씩 실행할 수 있다.
+#
+# 결과는 TripSnapshot 하나로 묶어서 돌려주므로
+# 화면(trip_detail) 말고 JSON / 내보내기 같은 곳에서도 그대로 쓸 수 있다.
+
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class TripSnapshot:
+    trip: dict = None                                  # 없으면 None
+    destinations: list = field(default_factory=list)
+    activities: list = field(default_factory=list)
+    expenses: list = field(default_factory=list)
+    participants: list = field(default_factory=list)
+    balances: list = field(default_factory=list)       # 참가자별 정산 요약 (trip_balances)
+
+    def as_dict(self):
+        return asdict(self)
+
+    def itinerary(self):
+        """[(Day, 그 Day 의 액티비티 목록), ...]  — 액티비티를 destination_id 로 한 번만 훑어서 묶는다"""
+        by_destination = {}
+        for a in self.activities:
+            by_destination.setdefault(a["destination_id"], []).append(a)
+        return [(d, by_destination.get(d["destination_id"], [])) for d in self.destinations]
+
+
+# (필드 이름, SQL)  — 모든 쿼리는 trip_id 파라미터 1개
+_QUERIES = [
+    ("trip", """
+        SELECT trip_id, title, start_date, end_date, total_budget_krw, version
+        FROM trips
+        WHERE trip_id = %s
+          AND deleted_at IS NULL
+    """),
+    ("destinations", """
+        SELECT destination_id, day_no, country_name, city_name, note
+        FROM destinations
+        WHERE trip_id = %s
+        ORDER BY day_no
+    """),
+    ("activities", """
+        SELECT a.activity_id, a.destination_id, d.day_no, d.city_name,
+               a.name, a.category, a.cost_krw, a.memo
+        FROM activities a
+        JOIN destinations d ON a.destination_id = d.destination_id
+        WHERE d.trip_id = %s
+        ORDER BY d.day_no, a.start_time
+    """),
+    ("expenses", """
+        SELECT e.expense_id,
+               u.name AS payer_name,
+               e.category,
+               e.amount,
+               e.currency_code,
+               e.amount_krw,
+               e.paid_at,
+               e.memo
+        FROM expenses e
+        JOIN users u ON e.paid_by_user_id = u.user_id
+        WHERE e.trip_id = %s
+        ORDER BY e.paid_at
+    """),
+    ("participants", """
+        SELECT u.user_id, u.name
+        FROM trip_participants tp
+        JOIN users u ON tp.user_id = u.user_id
+        WHERE tp.trip_id = %s
+        ORDER BY tp.user_id
+    """),
+    ("balances", """
+        SELECT
+            u.user_id,
+            u.name,
+            IFNULL(b.total_paid, 0)  AS total_paid,
+            IFNULL(b.total_share, 0) AS total_share,
+            IFNULL(b.total_paid, 0) - IFNULL(b.total_share, 0) AS balance,
+            IFNULL(b.settled_out, 0) AS settled_out,
+            IFNULL(b.settled_in, 0)  AS settled_in
+        FROM trip_participants tp
+        JOIN users u ON tp.user_id = u.user_id
+        LEFT JOIN trip_balances b
+               ON b.trip_id = tp.trip_id AND b.user_id = tp.user_id
+        WHERE tp.trip_id = %s
+        ORDER BY tp.user_id
+    """),
+]
+
+
+def _build(results):
+    snapshot = TripSnapshot()
+    for (name, _), rows in zip(_QUERIES, results):
+        rows = list(rows)
+        if name == "trip":
+            snapshot.trip = rows[0] if rows else None
+        else:
+            setattr(snapshot, name, rows)
+    return snapshot
+
+
+def fetch_result_sets(conn, sqls, trip_id, multi_statements=True):
+    """trip_id 파라미터 1개짜리 SELECT 들을 DB 왕복 1번에 실행 → 결과 행 목록의 목록
+
+    multi_statements=False 면 하나씩 실행한다 (SQLite 등)
+    """
+    with conn.cursor() as cur:
+        if not multi_statements:
+            results = []
+            for sql in sqls:
+                cur.execute(sql, (trip_id,))
+                results.append(cur.fetchall())
+            return results
+
+        # SELECT 여러 개를 한 번에 전송 → 결과 세트를 차례로 읽기
+        sql = ";\n".join(q.strip() for q in sqls)
+        cur.execute(sql, (trip_id,) * len(sqls))
+
+        results = [cur.fetchall()]
+        while cur.nextset():
+            results.append(cur.fetchall())
+    return results
+
+
+def load_trip_snapshot(conn, trip_id, multi_statements=True):
+    """여행 1개의 상세 화면용 데이터를 모두 읽어 TripSnapshot 으로 돌려준다"""
+    return _build(fetch_result_sets(conn, [sql for _, sql in _QUERIES], trip_id, multi_statements))